@@ -1,5 +1,5 @@
 from pydantic_ai import Agent
-from helpers.utils import get_prompt, get_today_date_str
+from helpers.utils import get_prompt
 from agents.models import LLM_MODEL
 from agents.tools import TOOLS
 from pydantic_ai.settings import ModelSettings
@@ -13,7 +13,8 @@ agrinet_agent = Agent(
     deps=FarmerContext,
     retries=3,
     tools=TOOLS,
-    system_prompt=get_prompt('agrinet_system', context={'today_date': get_today_date_str()}),
+    # Kept byte-identical across requests for provider prompt caching; the date is in the user message
+    system_prompt=get_prompt('agrinet_system'),
     end_strategy='exhaustive',
     model_settings=ModelSettings(
         max_tokens=8192,
@@ -1,6 +1,7 @@
 from typing import Optional
 from pydantic import BaseModel, Field
 from langcodes import Language
+from helpers.utils import get_today_date_str
 
 
 class FarmerContext(BaseModel):
@@ -31,9 +32,13 @@ class FarmerContext(BaseModel):
         else:
             return None
     
+    def _date_string(self):
+        """Get today's date for the agrinet agent (kept out of the cacheable system prompt)."""
+        return f"**Today's date:** {get_today_date_str()}"
+
     def get_user_message(self):
         """Get the user message for the agrinet agent."""
-        strings = [self._query_string(), self._language_string(), self._moderation_string(),]
+        strings = [self._query_string(), self._language_string(), self._moderation_string(), self._date_string()]
         return "\n".join([x for x in strings if x])
 
     
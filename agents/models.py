@@ -2,8 +2,12 @@ import os
 from pydantic_ai.models.openai import OpenAIModel
 from pydantic_ai.models.gemini import GeminiModel
 from pydantic_ai.models.test import TestModel
+from pydantic_ai.providers.google_gla import GoogleGLAProvider
+from pydantic_ai.providers.openai import OpenAIProvider
+import httpx
 from dotenv import load_dotenv
 from helpers.utils import get_logger
+from agents.prompt_cache import gemini_cache_transport
 
 load_dotenv()
 logger = get_logger(__name__)
@@ -21,7 +25,9 @@ def get_model():
         if LLM_PROVIDER == 'gemini':
             api_key = os.getenv('GEMINI_API_KEY')
             if api_key:
-                return GeminiModel(LLM_MODEL_NAME, api_key=api_key)
+                # Static prompt prefixes are sent as Gemini cached content (see agents/prompt_cache.py)
+                http_client = httpx.AsyncClient(transport=gemini_cache_transport, timeout=httpx.Timeout(600, connect=5)) if gemini_cache_transport else None
+                return GeminiModel(LLM_MODEL_NAME, provider=GoogleGLAProvider(api_key=api_key, http_client=http_client))
             logger.error("❌ GEMINI_API_KEY is missing!")
             
         elif LLM_PROVIDER == 'groq':
@@ -29,15 +35,14 @@ def get_model():
             if api_key:
                 return OpenAIModel(
                     model_name=LLM_MODEL_NAME,
-                    base_url='https://api.groq.com/openai/v1',
-                    api_key=api_key
+                    provider=OpenAIProvider(base_url='https://api.groq.com/openai/v1', api_key=api_key)
                 )
             logger.error("❌ GROQ_API_KEY is missing!")
             
         elif LLM_PROVIDER == 'openai':
             api_key = os.getenv('OPENAI_API_KEY')
             if api_key:
-                return OpenAIModel(model_name=LLM_MODEL_NAME, api_key=api_key)
+                return OpenAIModel(model_name=LLM_MODEL_NAME, provider=OpenAIProvider(api_key=api_key))
             logger.error("❌ OPENAI_API_KEY is missing!")
 
         # Fallback to TestModel if provider is unknown or keys are missing
@@ -0,0 +1,135 @@
+"""
+Cache of LLM moderation verdicts.
+
+Farmers ask the same questions over and over ("kapus bhav", "weather
+tomorrow"), and the verdict for a query only depends on what the
+moderation agent sees: the query, the selected language and the recent
+conversation. Verdicts are keyed by a hash of
+
+* the query, normalized like the local classifier's input (NFC, lowercase,
+  whitespace collapsed),
+* the language code,
+* a fingerprint of the conversation excerpt passed to the moderation agent
+  (empty for first-turn queries, so those are shared across sessions),
+* a fingerprint of the moderation prompt, so prompt changes invalidate the
+  cache.
+
+Each worker holds a bounded in-process LRU whose entries expire after
+`MODERATION_CACHE_TTL` seconds; when a Redis client is configured
+(`moderation_cache.use_redis`), verdicts are also stored there with the same
+TTL and shared by all workers and pods. Redis errors are logged and treated
+as misses.
+"""
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from agents.moderation import QueryModerationResult
+from agents.moderation_classifier import normalize_query
+from helpers.utils import get_logger, get_prompt
+
+logger = get_logger(__name__)
+
+MODERATION_CACHE_TTL = int(os.getenv("MODERATION_CACHE_TTL", str(7 * 24 * 3600)))
+MODERATION_CACHE_MAX_ENTRIES = int(os.getenv("MODERATION_CACHE_MAX_ENTRIES", "20000"))
+
+MODERATION_PROMPT_HASH = hashlib.blake2b(get_prompt("moderation_system").encode("utf-8"), digest_size=8).hexdigest()
+
+
+def moderation_cache_key(query: str, lang_code: str, context: str = "") -> str:
+    """Cache key for the verdict on a query in a conversation.
+
+    Args:
+        query: The user's query.
+        lang_code: The selected language.
+        context: The conversation excerpt passed to the moderation agent.
+    """
+    material = "\x00".join([MODERATION_PROMPT_HASH, lang_code or "", normalize_query(query), context])
+    return hashlib.blake2b(material.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+class ModerationCache:
+    """Two-level (in-process LRU, optional Redis) moderation verdict cache.
+
+    Args:
+        max_entries: Maximum entries in the in-process LRU.
+        ttl: Seconds verdicts are kept, in process and in Redis.
+    """
+
+    def __init__(self, max_entries: int = MODERATION_CACHE_MAX_ENTRIES, ttl: int = MODERATION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, QueryModerationResult]]" = OrderedDict()
+        self._client = None
+        self._prefix = ""
+        self.hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+
+    def use_redis(self, client, prefix: str = ""):
+        """Share verdicts through this redis.asyncio client."""
+        self._client = client
+        self._prefix = prefix
+
+    def _remember(self, key: str, verdict: QueryModerationResult):
+        self._entries[key] = (time.monotonic() + self.ttl, verdict)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _peek(self, key: str) -> Optional[QueryModerationResult]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, verdict = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return verdict
+
+    async def get(self, key: str) -> Optional[QueryModerationResult]:
+        """Cached verdict for a key from `moderation_cache_key`."""
+        verdict = self._peek(key)
+        if verdict is not None:
+            self.hits += 1
+            return verdict
+        if self._client is not None:
+            redis_key = f"{self._prefix}moderation:{key}"
+            try:
+                raw = await self._client.get(redis_key)
+            except Exception as e:
+                logger.warning(f"Moderation cache read failed for {redis_key}: {e}")
+                raw = None
+            if raw is not None:
+                verdict = QueryModerationResult.model_validate_json(raw)
+                self._remember(key, verdict)
+                self.remote_hits += 1
+                return verdict
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, verdict: QueryModerationResult):
+        self._remember(key, verdict)
+        if self._client is None:
+            return
+        redis_key = f"{self._prefix}moderation:{key}"
+        try:
+            await self._client.set(redis_key, verdict.model_dump_json(), ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Moderation cache write failed for {redis_key}: {e}")
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.remote_hits + self.misses
+        return {
+            "hits": self.hits,
+            "remote_hits": self.remote_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.hits + self.remote_hits) / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+moderation_cache = ModerationCache()
@@ -0,0 +1,358 @@
+"""
+Local first-stage query moderation.
+
+Most queries are plainly agricultural ("kapus bhav", "weather tomorrow") or
+plainly out of bounds, and do not need an LLM call with the full moderation
+prompt. `LocalModerator.classify` labels those in well under a millisecond
+and returns None for everything else, which is then escalated to
+`moderation_agent`:
+
+1. High-precision regex rules catch obvious rejects (prompt injection,
+   requests for political endorsements, illegal crops, banned pesticides)
+   and obviously valid queries (strong farming evidence, nothing off-topic,
+   no harm or policy signal, a single clause).
+2. A linear model over hashed character n-gram TF-IDF features (works for
+   English, Marathi and transliterated Marathi alike) predicts the
+   category; only predictions above a per-class confidence threshold are
+   used.
+
+The model is trained from logged `QueryModerationResult` verdicts of the LLM
+(see `MODERATION_LOG_PATH`) plus the bundled seed examples:
+    python scripts/train_moderation_classifier.py moderation_log.jsonl
+and evaluated against held-out verdicts with
+    python scripts/evaluate_moderation_classifier.py moderation_log.jsonl
+
+It only depends on numpy.
+"""
+import json
+import os
+import re
+import time
+import unicodedata
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple, get_args
+
+import numpy as np
+
+from agents.moderation import QueryModerationResult
+from helpers.utils import get_logger
+
+logger = get_logger(__name__)
+
+MODERATION_MODEL_PATH = os.getenv("MODERATION_MODEL_PATH", "assets/moderation_classifier.npz")
+MODERATION_SEED_PATH = "assets/moderation_seed.jsonl"
+# Minimum model confidence to answer locally
+VALID_THRESHOLD = float(os.getenv("LOCAL_MODERATION_VALID_THRESHOLD", "0.9"))
+REJECT_THRESHOLD = float(os.getenv("LOCAL_MODERATION_REJECT_THRESHOLD", "0.95"))
+# Short follow-ups ("yes", "tell me more") depend on the conversation, leave them to the LLM
+CONTEXT_DEPENDENT_WORDS = 3
+
+CATEGORIES: List[str] = list(get_args(QueryModerationResult.model_fields["category"].annotation))
+VALID_CATEGORY = "valid_agricultural"
+
+# Actions as in the moderation prompt's action mapping
+CATEGORY_ACTIONS = {
+    "valid_agricultural": "Proceed with the query",
+    "invalid_non_agricultural": "Decline with standard non-agri response",
+    "invalid_external_reference": "Decline with external reference response",
+    "invalid_compound_mixed": "Decline with mixed content response",
+    "unsafe_illegal": "Decline with safety policy response",
+    "political_controversial": "Decline with political neutrality response",
+    "role_obfuscation": "Decline with agricultural-only response",
+}
+
+FEATURE_DIM = 1 << 18
+NGRAM_SIZES = (2, 3, 4)
+
+_BANNED_PESTICIDES = r"(endosulfan|endrin|aldrin|dieldrin|monocrotophos|methyl parathion|phorate|एंडोसल्फान|एन्ड्रिन)"
+_ILLEGAL_CROPS = r"(ganja|cannabis|marijuana|opium|poppy|afeem|गांजा|अफू)"
+
+RULES: List[Tuple[str, re.Pattern]] = [
+    ("role_obfuscation", re.compile(
+        r"\b(ignore|forget|disregard) (all |any |the |your )*(previous |prior |above |earlier )?"
+        r"(instructions|rules|prompts?|guidelines)\b"
+        r"|\bpretend (you are|you're|to be)\b"
+        r"|\byou are (now|no longer)\b"
+        r"|\b(system prompt|developer mode|jailbreak|dan mode)\b"
+        r"|\b(reveal|show|print|repeat) (me )?(your|the) (system )?(instructions|prompt|rules)\b"
+        r"|सर्व सूचना (विसर|दुर्लक्ष)"
+    )),
+    ("political_controversial", re.compile(
+        r"\b(which|what|best|better) (political )?party\b"
+        r"|\bvote (for|to)\b"
+        r"|\bwho should (i vote|win)\b"
+        r"|राजकीय पक्ष"
+        r"|(कोणाला|कोणत्या पक्षाला) मत"
+    )),
+    ("unsafe_illegal", re.compile(
+        r"\b(grow|growing|cultivate|cultivation|farming|plant|sell|buy)\b.{0,40}" + _ILLEGAL_CROPS
+        + r"|" + _ILLEGAL_CROPS + r".{0,20}(शेती|लागवड)"
+        + r"|\b(use|using|apply|spray|buy|get)\b.{0,30}" + _BANNED_PESTICIDES
+        + r"|" + _BANNED_PESTICIDES + r".{0,20}(कुठे मिळ|कसे वापर|फवार)"
+    )),
+]
+
+
+# Obviously valid: strong farming evidence (a crop, pest, input or livestock
+# term, or two generic farming terms), nothing off-topic, no policy signal,
+# and no second clause that could make the query a mixed one
+_DEVANAGARI = "\u0900-\u097F"
+# Marathi case endings and postpositions that attach to a noun
+_MARATHI_SUFFIX = (
+    "(?:च्या|चा|ची|चे|ला|ना|ने|त|मध्ये|साठी|विषयी|वर|ाच्या|ाचा|ाची|ाचे|ाला|ाने|ात|ावर|ासाठी"
+    "|ाविषयी|ांच्या|ांचा|ांची|ांचे|ांना|ांत|ांसाठी|ांविषयी|ी|े|ा)?"
+)
+
+
+def _terms(english: str, marathi: str) -> re.Pattern:
+    """English words, or Marathi words (optionally inflected), matched as whole words."""
+    return re.compile(
+        rf"\b(?:{english})\b"
+        rf"|(?<![{_DEVANAGARI}\w])(?:{marathi}){_MARATHI_SUFFIX}(?![{_DEVANAGARI}\w])"
+    )
+
+
+STRONG_AGRICULTURAL_TERMS = _terms(
+    r"crops?|farming|farmers?|agricultur\w*|fertili[sz]ers?|urea|dap|manure|compost|vermicompost"
+    r"|pesticides?|insecticides?|fungicides?|herbicides?|weedicides?|pests?|bollworms?|aphids?|whitefl(?:y|ies)"
+    r"|sowing|irrigation|drip irrigation|mandi|apmc|msp|kharif|rabi|cotton|soybeans?|soyabeans?|onions?"
+    r"|tomato(?:es)?|wheat|paddy|jowar|bajra|maize|sugarcane|chickpeas?|pigeon peas?|pomegranates?|brinjal"
+    r"|chillies|chilli|cattle|buffalo(?:es)?|goats?|poultry|dairy|fodder|livestock"
+    r"|kapus|kanda|soyabin|harbhara|gahu|favarni|perni|sheti|pik",
+    r"कापूस|कापसा|कापस|सोयाबीन|कांदा|कांद्या|कांदे|टोमॅटो|गहू|गव्हा|हरभरा|हरभऱ्या|तूर|तुरी|ऊस|उसा"
+    r"|द्राक्ष|द्राक्षे|डाळिंब|केळी|केळ्या|मका|मक्या|वांगी|वांग्या|मिरची|ज्वारी|बाजरी|भात"
+    r"|युरिया|कीड|कीटकनाशक|कीटक|अळी|अळ्या|बुरशी|तण|फवारणी|पेरणी|लागवड|सिंचन|पीक|पिका|पिके|शेती|शेतकरी"
+    r"|मंडी|बाजार समिती|जनावर|जनावरां|गाय|गाई|म्हैस|म्हशी|शेळी|शेळ्या|कोंबडी|कोंबड्या|चारा",
+)
+GENERIC_AGRICULTURAL_TERMS = _terms(
+    r"weather|rain|rainfall|monsoon|seeds?|harvest\w*|soil|diseases?|spray\w*|yield|market price|prices?"
+    r"|rates?|warehouse|godown|subsid(?:y|ies)|schemes?|insurance|kisan|bhav|paus|khat",
+    r"पाऊस|पावसा|हवामान|बियाणे|बियाण्या|काढणी|माती|रोग|फवारा|उत्पादन|भाव|बाजारभाव|दर|गोदाम|योजना|अनुदान"
+    r"|विमा|खत|खता",
+)
+OFF_TOPIC_TERMS = re.compile(
+    r"\b(cricket|ipl|score|movies?|films?|cinema|bollywood|songs?|lyrics|dance|poem|joke|election\w*|party"
+    r"|vote|minister|politic\w*|mahabharat\w*|ramayan\w*|astrolog\w*|horoscope|potter|programming|python"
+    r"|code|essay|homework|letter|boss|email|resume|iphone|mobile|gold|petrol|share market|stock|bitcoin"
+    r"|recipe|girlfriend|boyfriend|ignore|pretend"
+    r"|story|stories|character|novel|series|baahubali|thrones|tips does"
+    r"|government|opposition|modi|congress|bjp|paksh|sarkar"
+    r"|you are|you're|bot|assistant|from now on|instructions|prompt)\b"
+    r"|क्रिकेट|स्कोअर|चित्रपट|सिनेमा|गाणे|गायक|नृत्य|विनोद|निवडणू|पक्ष|मत द्या|मंत्री|महाभारत|रामायण"
+    r"|ज्योतिष|मोबाईल|सोन्या|पेट्रोल|पत्र|सरकार|विरोधी|तू आता|सहाय्यक|नाहीस|कथा"
+)
+# Harm, crime or evasion: always left to the LLM
+POLICY_TERMS = re.compile(
+    r"\b(poison\w*|kill\w*|explosive\w*|bomb|weapon|illegal\w*|smuggl\w*|border|black market|fake"
+    r"|counterfeit|adulterat\w*|bribe\w*|cheat\w*|hack\w*|steal\w*|stolen|forest|neighbou?r\w*)\b"
+    r"|विष(?!य)|जीवे मार|मारून टाक|मारायच|मारण्य|स्फोट|बेकायदेश|तस्करी|भेसळ|लाच|फसव|जंगल|चोर|शेजार"
+)
+CLAUSE_JOINERS = re.compile(r"\b(and|also|plus|then|ani|aani)\b|आणि|तसेच|आणखी एक")
+
+
+def normalize_query(text: str) -> str:
+    """Normalize a query: Unicode NFC, lowercase, whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFC", text).lower().split())
+
+
+def hashed_ngrams(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Hashed character n-gram and word counts of a normalized query.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Unique feature ids and their counts.
+    """
+    padded = f" {text} "
+    grams = [padded[i:i + n] for n in NGRAM_SIZES for i in range(len(padded) - n + 1)]
+    grams.extend(f"w:{word}" for word in text.split())
+    ids = np.fromiter((zlib.crc32(gram.encode("utf-8")) % FEATURE_DIM for gram in grams), dtype=np.int64, count=len(grams))
+    return np.unique(ids, return_counts=True)
+
+
+class ModerationModel:
+    """Softmax regression over TF-IDF weighted hashed n-grams.
+
+    Args:
+        weights: (FEATURE_DIM, n categories) weights.
+        bias: (n categories,) biases.
+        idf: (FEATURE_DIM,) inverse document frequencies.
+        categories: Category of each output column.
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, idf: np.ndarray, categories: Sequence[str]):
+        self.weights = weights
+        self.bias = bias
+        self.idf = idf
+        self.categories = list(categories)
+
+    def features(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """L2-normalized, sublinear TF-IDF features of a normalized query."""
+        ids, counts = hashed_ngrams(text)
+        values = (1 + np.log(counts)) * self.idf[ids]
+        norm = np.linalg.norm(values)
+        return ids, (values / norm if norm else values).astype(np.float32)
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        ids, values = self.features(text)
+        scores = self.bias + values @ self.weights[ids]
+        scores = np.exp(scores - scores.max())
+        return scores / scores.sum()
+
+    @classmethod
+    def train(
+        cls,
+        texts: Sequence[str],
+        labels: Sequence[str],
+        epochs: int = 300,
+        learning_rate: float = 2.0,
+        l2: float = 1e-4,
+    ) -> "ModerationModel":
+        """Fit the model with full-batch gradient descent (classes weighted to balance).
+
+        Args:
+            texts: Normalized queries.
+            labels: Their categories.
+            epochs: Gradient descent steps.
+            learning_rate: Step size.
+            l2: L2 regularization strength.
+        """
+        categories = CATEGORIES
+        y = np.array([categories.index(label) for label in labels])
+        n, n_classes = len(texts), len(categories)
+
+        grams = [hashed_ngrams(text) for text in texts]
+        df = np.zeros(FEATURE_DIM, dtype=np.float64)
+        for ids, _ in grams:
+            df[ids] += 1
+        idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+
+        model = cls(np.zeros((FEATURE_DIM, n_classes), dtype=np.float32), np.zeros(n_classes, dtype=np.float32), idf, categories)
+        rows = [model.features(text) for text in texts]
+        ids = np.concatenate([r[0] for r in rows])
+        values = np.concatenate([r[1] for r in rows])
+        row_of = np.repeat(np.arange(n), [len(r[0]) for r in rows])
+        starts = np.concatenate([[0], np.cumsum([len(r[0]) for r in rows])[:-1]])
+
+        class_counts = np.bincount(y, minlength=n_classes)
+        sample_weight = n / (np.count_nonzero(class_counts) * class_counts[y])
+        onehot = np.eye(n_classes, dtype=np.float32)[y]
+        for _ in range(epochs):
+            scores = np.add.reduceat(model.weights[ids] * values[:, None], starts, axis=0) + model.bias
+            scores = np.exp(scores - scores.max(axis=1, keepdims=True))
+            probs = scores / scores.sum(axis=1, keepdims=True)
+            error = (probs - onehot) * sample_weight[:, None] / n
+            contribution = values[:, None] * error[row_of]
+            grad = np.stack(
+                [np.bincount(ids, weights=contribution[:, c], minlength=FEATURE_DIM) for c in range(n_classes)],
+                axis=1,
+            )
+            model.weights -= (learning_rate * (grad + l2 * model.weights)).astype(np.float32)
+            model.bias -= (learning_rate * error.sum(axis=0)).astype(np.float32)
+        return model
+
+    def save(self, path: str):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, idf=self.idf, categories=np.array(self.categories))
+
+    @classmethod
+    def load(cls, path: str) -> "ModerationModel":
+        with np.load(path) as data:
+            return cls(data["weights"], data["bias"], data["idf"], [str(c) for c in data["categories"]])
+
+
+class LocalModerator:
+    """Rules plus model, answering only confident cases.
+
+    Args:
+        model: The trained model, or None to use the rules only.
+        valid_threshold: Minimum probability to label a query valid.
+        reject_threshold: Minimum probability to reject a query.
+    """
+
+    def __init__(
+        self,
+        model: Optional[ModerationModel],
+        valid_threshold: float = VALID_THRESHOLD,
+        reject_threshold: float = REJECT_THRESHOLD,
+    ):
+        self.model = model
+        self.valid_threshold = valid_threshold
+        self.reject_threshold = reject_threshold
+        self.labelled: Dict[str, int] = {}
+        self.escalated = 0
+
+    @staticmethod
+    def _strong_agricultural(text: str) -> bool:
+        if STRONG_AGRICULTURAL_TERMS.search(text):
+            return True
+        return len({match.group(0) for match in GENERIC_AGRICULTURAL_TERMS.finditer(text)}) >= 2
+
+    def predict(self, query: str, has_context: bool = False) -> Tuple[Optional[str], str]:
+        """Category for a query, or None to escalate, and what decided it."""
+        text = normalize_query(query)
+        for category, pattern in RULES:
+            if pattern.search(text):
+                return category, "rule"
+        if has_context and len(text.split()) <= CONTEXT_DEPENDENT_WORDS:
+            return None, "context"
+        signals = OFF_TOPIC_TERMS.search(text) or POLICY_TERMS.search(text) or CLAUSE_JOINERS.search(text)
+        if not signals and self._strong_agricultural(text):
+            return VALID_CATEGORY, "rule"
+        if self.model is None:
+            return None, "no_model"
+        probs = self.model.predict_proba(text)
+        best = int(np.argmax(probs))
+        category = self.model.categories[best]
+        threshold = self.valid_threshold if category == VALID_CATEGORY else self.reject_threshold
+        if probs[best] >= threshold and not (category == VALID_CATEGORY and signals):
+            return category, "model"
+        return None, "uncertain"
+
+    def classify(self, query: str, has_context: bool = False) -> Optional[QueryModerationResult]:
+        """Moderation result for an obvious query, None if the LLM should decide.
+
+        Args:
+            query: The user's query.
+            has_context: Whether the query continues a conversation.
+        """
+        category, _ = self.predict(query, has_context)
+        if category is None:
+            self.escalated += 1
+            return None
+        self.labelled[category] = self.labelled.get(category, 0) + 1
+        return QueryModerationResult(category=category, action=CATEGORY_ACTIONS[category])
+
+    def stats(self) -> Dict[str, object]:
+        return {"labelled": dict(self.labelled), "escalated": self.escalated}
+
+
+def load_local_moderator(path: str = MODERATION_MODEL_PATH) -> LocalModerator:
+    """Local moderator with the trained model if present, rules only otherwise."""
+    if os.path.exists(path):
+        return LocalModerator(ModerationModel.load(path))
+    logger.warning(f"Moderation model {path} not found, local moderation uses rules only")
+    return LocalModerator(None)
+
+
+def log_verdict(path: str, query: str, has_context: bool, category: str, latency_ms: float, source: str = "llm"):
+    """Append a moderation verdict to a JSON lines log, the training data of the model.
+
+    Args:
+        path: The log file.
+        query: The user's query.
+        has_context: Whether the query continued a conversation.
+        category: The verdict.
+        latency_ms: How long the verdict took.
+        source: "llm" or "local".
+    """
+    record = {
+        "query": query,
+        "has_context": has_context,
+        "category": category,
+        "latency_ms": round(latency_ms, 1),
+        "source": source,
+        "ts": time.time(),
+    }
+    try:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        logger.warning(f"Could not log moderation verdict to {path}: {e}")
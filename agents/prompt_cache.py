@@ -0,0 +1,241 @@
+"""
+Provider-side prompt prefix caching and cached-token accounting.
+
+The system prompts of the agents (and their tool declarations) are
+identical on every call and make up most of the input tokens. Providers can
+reuse the work for a repeated prefix when it is byte-identical, so the
+prompts contain nothing request-specific (today's date travels with the
+user message, see `FarmerContext.get_user_message`):
+
+* OpenAI-compatible APIs cache long repeated prefixes automatically.
+* Gemini 2.5 models cache implicitly; for explicit caching,
+  `GeminiContextCacheTransport` stores the system instruction and tools of
+  a request as Gemini cached content and replaces them with a reference to
+  it, so they are billed at the cached rate. Prefixes under
+  `GEMINI_CACHE_MIN_TOKENS` (estimated) are sent as they are. A request
+  rejected because of its cached content (expired or unknown) is resent in
+  full once; other errors are returned as they are. A prefix Gemini refuses
+  to cache (too small, or not supported by the model) is not offered again;
+  after a transient error (rate limit, server or network error) creation is
+  retried after `Retry-After` or `CACHE_CREATE_RETRY_DELAY` seconds.
+
+`prompt_cache_metrics` counts cached vs. uncached input tokens per agent
+from the usage the providers report.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Set, Tuple
+
+import httpx
+from pydantic_ai.usage import Usage
+
+from helpers.utils import get_logger
+
+logger = get_logger(__name__)
+
+GEMINI_CONTEXT_CACHE = os.getenv("GEMINI_CONTEXT_CACHE", "true").lower() == "true"
+GEMINI_CACHE_TTL = int(os.getenv("GEMINI_CACHE_TTL", "3600"))
+# Smallest prefix Gemini accepts for explicit caching (4096 for 2.0 models, 1024 for 2.5 Flash)
+GEMINI_CACHE_MIN_TOKENS = int(os.getenv("GEMINI_CACHE_MIN_TOKENS", "4096"))
+
+# Request fields that move into the cached content
+PREFIX_FIELDS = ("systemInstruction", "tools", "toolConfig")
+# Recreate cached content this long before it expires
+REFRESH_MARGIN = 60
+CHARS_PER_TOKEN = 4
+# Seconds before retrying a cached content creation that failed transiently
+CACHE_CREATE_RETRY_DELAY = 60
+# Creation errors meaning the prefix will never be cacheable as it is
+UNCACHEABLE_ERROR = re.compile(r"too small|min_total_token_count|not supported|does not support", re.IGNORECASE)
+
+
+def cached_input_tokens(usage: Usage) -> int:
+    """Input tokens served from the provider's prompt cache."""
+    details = usage.details or {}
+    # Gemini reports cached_content_token_count, OpenAI-compatible APIs cached_tokens
+    return details.get("cached_content_token_count", 0) or details.get("cached_tokens", 0)
+
+
+class PromptCacheMetrics:
+    """Cached and uncached input tokens per agent."""
+
+    def __init__(self):
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.input_tokens: Dict[str, int] = defaultdict(int)
+        self.cached_tokens: Dict[str, int] = defaultdict(int)
+
+    def record(self, agent: str, usage: Usage):
+        """Record the usage of one agent run and log its cached share."""
+        input_tokens = usage.request_tokens or 0
+        cached = cached_input_tokens(usage)
+        self.requests[agent] += 1
+        self.input_tokens[agent] += input_tokens
+        self.cached_tokens[agent] += cached
+        logger.info(f"{agent} input tokens: {input_tokens} ({cached} cached, {input_tokens - cached} uncached)")
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            agent: {
+                "requests": self.requests[agent],
+                "input_tokens": self.input_tokens[agent],
+                "cached_tokens": self.cached_tokens[agent],
+                "uncached_tokens": self.input_tokens[agent] - self.cached_tokens[agent],
+                "cached_share": round(self.cached_tokens[agent] / self.input_tokens[agent], 4)
+                if self.input_tokens[agent] else 0.0,
+            }
+            for agent in self.requests
+        }
+
+
+prompt_cache_metrics = PromptCacheMetrics()
+
+
+class GeminiContextCacheTransport(httpx.AsyncBaseTransport):
+    """httpx transport moving the static prefix of Gemini requests into cached content.
+
+    Args:
+        transport: Transport that sends the requests.
+        ttl: Seconds cached content lives.
+        min_tokens: Minimum estimated prefix size to cache.
+    """
+
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        ttl: int = GEMINI_CACHE_TTL,
+        min_tokens: int = GEMINI_CACHE_MIN_TOKENS,
+    ):
+        self._transport = transport or httpx.AsyncHTTPTransport()
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        # prefix fingerprint -> (cached content name, monotonic expiry)
+        self._caches: Dict[str, Tuple[str, float]] = {}
+        self._unsupported: Set[str] = set()
+        # prefix fingerprint -> monotonic time creation may be retried
+        self._retry_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self.created = 0
+        self.cached_requests = 0
+        self.fallbacks = 0
+        self.create_errors = 0
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+    @staticmethod
+    def _with_body(request: httpx.Request, url: httpx.URL, body: dict) -> httpx.Request:
+        headers = {k: v for k, v in request.headers.items() if k.lower() != "content-length"}
+        return httpx.Request(
+            "POST", url, headers=headers, content=json.dumps(body).encode(), extensions=request.extensions
+        )
+
+    async def _cached_content(self, request: httpx.Request, model: str, prefix: dict) -> Optional[str]:
+        """Name of the cached content holding `prefix`, created if needed; None if not cacheable."""
+        serialized = json.dumps(prefix, sort_keys=True)
+        fingerprint = hashlib.blake2b(f"{model}\x00{serialized}".encode(), digest_size=16).hexdigest()
+        if fingerprint in self._unsupported or self._retry_at.get(fingerprint, 0) > time.monotonic():
+            return None
+        if len(serialized) / CHARS_PER_TOKEN < self.min_tokens:
+            self._unsupported.add(fingerprint)
+            return None
+        async with self._locks[fingerprint]:
+            cached = self._caches.get(fingerprint)
+            if cached is not None and cached[1] - REFRESH_MARGIN > time.monotonic():
+                return cached[0]
+            create = self._with_body(
+                request,
+                request.url.copy_with(raw_path=b"/v1beta/cachedContents"),
+                {"model": f"models/{model}", **prefix, "ttl": f"{self.ttl}s"},
+            )
+            try:
+                response = await self._transport.handle_async_request(create)
+                body = await response.aread()
+                await response.aclose()
+            except httpx.HTTPError:
+                self._creation_failed(fingerprint, CACHE_CREATE_RETRY_DELAY)
+                raise
+            if response.status_code != 200:
+                text = body.decode(errors="replace")
+                if response.status_code in (400, 404) and UNCACHEABLE_ERROR.search(text):
+                    logger.warning(f"Gemini context cache unavailable for {model} ({response.status_code}): {text[:200]!r}")
+                    self._unsupported.add(fingerprint)
+                else:
+                    delay = self._retry_delay(response)
+                    logger.warning(
+                        f"Gemini cached content creation failed for {model} ({response.status_code}), "
+                        f"retrying in {delay}s: {text[:200]!r}"
+                    )
+                    self._creation_failed(fingerprint, delay)
+                return None
+            self._retry_at.pop(fingerprint, None)
+            name = json.loads(body)["name"]
+            self._caches[fingerprint] = (name, time.monotonic() + self.ttl)
+            self.created += 1
+            logger.info(f"Created Gemini cached content {name} for {model} (~{len(serialized) // CHARS_PER_TOKEN} tokens)")
+            return name
+
+    def _creation_failed(self, fingerprint: str, delay: float):
+        self._retry_at[fingerprint] = time.monotonic() + delay
+        self.create_errors += 1
+
+    @staticmethod
+    def _retry_delay(response: httpx.Response) -> float:
+        """Seconds from the response's Retry-After header, else CACHE_CREATE_RETRY_DELAY."""
+        try:
+            return max(0.0, float(response.headers.get("retry-after", CACHE_CREATE_RETRY_DELAY)))
+        except ValueError:
+            return CACHE_CREATE_RETRY_DELAY
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if request.method != "POST" or not path.endswith(("generateContent", "streamGenerateContent")):
+            return await self._transport.handle_async_request(request)
+        body = json.loads(await request.aread())
+        prefix = {field: body[field] for field in PREFIX_FIELDS if field in body}
+        model = path.rsplit("/", 1)[-1].split(":", 1)[0]
+        if "systemInstruction" not in prefix:
+            return await self._transport.handle_async_request(request)
+        try:
+            name = await self._cached_content(request, model, prefix)
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            logger.warning(f"Gemini context cache creation failed: {e!r}")
+            name = None
+        if name is None:
+            return await self._transport.handle_async_request(request)
+
+        cached_body = {k: v for k, v in body.items() if k not in PREFIX_FIELDS}
+        cached_body["cachedContent"] = name
+        response = await self._transport.handle_async_request(self._with_body(request, request.url, cached_body))
+        if response.status_code in (400, 403, 404):
+            raw = b"".join([chunk async for chunk in response.stream])
+            await response.aclose()
+            error = httpx.Response(
+                response.status_code, headers=response.headers, content=raw, extensions=response.extensions
+            )
+            if "cachedcontent" not in error.text.lower():
+                # A bad request, not a cache problem: resending it would only bill it twice
+                return error
+            # Expired or deleted cached content: forget it and send the full request
+            logger.warning(f"Gemini cached content {name} rejected ({response.status_code}), resending in full")
+            self._caches = {k: v for k, v in self._caches.items() if v[0] != name}
+            self.fallbacks += 1
+            return await self._transport.handle_async_request(request)
+        self.cached_requests += 1
+        return response
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "cached_contents": len(self._caches),
+            "created": self.created,
+            "cached_requests": self.cached_requests,
+            "fallbacks": self.fallbacks,
+            "create_errors": self.create_errors,
+        }
+
+
+gemini_cache_transport = GeminiContextCacheTransport() if GEMINI_CONTEXT_CACHE else None
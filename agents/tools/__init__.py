@@ -5,9 +5,9 @@ from agents.tools.search import search_documents
 from agents.tools.weather import weather_forecast
 from agents.tools.mandi import mandi_prices
 from agents.tools.warehouse import warehouse_data
-from agents.tools.maps import forward_geocode  
+from agents.tools.maps import forward_geocode, forward_geocode_batch
 from pydantic_ai import Tool
-from agents.tools.terms import search_terms
+from agents.tools.terms import search_terms, search_terms_batch
 from agents.tools.scheme import get_scheme_info
 
 TOOLS = [
@@ -15,6 +15,10 @@ TOOLS = [
         search_terms,
         takes_ctx=False,
     ),
+    Tool(
+        search_terms_batch,
+        takes_ctx=False,
+    ),
     Tool(
         search_documents,
         takes_ctx=False, # No context is needed for this tool
@@ -35,6 +39,10 @@ TOOLS = [
         forward_geocode,
         takes_ctx=False,
     ),
+    Tool(
+        forward_geocode_batch,
+        takes_ctx=False,
+    ),
     Tool(
         get_scheme_info,
         takes_ctx=False,
@@ -0,0 +1,123 @@
+"""
+Shared async HTTP client for the Beckn BAP endpoint.
+
+The weather, mandi, warehouse and scheme tools all post search requests to
+`BAP_ENDPOINT`. They share one `httpx.AsyncClient`, so connections are kept
+alive and reused across chats instead of being opened per call, and a slow
+upstream no longer blocks the event loop.
+
+The client is created in the FastAPI lifespan (`start_client`) and closed on
+shutdown (`close_client`). Outside the app (scripts, notebooks) it is created
+lazily on first use.
+
+HTTP/2 is used when the `h2` package is installed, HTTP/1.1 keep-alive
+otherwise.
+"""
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+
+from agents.tools.singleflight import flights
+from helpers.utils import get_logger
+
+# Optional import for HTTP/2 support
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+MAX_CONNECTIONS = int(os.getenv("BECKN_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("BECKN_MAX_KEEPALIVE_CONNECTIONS", "20"))
+KEEPALIVE_EXPIRY = 30.0
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+class BecknStatusError(Exception):
+    """The BAP endpoint answered with a non-200 status."""
+
+    def __init__(self, status_code: int):
+        super().__init__(f"Beckn search returned status code {status_code}")
+        self.status_code = status_code
+
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        # Per-request timeouts are passed by each tool
+        timeout=httpx.Timeout(15.0, connect=10.0),
+    )
+
+
+async def start_client() -> httpx.AsyncClient:
+    """Create the shared client (called from the app lifespan)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+        logger.info(
+            f"Beckn HTTP client started (HTTP/2: {HTTP2_AVAILABLE}, "
+            f"max connections: {MAX_CONNECTIONS}, keep-alive: {MAX_KEEPALIVE_CONNECTIONS})"
+        )
+    return _client
+
+
+async def close_client():
+    """Close the shared client and its connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it if the lifespan did not."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+async def beckn_search(payload: Dict[str, Any], timeout: httpx.Timeout) -> httpx.Response:
+    """Post a Beckn search payload to `BAP_ENDPOINT`.
+
+    Args:
+        payload: The Beckn request body.
+        timeout: Timeout for this tool's request.
+
+    Returns:
+        httpx.Response: The response, whatever its status code.
+
+    Raises:
+        httpx.TimeoutException: If the request timed out.
+        httpx.HTTPError: If the request failed.
+    """
+    return await get_client().post(os.getenv("BAP_ENDPOINT"), json=payload, timeout=timeout)
+
+
+async def beckn_search_json(payload: Dict[str, Any], timeout: httpx.Timeout, key: str) -> Dict[str, Any]:
+    """Post a Beckn search and return its JSON body.
+
+    Overlapping calls with the same `key` (see `singleflight.flight_key`)
+    share one upstream request.
+
+    Raises:
+        BecknStatusError: If the endpoint answered with a non-200 status.
+        httpx.TimeoutException: If the request timed out.
+        httpx.HTTPError: If the request failed.
+    """
+    async def search():
+        response = await beckn_search(payload, timeout)
+        if response.status_code != 200:
+            raise BecknStatusError(response.status_code)
+        return response.json()
+
+    return await flights.do(key, search)
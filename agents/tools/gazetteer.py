@@ -0,0 +1,143 @@
+"""
+Offline gazetteer of Maharashtra places for geocoding without the network.
+
+`assets/gazetteer_mh.csv` lists places (districts, talukas, villages) with
+their Marathi name, aliases, district and coordinates. The bundled file is
+built by `scripts/build_gazetteer.py` from the India Post pincode directory:
+the district headquarters, talukas (at their headquarters' post office),
+and the towns and villages that have their own post office. Coordinates are
+approximate (post office locations).
+
+Forward lookups fuzzy-match the normalized name (English, Marathi or any
+alias) through the same character n-gram filter as the term glossary, then
+score the shortlisted names with `fuzz.ratio`.
+"""
+import csv
+import os
+import re
+import unicodedata
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from rapidfuzz import fuzz
+
+from agents.tools.term_index import NGramIndex
+from helpers.utils import get_logger
+
+logger = get_logger(__name__)
+
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", "assets/gazetteer_mh.csv")
+GAZETTEER_MATCH_THRESHOLD = 0.85
+
+# Lower ranks win ties between equally good name matches
+PLACE_TYPE_RANK = {"district": 0, "taluka": 1, "city": 2, "village": 3}
+
+# Generic words that do not help identify a place
+_STOPWORDS = {
+    "district", "dist", "taluka", "tal", "tehsil", "village", "city", "town",
+    "maharashtra", "india", "जिल्हा", "तालुका", "गाव", "शहर", "महाराष्ट्र",
+}
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_place(text: str) -> str:
+    """Normalize a place name: NFC, lowercase, no punctuation or generic words."""
+    text = _PUNCTUATION.sub(" ", unicodedata.normalize("NFC", text.lower()))
+    return " ".join(word for word in text.split() if word not in _STOPWORDS)
+
+
+class Place(NamedTuple):
+    name: str
+    name_mr: str
+    type: str
+    district: str
+    latitude: float
+    longitude: float
+
+
+class Gazetteer:
+    """Fuzzy name index over a list of places.
+
+    Args:
+        places: The places.
+        aliases: Extra names per place (same order as `places`).
+    """
+
+    def __init__(self, places: List[Place], aliases: List[List[str]]):
+        self.places = places
+        names, owners = [], []
+        for idx, (place, extra) in enumerate(zip(places, aliases)):
+            for name in {normalize_place(n) for n in (place.name, place.name_mr, *extra) if n}:
+                if name:
+                    names.append(name)
+                    owners.append(idx)
+        self.names = names
+        self.owners = np.asarray(owners, dtype=np.int64)
+        self.index = NGramIndex(names, n=1)
+
+    def __len__(self) -> int:
+        return len(self.places)
+
+    def _matches(self, query: str, threshold: float) -> List[Tuple[float, int]]:
+        """(score, place id) of every place whose name matches `query`."""
+        best = {}
+        for name_id in self.index.candidates(query, threshold).tolist():
+            score = fuzz.ratio(query, self.names[name_id]) / 100
+            if score >= threshold:
+                place_id = int(self.owners[name_id])
+                best[place_id] = max(score, best.get(place_id, 0.0))
+        return [(score, place_id) for place_id, score in best.items()]
+
+    def lookup(self, query: str, threshold: float = GAZETTEER_MATCH_THRESHOLD) -> Optional[Place]:
+        """Find a place by name.
+
+        Only the first (most specific) comma-separated part is matched; the
+        remaining parts break ties between places of the same name, e.g.
+        "Niphad, Nashik". A query whose first part is not in the gazetteer
+        ("Baramati, Pune" without Baramati) returns None rather than a match
+        on a broader part, so the caller can ask the geocoding service.
+
+        Args:
+            query: Place name as given by the user.
+            threshold: Minimum `fuzz.ratio` similarity (0-1).
+
+        Returns:
+            Optional[Place]: The best match, or None.
+        """
+        parts = [normalize_place(part) for part in query.split(",")]
+        parts = [part for part in parts if part]
+        if not parts:
+            return None
+        matches = self._matches(parts[0], threshold)
+        if not matches:
+            return None
+        context = set(parts[1:])
+
+        def rank(match):
+            score, place_id = match
+            place = self.places[place_id]
+            in_context = normalize_place(place.district) in context
+            return (not in_context, -score, PLACE_TYPE_RANK.get(place.type, len(PLACE_TYPE_RANK)))
+
+        return self.places[min(matches, key=rank)[1]]
+
+
+def load_gazetteer(path: str = GAZETTEER_PATH) -> Gazetteer:
+    """Load the gazetteer CSV (an empty gazetteer if the file is missing)."""
+    places, aliases = [], []
+    if not os.path.exists(path):
+        logger.warning(f"Gazetteer {path} not found, offline geocoding is disabled")
+        return Gazetteer(places, aliases)
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            places.append(Place(
+                name=row["name"],
+                name_mr=row["name_mr"],
+                type=row["type"],
+                district=row["district"],
+                latitude=float(row["latitude"]),
+                longitude=float(row["longitude"]),
+            ))
+            aliases.append([alias for alias in row["aliases"].split("|") if alias])
+    logger.info(f"Loaded {len(places)} gazetteer places from {path}")
+    return Gazetteer(places, aliases)
@@ -0,0 +1,45 @@
+"""
+Geographic helpers shared by the location-based tools.
+"""
+from typing import Tuple
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_cell(latitude: float, longitude: float, precision: int = 5) -> Tuple[str, float, float]:
+    """Geohash of a point, with the centre of its cell.
+
+    Points in the same cell share the geohash, so it can key caches of data
+    that does not vary within a cell. At precision 5 a cell is about
+    4.9 km x 4.9 km.
+
+    Args:
+        latitude: Latitude in degrees.
+        longitude: Longitude in degrees.
+        precision: Number of geohash characters.
+
+    Returns:
+        Tuple[str, float, float]: (geohash, cell centre latitude, cell centre longitude)
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        rng, coord = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        value <<= 1
+        if coord >= mid:
+            value |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return "".join(chars), (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
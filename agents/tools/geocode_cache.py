@@ -0,0 +1,111 @@
+"""
+Geocode result cache.
+
+Forward geocoding results are keyed by the normalized place name. Each
+worker holds a bounded in-process LRU; when a Redis client is configured
+(`geocode_cache.use_redis`), results are also persisted there for
+`GEOCODE_CACHE_TTL` seconds so they survive restarts and are shared by all
+workers and pods.
+
+Place names and coordinates change rarely, so entries are never refreshed
+early. Failed lookups are not cached. Redis errors are logged and treated as
+misses.
+"""
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from helpers.utils import get_logger
+
+logger = get_logger(__name__)
+
+GEOCODE_CACHE_TTL = int(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600)))
+GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", "50000"))
+
+# (latitude, longitude, display name)
+ForwardResult = Tuple[float, float, str]
+
+
+class GeocodeCache:
+    """Two-level (in-process LRU, optional Redis) geocode cache.
+
+    Args:
+        max_entries: Maximum entries in the in-process LRU.
+        ttl: Seconds entries are kept in Redis.
+    """
+
+    def __init__(self, max_entries: int = GEOCODE_CACHE_MAX_ENTRIES, ttl: int = GEOCODE_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._forward: "OrderedDict[str, ForwardResult]" = OrderedDict()
+        self._client = None
+        self._prefix = ""
+        self.hits = 0
+        self.remote_hits = 0
+        self.misses = 0
+
+    def use_redis(self, client, prefix: str = ""):
+        """Persist results through this redis.asyncio client."""
+        self._client = client
+        self._prefix = prefix
+
+    def _remember(self, entries: OrderedDict, key: str, value):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def _peek(self, entries: OrderedDict, key: str):
+        value = entries.get(key)
+        if value is not None:
+            entries.move_to_end(key)
+        return value
+
+    async def _get_remote(self, redis_key: str) -> Optional[bytes]:
+        if self._client is None:
+            return None
+        try:
+            return await self._client.get(redis_key)
+        except Exception as e:
+            logger.warning(f"Geocode cache read failed for {redis_key}: {e}")
+            return None
+
+    async def _set_remote(self, redis_key: str, value: str):
+        if self._client is None:
+            return
+        try:
+            await self._client.set(redis_key, value, ex=self.ttl)
+        except Exception as e:
+            logger.warning(f"Geocode cache write failed for {redis_key}: {e}")
+
+    async def get_forward(self, name: str) -> Optional[ForwardResult]:
+        """Coordinates and display name for a normalized place name."""
+        result = self._peek(self._forward, name)
+        if result is not None:
+            self.hits += 1
+            return result
+        raw = await self._get_remote(f"{self._prefix}geocode:fwd:{name}")
+        if raw is None:
+            self.misses += 1
+            return None
+        latitude, longitude, display_name = json.loads(raw)
+        result = (latitude, longitude, display_name)
+        self._remember(self._forward, name, result)
+        self.remote_hits += 1
+        return result
+
+    async def put_forward(self, name: str, result: ForwardResult):
+        self._remember(self._forward, name, tuple(result))
+        await self._set_remote(f"{self._prefix}geocode:fwd:{name}", json.dumps(list(result)))
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "remote_hits": self.remote_hits,
+            "misses": self.misses,
+            "forward_entries": len(self._forward),
+        }
+
+
+geocode_cache = GeocodeCache()
@@ -0,0 +1,242 @@
+"""
+Compiled, memory-mapped term glossary.
+
+`assets/term_glossary.json` is compiled once into a flat binary file holding
+a string table per column (original and normalized text), the per-field
+character n-gram postings used by `search_terms`, and the SHA-256 of the JSON
+it was built from. Every uvicorn worker maps the same file read-only, so the
+glossary lives once in the page cache instead of once per process as parsed
+JSON plus pydantic objects.
+
+Build it ahead of time (the Dockerfile does this):
+    python scripts/compile_glossary.py
+
+If the binary is missing or was built from a different JSON, it is rebuilt
+on import next to the JSON, or in the temp directory if the assets folder is
+read-only.
+
+File layout: an 8-byte magic, a little-endian uint32 header length, a JSON
+header describing each section (byte offset, item count, dtype), then the
+sections themselves, each aligned to 8 bytes.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import tempfile
+import unicodedata
+from collections.abc import Sequence
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from agents.tools.term_index import NGramIndex
+from helpers.utils import get_logger
+
+logger = get_logger(__name__)
+
+GLOSSARY_JSON_PATH = 'assets/term_glossary.json'
+GLOSSARY_BIN_PATH = 'assets/term_glossary.bin'
+
+FIELDS = ('en', 'mr', 'transliteration')
+FORMAT_VERSION = 1
+NGRAM_SIZE = 1
+
+_MAGIC = b'OANGLOSS'
+_HEADER_LENGTH = struct.Struct('<I')
+_ALIGNMENT = 8
+
+
+def normalize_term(text: str) -> str:
+    """Normalize a term for matching: lowercase, then Unicode NFC."""
+    return unicodedata.normalize('NFC', text.lower())
+
+
+def _sha256(path: str) -> str:
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def _string_table(strings: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Encode strings as (offsets, utf-8 data) arrays."""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+
+def compile_glossary(
+    json_path: str = GLOSSARY_JSON_PATH,
+    bin_path: str = GLOSSARY_BIN_PATH,
+) -> str:
+    """Compile the JSON glossary into the binary format.
+
+    Args:
+        json_path: Path of the source JSON glossary.
+        bin_path: Path of the binary file to write (replaced atomically).
+
+    Returns:
+        str: The path written.
+    """
+    with open(json_path, 'rb') as f:
+        source = f.read()
+    rows = json.loads(source)
+
+    sections: Dict[str, np.ndarray] = {}
+    for field in FIELDS:
+        raw = [row[field] for row in rows]
+        normalized = [normalize_term(value) for value in raw]
+        sections[f'{field}.raw.offsets'], sections[f'{field}.raw.data'] = _string_table(raw)
+        sections[f'{field}.norm.offsets'], sections[f'{field}.norm.data'] = _string_table(normalized)
+
+        index = NGramIndex(normalized, n=NGRAM_SIZE)
+        grams, posting_offsets, ids, counts = index.to_arrays()
+        sections[f'{field}.lengths'] = index.lengths
+        sections[f'{field}.grams.offsets'], sections[f'{field}.grams.data'] = _string_table(grams)
+        sections[f'{field}.postings.offsets'] = posting_offsets
+        sections[f'{field}.postings.ids'] = ids
+        sections[f'{field}.postings.counts'] = counts
+
+    layout = {}
+    position = 0
+    for name, array in sections.items():
+        layout[name] = [position, len(array), array.dtype.str]
+        position += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+    header = json.dumps({
+        'version': FORMAT_VERSION,
+        'source_sha256': hashlib.sha256(source).hexdigest(),
+        'count': len(rows),
+        'ngram': NGRAM_SIZE,
+        'sections': layout,
+    }).encode('utf-8')
+    prefix = _MAGIC + _HEADER_LENGTH.pack(len(header)) + header
+    prefix += b'\0' * (-len(prefix) % _ALIGNMENT)
+
+    directory = os.path.dirname(os.path.abspath(bin_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(prefix)
+            for array in sections.values():
+                data = array.tobytes()
+                f.write(data)
+                f.write(b'\0' * (-len(data) % _ALIGNMENT))
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, bin_path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    logger.info(f"Compiled {len(rows)} glossary terms into {bin_path}")
+    return bin_path
+
+
+class StringColumn(Sequence):
+    """Read-only sequence of strings decoded on access from a string table."""
+
+    def __init__(self, offsets: np.ndarray, data: memoryview):
+        self._offsets = offsets
+        self._data = data
+        self._strings = None
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        idx = int(idx)
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError("column index out of range")
+        return str(self._data[self._offsets[idx]:self._offsets[idx + 1]], 'utf-8')
+
+    def tolist(self) -> List[str]:
+        """Decode the whole column once and keep it (for vectorized scoring)."""
+        if self._strings is None:
+            self._strings = [self[i] for i in range(len(self))]
+        return self._strings
+
+
+class CompiledGlossary:
+    """Memory-mapped view of a compiled glossary file.
+
+    Attributes:
+        size: Number of term pairs.
+        raw: Original text per field.
+        normalized: Normalized text per field (see `normalize_term`).
+        indexes: Character n-gram index per field over the normalized text.
+    """
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[:len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} is not a compiled glossary")
+        start = len(_MAGIC) + _HEADER_LENGTH.size
+        (header_length,) = _HEADER_LENGTH.unpack_from(self._mmap, len(_MAGIC))
+        self.header = json.loads(self._mmap[start:start + header_length])
+        if self.header['version'] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported glossary format version {self.header['version']}")
+        base = start + header_length + (-(start + header_length) % _ALIGNMENT)
+
+        buffer = memoryview(self._mmap)
+        sections = {
+            name: np.frombuffer(buffer, dtype=np.dtype(dtype), count=count, offset=base + offset)
+            for name, (offset, count, dtype) in self.header['sections'].items()
+        }
+
+        self.size = self.header['count']
+        self.raw: Dict[str, StringColumn] = {}
+        self.normalized: Dict[str, StringColumn] = {}
+        self.indexes: Dict[str, NGramIndex] = {}
+        for field in FIELDS:
+            self.raw[field] = StringColumn(sections[f'{field}.raw.offsets'], sections[f'{field}.raw.data'].data)
+            self.normalized[field] = StringColumn(sections[f'{field}.norm.offsets'], sections[f'{field}.norm.data'].data)
+            grams = StringColumn(sections[f'{field}.grams.offsets'], sections[f'{field}.grams.data'].data)
+            self.indexes[field] = NGramIndex.from_arrays(
+                self.header['ngram'],
+                sections[f'{field}.lengths'],
+                list(grams),
+                sections[f'{field}.postings.offsets'],
+                sections[f'{field}.postings.ids'],
+                sections[f'{field}.postings.counts'],
+            )
+
+    @property
+    def source_sha256(self) -> str:
+        return self.header['source_sha256']
+
+    def row(self, idx: int) -> Dict[str, str]:
+        """Return the original fields of one term pair."""
+        return {field: self.raw[field][idx] for field in FIELDS}
+
+
+def load_glossary(
+    json_path: str = GLOSSARY_JSON_PATH,
+    bin_path: str = GLOSSARY_BIN_PATH,
+) -> CompiledGlossary:
+    """Map the compiled glossary, (re)compiling it first if it is missing or stale."""
+    source_sha256 = _sha256(json_path)
+    fallback_path = os.path.join(tempfile.gettempdir(), f"term_glossary-{source_sha256[:16]}.bin")
+
+    for path in (bin_path, fallback_path):
+        if os.path.exists(path):
+            try:
+                glossary = CompiledGlossary(path)
+                if glossary.source_sha256 == source_sha256 and glossary.header['ngram'] == NGRAM_SIZE:
+                    return glossary
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Ignoring unreadable compiled glossary {path}: {e}")
+
+    logger.warning(f"Compiled glossary {bin_path} is missing or stale, rebuilding")
+    try:
+        path = compile_glossary(json_path, bin_path)
+    except OSError as e:
+        logger.warning(f"Could not write {bin_path} ({e}), using {fallback_path}")
+        path = compile_glossary(json_path, fallback_path)
+    return CompiledGlossary(path)
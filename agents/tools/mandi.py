@@ -1,14 +1,31 @@
+import time
 import uuid
-from datetime import datetime, timezone, timedelta
+from collections import OrderedDict
+from datetime import date, datetime, timezone, timedelta
 from helpers.utils import get_logger
-import requests
+import httpx
+from agents.tools.beckn import BecknStatusError, beckn_search_json
+from agents.tools.singleflight import flight_key
+from agents.tools.geo import geohash_cell
+from agents.tools.tool_cache import PeriodicRefresh
 from pydantic import BaseModel, AnyHttpUrl, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, NamedTuple, Tuple
 from pydantic_ai import ModelRetry, UnexpectedModelBehavior
 import os
 
 logger = get_logger(__name__)
 
+MANDI_TIMEOUT = httpx.Timeout(15.0, connect=10.0)
+
+# Price snapshots are cached per geohash cell and arrival day. A day that
+# was fetched after it ended never changes and is kept until evicted; today's
+# snapshots are refetched every MANDI_TODAY_REFRESH seconds in the background.
+MANDI_CACHE_PRECISION = int(os.getenv("MANDI_CACHE_GEOHASH_PRECISION", "5"))
+MANDI_TODAY_REFRESH = int(os.getenv("MANDI_TODAY_REFRESH", str(2 * 60 * 60)))
+# Today's snapshot is refetched on request if the refresh fell this far behind
+MANDI_TODAY_MAX_AGE = int(os.getenv("MANDI_TODAY_MAX_AGE", str(4 * 60 * 60)))
+MANDI_CACHE_MAX_DAYS = int(os.getenv("MANDI_CACHE_MAX_DAYS", "20000"))
+
 # -----------------------
 # Basic Models
 # -----------------------
@@ -234,7 +251,130 @@ class MandiRequest(BaseModel):
             }
         }
 
-def mandi_prices(latitude: float, longitude: float, days_back: int = 0) -> str:
+async def _fetch_mandi(latitude: float, longitude: float, days_back: int) -> MandiResponse:
+    payload = MandiRequest(latitude=latitude, longitude=longitude, days_back=days_back).get_payload()
+    key = flight_key("mandi", latitude, longitude, days_back, date.today().isoformat())
+    return MandiResponse.model_validate(await beckn_search_json(payload, MANDI_TIMEOUT, key))
+
+# -----------------------
+# Per-day snapshots
+# -----------------------
+def _arrival_day(provider: Provider) -> Optional[date]:
+    """Arrival date of a provider's prices, from its `time` block if present."""
+    time_info = provider.time or {}
+    candidates = [time_info.get("timestamp"), time_info.get("label"), (time_info.get("range") or {}).get("start")]
+    for value in candidates:
+        if isinstance(value, str):
+            try:
+                return date.fromisoformat(value[:10])
+            except ValueError:
+                continue
+    return None
+
+
+class MandiDay(NamedTuple):
+    context: Context
+    responses: Tuple[ResponseItem, ...]
+    # Fetched after the day was over, so the snapshot is complete
+    final: bool
+    fetched_at: float
+
+
+class MandiSnapshots:
+    """Mandi prices per (geohash cell, arrival day), least recently used evicted.
+
+    Args:
+        max_days: Maximum (cell, day) snapshots kept.
+    """
+
+    def __init__(self, max_days: int = MANDI_CACHE_MAX_DAYS):
+        self.max_days = max_days
+        # (cell, day) -> MandiDay
+        self._days: "OrderedDict[Tuple[str, date], MandiDay]" = OrderedDict()
+        # cell -> rounded cell centre, for refreshing today's snapshots
+        self._cells: Dict[str, Tuple[float, float]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.refreshed = 0
+
+    def _usable(self, key: Tuple[str, date], today: date) -> Optional[MandiDay]:
+        entry = self._days.get(key)
+        if entry is None:
+            return None
+        day = key[1]
+        if day < today and not entry.final:
+            return None  # taken while the day was still running
+        if day == today and time.monotonic() - entry.fetched_at > MANDI_TODAY_MAX_AGE:
+            return None
+        self._days.move_to_end(key)
+        return entry
+
+    def store(self, cell: str, start: date, response: MandiResponse):
+        """Split a response covering `start`..today into per-day snapshots.
+
+        Providers without an arrival date are filed under today; days
+        without prices are stored empty, so they are not fetched again.
+        """
+        today = date.today()
+        now = time.monotonic()
+        by_day: Dict[date, List[ResponseItem]] = {}
+        for item in response.responses:
+            providers_by_day: Dict[date, List[Provider]] = {}
+            for provider in item.message.catalog.providers:
+                day = _arrival_day(provider) or today
+                if start <= day <= today:
+                    providers_by_day.setdefault(day, []).append(provider)
+            for day, providers in providers_by_day.items():
+                by_day.setdefault(day, []).append(
+                    ResponseItem(context=item.context, message=Message(catalog=Catalog(providers=providers)))
+                )
+        day = start
+        while day <= today:
+            self._days[(cell, day)] = MandiDay(response.context, tuple(by_day.get(day, ())), day < today, now)
+            self._days.move_to_end((cell, day))
+            day += timedelta(days=1)
+        while len(self._days) > self.max_days:
+            self._days.popitem(last=False)
+
+    async def window(self, cell: str, latitude: float, longitude: float, days_back: int) -> MandiResponse:
+        """Prices from `days_back` days ago to today, fetching only missing days."""
+        today = date.today()
+        self._cells[cell] = (latitude, longitude)
+        days = [today - timedelta(days=offset) for offset in range(days_back, -1, -1)]
+        missing = [day for day in days if self._usable((cell, day), today) is None]
+        if missing:
+            self.misses += 1
+            # The API returns everything from the start day on
+            start = missing[0]
+            self.store(cell, start, await _fetch_mandi(latitude, longitude, (today - start).days))
+        else:
+            self.hits += 1
+        entries = [self._days[(cell, day)] for day in days if (cell, day) in self._days]
+        responses = [item for entry in entries for item in entry.responses]
+        return MandiResponse(context=entries[-1].context, responses=responses)
+
+    async def refresh_today(self):
+        """Refetch today's snapshot of every cell asked for today."""
+        today = date.today()
+        cells = [cell for (cell, day) in list(self._days) if day == today]
+        for cell in cells:
+            latitude, longitude = self._cells[cell]
+            try:
+                self.store(cell, today, await _fetch_mandi(latitude, longitude, 0))
+                self.refreshed += 1
+            except Exception as e:
+                logger.warning(f"Mandi refresh failed for cell {cell}: {e}")
+        # Forget cells without a snapshot for today
+        self._cells = {cell: self._cells[cell] for cell in cells}
+
+    def stats(self) -> Dict[str, int]:
+        return {"days": len(self._days), "hits": self.hits, "misses": self.misses, "refreshed": self.refreshed}
+
+
+mandi_snapshots = MandiSnapshots()
+mandi_today_refresh = PeriodicRefresh("Mandi today", mandi_snapshots.refresh_today, MANDI_TODAY_REFRESH)
+
+async def mandi_prices(latitude: float, longitude: float, days_back: int = 0) -> str:
     """Get Market/Mandi prices for a specific location.
 
     Args:
@@ -246,25 +386,21 @@ def mandi_prices(latitude: float, longitude: float, days_back: int = 0) -> str:
         str: The mandi prices for the specific location
     """
     try:
-        payload = MandiRequest(latitude=latitude, longitude=longitude, days_back=days_back).get_payload()
-        response = requests.post(
-            os.getenv("BAP_ENDPOINT"),
-            json=payload,
-            timeout=(10, 15)
+        cell, cell_latitude, cell_longitude = geohash_cell(latitude, longitude, MANDI_CACHE_PRECISION)
+        mandi_response = await mandi_snapshots.window(
+            cell, round(cell_latitude, 4), round(cell_longitude, 4), max(days_back, 0)
         )
-        
-        if response.status_code != 200:
-            logger.error(f"Mandi API returned status code {response.status_code}")
-            return "Mandi service unavailable. Retrying"
-            
-        mandi_response = MandiResponse.model_validate(response.json())
         return str(mandi_response)
                 
-    except requests.Timeout as e:
+    except BecknStatusError as e:
+        logger.error(f"Mandi API returned status code {e.status_code}")
+        return "Mandi service unavailable. Retrying"
+        
+    except httpx.TimeoutException as e:
         logger.error(f"Mandi API request timed out: {str(e)}")
         return "Mandi request timed out. Please try again later."
         
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Mandi API request failed: {e}")
         return f"Mandi request failed: {str(e)}"
     
@@ -1,22 +1,31 @@
-import os
+import asyncio
 from dotenv import load_dotenv
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
-from typing import Optional
+import httpx
+from typing import List, Optional
 from pydantic import BaseModel, Field, field_validator
+from agents.tools.gazetteer import Place, load_gazetteer, normalize_place
+from agents.tools.geocode_cache import geocode_cache
+from agents.tools.nominatim import nominatim
+from agents.tools.singleflight import flight_key, flights
 from helpers.utils import get_logger
 
 logger = get_logger(__name__)
 
 load_dotenv()
 
-# Initialize Nominatim geocoder (self-hosted)
-geocoder = Nominatim(
-    user_agent="bharathvistaar", 
-    domain="nominatim:8080",
-    scheme="http",
-    timeout=10
-)
+# Most places looked up by one batch call
+GEOCODE_BATCH_MAX = 20
+
+# Offline gazetteer of Maharashtra places, answers most lookups in-process
+gazetteer = load_gazetteer()
+
+
+def _display_name(place: Place) -> str:
+    """Nominatim-style display name for a gazetteer place."""
+    if place.type == "district":
+        return f"{place.name} District, Maharashtra, India"
+    return f"{place.name}, {place.district} District, Maharashtra, India"
+
 
 class Location(BaseModel):
     """Location model for the maps tool."""
@@ -31,21 +40,6 @@ class Location(BaseModel):
             return round(float(v), 3)
         return v
     
-    def model_post_init(self, __context__) -> None:
-        """Called after the model is initialized."""
-        super().model_post_init(__context__)
-        self.check_place_name()
-    
-    def check_place_name(self) -> None:
-        """If coordinates are provided but not place name, do reverse geocoding."""
-        if self.latitude is not None and self.longitude is not None and self.place_name is None:
-            try:
-                location = geocoder.reverse((self.latitude, self.longitude), exactly_one=True)
-                if location:
-                    self.place_name = location.raw['display_name']
-            except (GeocoderTimedOut, GeocoderServiceError) as e:
-                logger.error(f"Reverse geocoding error: {e}")
-
     def _location_string(self):
         if self.latitude and self.longitude:
             return f"{self.place_name} (Latitude: {self.latitude}, Longitude: {self.longitude})"
@@ -56,36 +50,46 @@ class Location(BaseModel):
         return f"{self.place_name} ({self.latitude}, {self.longitude})"
 
 
-def forward_geocode(place_name: str) -> Optional[Location]:
-    """Forward geocoding using Nominatim."""
+async def forward_geocode(place_name: str) -> Optional[Location]:
+    """Forward geocoding: find the coordinates of a place by name.
+
+    Looks up the geocode cache, then the offline gazetteer of Maharashtra
+    places, and only then Nominatim.
+    """
+    key = normalize_place(place_name)
+    cached = await geocode_cache.get_forward(key)
+    if cached:
+        latitude, longitude, display_name = cached
+        return Location(place_name=display_name, latitude=latitude, longitude=longitude)
+
+    place = gazetteer.lookup(place_name)
+    if place:
+        return Location(place_name=_display_name(place), latitude=place.latitude, longitude=place.longitude)
+
     try:
-        response = geocoder.geocode(place_name, exactly_one=True, addressdetails=True, country_codes='in')
-
-        if response:
-            return Location(
-                place_name=response.raw['display_name'],
-                latitude=response.latitude,
-                longitude=response.longitude
-            )
+        result = await flights.do(flight_key("geocode", key), lambda: nominatim.geocode(place_name))
+        if result:
+            latitude, longitude, display_name = result
+            await geocode_cache.put_forward(key, (latitude, longitude, display_name))
+            return Location(place_name=display_name, latitude=latitude, longitude=longitude)
         else:
             logger.info("No results found.")
-    except (GeocoderTimedOut, GeocoderServiceError) as e:
+    except httpx.HTTPError as e:
         logger.error(f"Forward geocoding error: {e}")
     return None
 
 
-def reverse_geocode(latitude: float, longitude: float) -> Optional[Location]:
-    """Reverse geocoding using Nominatim."""
-    try:
-        location = geocoder.reverse((latitude, longitude), exactly_one=True)
-        if location:
-            return Location(
-                place_name=location.raw['display_name'],
-                latitude=latitude,
-                longitude=longitude
-            )
-        else:
-            logger.info("No results found.")
-    except (GeocoderTimedOut, GeocoderServiceError) as e:
-        logger.error(f"Reverse geocoding error: {e}")
-    return None
\ No newline at end of file
+async def forward_geocode_batch(place_names: List[str]) -> List[Optional[Location]]:
+    """Forward geocoding of several places at once.
+
+    Use this instead of repeated forward_geocode calls when the user mentions
+    more than one place.
+
+    Args:
+        place_names: Place names (at most 20).
+
+    Returns:
+        List[Optional[Location]]: One result per place name, in order (None where not found).
+    """
+    return list(await asyncio.gather(*(forward_geocode(name) for name in place_names[:GEOCODE_BATCH_MAX])))
+
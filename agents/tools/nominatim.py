@@ -0,0 +1,117 @@
+"""
+Async client for the self-hosted Nominatim geocoder.
+
+Calls Nominatim's JSON search API with a shared
+`httpx.AsyncClient`, so geocoding never blocks the event loop. At most
+`NOMINATIM_MAX_CONCURRENCY` requests are in flight per worker, and request
+starts are spaced to stay under `NOMINATIM_RATE_LIMIT` requests per second
+(0 disables the limit); excess calls wait their turn instead of overloading
+the geocoder.
+"""
+import asyncio
+import os
+import time
+from typing import Optional, Tuple
+
+import httpx
+
+from helpers.utils import get_logger
+
+logger = get_logger(__name__)
+
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "http://nominatim:8080")
+NOMINATIM_MAX_CONCURRENCY = int(os.getenv("NOMINATIM_MAX_CONCURRENCY", "4"))
+NOMINATIM_RATE_LIMIT = float(os.getenv("NOMINATIM_RATE_LIMIT", "10"))
+NOMINATIM_TIMEOUT = httpx.Timeout(10.0, connect=5.0)
+USER_AGENT = "bharathvistaar"
+
+# (latitude, longitude, display name)
+GeocodeResult = Tuple[float, float, str]
+
+
+class RateLimiter:
+    """Spaces out calls to at most `rate` per second (no limit if rate <= 0)."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+
+class NominatimClient:
+    """Concurrency- and rate-limited async Nominatim client.
+
+    Args:
+        base_url: Nominatim server URL.
+        max_concurrency: Maximum requests in flight.
+        rate_limit: Maximum request starts per second (0 for no limit).
+    """
+
+    def __init__(
+        self,
+        base_url: str = NOMINATIM_URL,
+        max_concurrency: int = NOMINATIM_MAX_CONCURRENCY,
+        rate_limit: float = NOMINATIM_RATE_LIMIT,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self._rate_limiter = RateLimiter(rate_limit)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"User-Agent": USER_AGENT},
+                limits=httpx.Limits(max_connections=self.max_concurrency),
+                timeout=NOMINATIM_TIMEOUT,
+            )
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _get(self, path: str, params: dict):
+        # Created lazily so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            await self._rate_limiter.acquire()
+            self.requests += 1
+            response = await self._get_client().get(path, params={**params, "format": "jsonv2"})
+            response.raise_for_status()
+            return response.json()
+
+    async def geocode(self, query: str, country_codes: str = "in") -> Optional[GeocodeResult]:
+        """Best match for a place name, or None.
+
+        Raises:
+            httpx.HTTPError: If the request failed.
+        """
+        results = await self._get("/search", {
+            "q": query,
+            "limit": 1,
+            "addressdetails": 1,
+            "countrycodes": country_codes,
+        })
+        if not results:
+            return None
+        best = results[0]
+        return float(best["lat"]), float(best["lon"]), best["display_name"]
+
+
+nominatim = NominatimClient()
@@ -1,14 +1,29 @@
+import asyncio
+import hashlib
+import json
+import time
 import uuid
 from datetime import datetime, timezone
 from helpers.utils import get_logger
-import requests
+import httpx
+from agents.tools.beckn import BecknStatusError, beckn_search_json
+from agents.tools.singleflight import flight_key
+from agents.tools.tool_cache import PeriodicRefresh
 from pydantic import BaseModel, AnyHttpUrl, Field
-from typing import List, Optional, Dict, Any, Literal
+from typing import List, Optional, Dict, Any, Literal, get_args
 from pydantic_ai import ModelRetry, UnexpectedModelBehavior
 import os
 
 logger = get_logger(__name__)
 
+SCHEME_TIMEOUT = httpx.Timeout(30.0, connect=20.0)
+
+SchemeName = Literal["kcc", "pmkisan", "pmfby"]
+SCHEME_NAMES = get_args(SchemeName)
+
+# Scheme texts are static: they are fetched at startup and re-checked periodically
+SCHEME_CATALOG_REFRESH = int(os.getenv("SCHEME_CATALOG_REFRESH", str(6 * 60 * 60)))
+
 # -----------------------
 # Basic Models
 # -----------------------
@@ -213,7 +228,61 @@ class SchemeRequest(BaseModel):
             }
         }
 
-def get_scheme_info(scheme_name: Optional[Literal["kcc", "pmkisan", "pmfby"]] = None) -> str:
+# -----------------------
+# Catalog
+# -----------------------
+class SchemeEntry(BaseModel):
+    """Pre-rendered answer for one scheme query."""
+    text: str
+    etag: str
+    version: int
+    checked_at: float
+
+class SchemeCatalog:
+    """In-memory catalog of rendered scheme texts, one per query ("" = all schemes).
+
+    On refresh, the catalog part of each response is hashed (ignoring the
+    per-request context); when the hash matches the stored ETag the entry is
+    kept as is, so unchanged schemes are neither validated nor re-rendered.
+    """
+
+    def __init__(self):
+        self.entries: Dict[str, SchemeEntry] = {}
+
+    def get(self, scheme_name: str) -> Optional[SchemeEntry]:
+        return self.entries.get(scheme_name)
+
+    async def refresh_one(self, scheme_name: str) -> SchemeEntry:
+        """Fetch one query and update its entry if the content changed."""
+        payload = SchemeRequest(scheme_name=scheme_name).get_payload()
+        data = await beckn_search_json(payload, SCHEME_TIMEOUT, flight_key("scheme", scheme_name))
+        etag = hashlib.sha256(json.dumps(
+            [rsp.get("message") for rsp in data.get("responses", [])],
+            sort_keys=True, ensure_ascii=False,
+        ).encode("utf-8")).hexdigest()
+
+        entry = self.entries.get(scheme_name)
+        if entry is not None and entry.etag == etag:
+            entry.checked_at = time.time()
+            return entry
+        text = str(SchemeResponse.model_validate(data))
+        version = entry.version + 1 if entry is not None else 1
+        entry = self.entries[scheme_name] = SchemeEntry(text=text, etag=etag, version=version, checked_at=time.time())
+        logger.info(f"Scheme catalog entry '{scheme_name or 'all'}' updated to version {version}")
+        return entry
+
+    async def refresh(self):
+        """Re-check every scheme query concurrently."""
+        names = ["", *SCHEME_NAMES]
+        results = await asyncio.gather(*(self.refresh_one(name) for name in names), return_exceptions=True)
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Scheme catalog refresh failed for '{name or 'all'}': {result}")
+
+scheme_catalog = SchemeCatalog()
+scheme_catalog_refresh = PeriodicRefresh("Scheme catalog", scheme_catalog.refresh, SCHEME_CATALOG_REFRESH)
+
+async def get_scheme_info(scheme_name: Optional[SchemeName] = None) -> str:
     """Retrieve detailed information about government agricultural schemes.
     
     This tool fetches comprehensive scheme data including benefits, eligibility criteria, 
@@ -234,25 +303,21 @@ def get_scheme_info(scheme_name: Optional[Literal["kcc", "pmkisan", "pmfby"]] =
     try:
         # Convert None to empty string for the API request
         scheme_name_str = scheme_name or ""
-        payload = SchemeRequest(scheme_name=scheme_name_str).get_payload()
-        response = requests.post(
-            os.getenv("BAP_ENDPOINT"),
-            json=payload,
-            timeout=(20, 30)
-        )
-        
-        if response.status_code != 200:
-            logger.error(f"Scheme API returned status code {response.status_code}")
-            return "Scheme service unavailable. Retrying"
-            
-        scheme_response = SchemeResponse.model_validate(response.json())
-        return str(scheme_response)
+        entry = scheme_catalog.get(scheme_name_str)
+        if entry is None:
+            # Not loaded yet (e.g. the startup refresh failed): fetch it now
+            entry = await scheme_catalog.refresh_one(scheme_name_str)
+        return entry.text
                 
-    except requests.Timeout as e:
+    except BecknStatusError as e:
+        logger.error(f"Scheme API returned status code {e.status_code}")
+        return "Scheme service unavailable. Retrying"
+    
+    except httpx.TimeoutException as e:
         logger.error(f"Scheme API request timed out: {str(e)}")
         return "Scheme request timed out. Please try again later."
     
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Scheme API request failed: {e}")
         return f"Scheme request failed: {str(e)}"
     
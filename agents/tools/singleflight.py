@@ -0,0 +1,137 @@
+"""
+Single-flight deduplication of upstream calls.
+
+Identical calls (same key) that overlap in time share one execution: within
+a worker, later callers await the task started by the first one. Across
+workers and pods, when a Redis client is configured (`flights.use_redis`),
+the first caller takes a short Redis lock and publishes its result under a
+result key; callers in other workers that find the lock taken wait for that
+result instead of calling upstream themselves.
+
+The distributed path only shares JSON-serializable results and is
+best-effort: if Redis fails, or the lock holder dies without publishing a
+result, callers fall back to executing the call themselves.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict
+
+from helpers.utils import get_logger
+
+logger = get_logger(__name__)
+
+# How long a lock may be held (should exceed the slowest upstream call)
+SINGLE_FLIGHT_LOCK_TTL = float(os.getenv("SINGLE_FLIGHT_LOCK_TTL", "35"))
+# How long a published result stays readable by waiting workers
+SINGLE_FLIGHT_RESULT_TTL = float(os.getenv("SINGLE_FLIGHT_RESULT_TTL", "10"))
+SINGLE_FLIGHT_POLL_INTERVAL = 0.05
+
+# Delete the lock only if we still hold it
+_RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def flight_key(name: str, *args: Any) -> str:
+    """Key for a call of `name` with normalized arguments (floats rounded to ~10 m)."""
+    parts = [str(round(arg, 4)) if isinstance(arg, float) else str(arg) for arg in args]
+    return ":".join([name, *parts])
+
+
+class SingleFlight:
+    """Deduplicates concurrent calls sharing a key."""
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._client = None
+        self._prefix = ""
+        self.calls = 0
+        self.coalesced = 0
+        self.remote_results = 0
+
+    def use_redis(self, client, prefix: str = ""):
+        """Also deduplicate across workers through this redis.asyncio client."""
+        self._client = client
+        self._prefix = prefix
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `fn` once for all overlapping callers with the same key."""
+        task = self._inflight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.create_task(self._run(key, fn))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._inflight.pop(key, None))
+            # Errors reach the awaiting callers; mark them retrieved
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        else:
+            self.coalesced += 1
+        # Shield the shared call from the cancellation of any one caller
+        return await asyncio.shield(task)
+
+    async def _run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self._client is None:
+            return await fn()
+        lock_key = f"{self._prefix}sf-lock:{key}"
+        result_key = f"{self._prefix}sf-result:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self._client.set(lock_key, token, nx=True, px=int(SINGLE_FLIGHT_LOCK_TTL * 1000))
+        except Exception as e:
+            logger.warning(f"Single-flight lock unavailable, calling upstream directly: {e}")
+            return await fn()
+
+        if not acquired:
+            found, result = await self._wait_for_result(lock_key, result_key)
+            if found:
+                self.remote_results += 1
+                return result
+            return await fn()
+
+        try:
+            result = await fn()
+            try:
+                await self._client.set(result_key, json.dumps(result), px=int(SINGLE_FLIGHT_RESULT_TTL * 1000))
+            except (TypeError, ValueError):
+                pass  # not shareable, other workers will call upstream themselves
+            except Exception as e:
+                logger.warning(f"Could not publish single-flight result for {key}: {e}")
+            return result
+        finally:
+            try:
+                await self._client.eval(_RELEASE_SCRIPT, 1, lock_key, token)
+            except Exception as e:
+                logger.warning(f"Could not release single-flight lock {lock_key}: {e}")
+
+    async def _wait_for_result(self, lock_key: str, result_key: str):
+        """Wait for another worker's result. Returns (found, result)."""
+        deadline = time.monotonic() + SINGLE_FLIGHT_LOCK_TTL
+        try:
+            while time.monotonic() < deadline:
+                result, lock = await self._client.mget(result_key, lock_key)
+                if result is not None:
+                    return True, json.loads(result)
+                if lock is None:
+                    # The holder finished without a shareable result, or died
+                    return False, None
+                await asyncio.sleep(SINGLE_FLIGHT_POLL_INTERVAL)
+        except Exception as e:
+            logger.warning(f"Single-flight wait failed, calling upstream directly: {e}")
+        return False, None
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "remote_results": self.remote_results,
+            "inflight": len(self._inflight),
+        }
+
+
+flights = SingleFlight()
@@ -0,0 +1,167 @@
+"""
+Static KD-tree over geographic points for nearest-k and radius queries.
+
+Points are stored as 3-D unit vectors (earth-centred), so straight-line
+(chord) distance between vectors is monotonic in great-circle distance and
+the tree needs no special handling near the poles or the antimeridian.
+Results are reported in kilometres along the earth's surface.
+
+The tree is built once (e.g. from a periodically refreshed snapshot) and is
+read-only afterwards. It only depends on numpy.
+"""
+import heapq
+import math
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def to_unit_vectors(latitudes, longitudes) -> np.ndarray:
+    """Convert degrees to an (n, 3) array of earth-centred unit vectors."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)], axis=-1)
+
+
+def chord_to_km(chord):
+    """Great-circle distance (km) for a chord length between unit vectors."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.asarray(chord) / 2, 1.0))
+
+
+def km_to_chord(km: float) -> float:
+    """Chord length between unit vectors for a great-circle distance (km)."""
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    a = to_unit_vectors([lat1, lat2], [lon1, lon2])
+    return float(chord_to_km(np.linalg.norm(a[0] - a[1])))
+
+
+class GeoKDTree:
+    """KD-tree over (latitude, longitude) points.
+
+    Args:
+        latitudes: Point latitudes in degrees.
+        longitudes: Point longitudes in degrees. Point ids are positions in
+            these sequences.
+        leaf_size: Maximum number of points in a leaf.
+    """
+
+    def __init__(self, latitudes: Sequence[float], longitudes: Sequence[float], leaf_size: int = 16):
+        self.points = to_unit_vectors(latitudes, longitudes).reshape(-1, 3)
+        self.size = len(self.points)
+        self.order = np.arange(self.size)
+        # Per node: split dimension (-1 for leaves), split value, children,
+        # and the [start, end) slice of `order` it covers
+        self._dim: List[int] = []
+        self._split: List[float] = []
+        self._children: List[Tuple[int, int]] = []
+        self._range: List[Tuple[int, int]] = []
+        if self.size:
+            self._build(0, self.size, leaf_size)
+
+    def _new_node(self, start: int, end: int) -> int:
+        self._dim.append(-1)
+        self._split.append(0.0)
+        self._children.append((-1, -1))
+        self._range.append((start, end))
+        return len(self._dim) - 1
+
+    def _build(self, start: int, end: int, leaf_size: int):
+        root = self._new_node(start, end)
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            start, end = self._range[node]
+            if end - start <= leaf_size:
+                continue
+            ids = self.order[start:end]
+            coords = self.points[ids]
+            dim = int(np.argmax(coords.max(axis=0) - coords.min(axis=0)))
+            mid = (end - start) // 2
+            partition = np.argpartition(coords[:, dim], mid)
+            self.order[start:end] = ids[partition]
+            self._dim[node] = dim
+            self._split[node] = float(self.points[self.order[start + mid], dim])
+            left = self._new_node(start, start + mid)
+            right = self._new_node(start + mid, end)
+            self._children[node] = (left, right)
+            stack.extend((left, right))
+
+    def nearest(self, latitude: float, longitude: float, k: int = 5) -> List[Tuple[float, int]]:
+        """The k nearest points.
+
+        Returns:
+            List[Tuple[float, int]]: (distance km, point id), nearest first.
+        """
+        if not self.size or k <= 0:
+            return []
+        query = to_unit_vectors([latitude], [longitude])[0]
+        best: List[Tuple[float, int]] = []  # max-heap of (-chord, id)
+        stack = [(0, 0.0)]
+        while stack:
+            node, plane_distance = stack.pop()
+            if len(best) == k and plane_distance >= -best[0][0]:
+                continue
+            dim = self._dim[node]
+            if dim < 0:
+                start, end = self._range[node]
+                ids = self.order[start:end]
+                chords = np.linalg.norm(self.points[ids] - query, axis=1)
+                for chord, idx in zip(chords.tolist(), ids.tolist()):
+                    if len(best) < k:
+                        heapq.heappush(best, (-chord, idx))
+                    elif chord < -best[0][0]:
+                        heapq.heapreplace(best, (-chord, idx))
+                continue
+            diff = query[dim] - self._split[node]
+            left, right = self._children[node]
+            near, far = (left, right) if diff < 0 else (right, left)
+            # Visit the near side first (it is popped last-in, first-out)
+            stack.append((far, max(plane_distance, abs(diff))))
+            stack.append((near, plane_distance))
+        best.sort(key=lambda item: -item[0])
+        chords = np.array([-chord for chord, _ in best])
+        return list(zip(chord_to_km(chords).tolist(), [idx for _, idx in best]))
+
+    def within(self, latitude: float, longitude: float, radius_km: float) -> List[Tuple[float, int]]:
+        """All points within `radius_km`.
+
+        Returns:
+            List[Tuple[float, int]]: (distance km, point id), nearest first.
+        """
+        if not self.size:
+            return []
+        query = to_unit_vectors([latitude], [longitude])[0]
+        radius = km_to_chord(radius_km)
+        found_ids = []
+        found_chords = []
+        stack = [0]
+        while stack:
+            node = stack.pop()
+            dim = self._dim[node]
+            if dim < 0:
+                start, end = self._range[node]
+                ids = self.order[start:end]
+                chords = np.linalg.norm(self.points[ids] - query, axis=1)
+                mask = chords <= radius
+                found_ids.append(ids[mask])
+                found_chords.append(chords[mask])
+                continue
+            diff = query[dim] - self._split[node]
+            left, right = self._children[node]
+            if diff - radius <= 0:
+                stack.append(left)
+            if diff + radius >= 0:
+                stack.append(right)
+        if not found_ids:
+            return []
+        ids = np.concatenate(found_ids)
+        chords = np.concatenate(found_chords)
+        order = np.argsort(chords, kind="stable")
+        return list(zip(chord_to_km(chords[order]).tolist(), ids[order].tolist()))
@@ -0,0 +1,157 @@
+"""
+Character n-gram inverted index used to shortlist glossary candidates.
+
+The index is a *filter*, not a scorer: for a query and a `fuzz.ratio`
+threshold it returns every entry that could possibly reach the threshold,
+and the caller still computes the exact score for those entries. The filter
+is lossless, so search results are identical to scoring every entry.
+
+Why it is lossless: `fuzz.ratio` is the normalized Indel similarity
+`2 * LCS / (m + n)`, so a score of at least `t` needs an LCS of at least
+`t * (m + n) / 2`. Fixing such an LCS alignment, every character of the
+candidate that is not matched breaks at most `q` of its q-grams, and every
+unmatched query character sitting between two matched ones breaks at most
+`q - 1` of them. The q-grams left intact also occur in the query, which gives
+a lower bound on the shared q-gram count for each candidate length.
+
+The bound is tightest for q = 1 (shared characters >= LCS), which is why the
+glossary uses single-character grams: at the default 0.7 threshold bigram and
+trigram bounds are usually non-positive for short terms and filter little.
+"""
+import math
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+# Slack subtracted before rounding up the required LCS length so that
+# floating point noise can only ever make the filter more permissive.
+_EPSILON = 1e-6
+
+
+def ngrams(text: str, n: int) -> List[str]:
+    """Split text into overlapping character n-grams (no padding)."""
+    return [text[i:i + n] for i in range(len(text) - n + 1)]
+
+
+class NGramIndex:
+    """Inverted index from character n-grams to the entries containing them.
+
+    Args:
+        strings: The (already normalized) strings to index. Entry ids are
+            the positions in this sequence.
+        n: Size of the character n-grams.
+    """
+
+    def __init__(self, strings: Sequence[str], n: int = 1):
+        if n < 1:
+            raise ValueError("n must be at least 1")
+        self.n = n
+        self.size = len(strings)
+        self.lengths = np.fromiter((len(s) for s in strings), dtype=np.int32, count=self.size)
+        self.max_length = int(self.lengths.max()) if self.size else 0
+
+        postings: Dict[str, Tuple[List[int], List[int]]] = defaultdict(lambda: ([], []))
+        for idx, text in enumerate(strings):
+            for gram, count in Counter(ngrams(text, n)).items():
+                ids, counts = postings[gram]
+                ids.append(idx)
+                counts.append(count)
+
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+            gram: (np.asarray(ids, dtype=np.int32), np.asarray(counts, dtype=np.int32))
+            for gram, (ids, counts) in postings.items()
+        }
+
+    @classmethod
+    def from_arrays(
+        cls,
+        n: int,
+        lengths: np.ndarray,
+        grams: Sequence[str],
+        offsets: np.ndarray,
+        ids: np.ndarray,
+        counts: np.ndarray,
+    ) -> "NGramIndex":
+        """Rebuild an index from the flat arrays produced by `to_arrays`.
+
+        The arrays are used as-is (slices are views), so they can live in a
+        read-only memory map shared between processes.
+        """
+        index = cls.__new__(cls)
+        index.n = n
+        index.size = len(lengths)
+        index.lengths = lengths
+        index.max_length = int(lengths.max()) if index.size else 0
+        index._postings = {
+            gram: (ids[offsets[i]:offsets[i + 1]], counts[offsets[i]:offsets[i + 1]])
+            for i, gram in enumerate(grams)
+        }
+        return index
+
+    def to_arrays(self) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """Flatten the posting lists into (grams, offsets, ids, counts)."""
+        grams = sorted(self._postings)
+        sizes = [len(self._postings[gram][0]) for gram in grams]
+        offsets = np.zeros(len(grams) + 1, dtype=np.int64)
+        np.cumsum(sizes, out=offsets[1:])
+        ids = np.concatenate([self._postings[gram][0] for gram in grams] or [np.empty(0, dtype=np.int32)])
+        counts = np.concatenate([self._postings[gram][1] for gram in grams] or [np.empty(0, dtype=np.int32)])
+        return grams, offsets, ids.astype(np.int32), counts.astype(np.int32)
+
+    def _required_overlap(self, query_length: int, threshold: float) -> np.ndarray:
+        """Minimum shared n-gram count per candidate length for `threshold`.
+
+        Lengths that cannot reach the threshold at all get a requirement that
+        no candidate can satisfy.
+        """
+        m, q = query_length, self.n
+        impossible = np.iinfo(np.int32).max
+        required = np.full(self.max_length + 1, impossible, dtype=np.int64)
+        for length in range(self.max_length + 1):
+            lcs = max(0, math.ceil(threshold * (m + length) / 2 - _EPSILON))
+            if lcs > min(m, length):
+                continue
+            from_candidate = (length - q + 1) - q * (length - lcs) - (q - 1) * (m - lcs)
+            from_query = (m - q + 1) - q * (m - lcs) - (q - 1) * (length - lcs)
+            required[length] = max(from_candidate, from_query)
+        return required
+
+    def overlap(self, query: str) -> np.ndarray:
+        """Count the n-grams each entry shares with the query (multiset intersection)."""
+        shared = np.zeros(self.size, dtype=np.int32)
+        for gram, query_count in Counter(ngrams(query, self.n)).items():
+            posting = self._postings.get(gram)
+            if posting is None:
+                continue
+            ids, counts = posting
+            # Ids are unique within a posting list, so fancy-index += is safe
+            shared[ids] += np.minimum(counts, query_count)
+        return shared
+
+    def candidates(self, query: str, threshold: float) -> np.ndarray:
+        """Return the sorted ids of every entry whose ratio could reach `threshold`.
+
+        Args:
+            query: Normalized query string.
+            threshold: Similarity threshold between 0 and 1.
+
+        Returns:
+            np.ndarray: Ascending entry ids; a superset of the true matches.
+        """
+        if not self.size:
+            return np.empty(0, dtype=np.int32)
+        required = self._required_overlap(len(query), threshold)[self.lengths]
+        return np.flatnonzero(self.overlap(query) >= required)
+
+
+def union_candidates(
+    indexes: Iterable[NGramIndex],
+    query: str,
+    threshold: float,
+) -> np.ndarray:
+    """Union of the candidates of several indexes over the same entries."""
+    result = np.empty(0, dtype=np.int64)
+    for index in indexes:
+        result = np.union1d(result, index.candidates(query, threshold))
+    return result
@@ -1,11 +1,14 @@
-import json
+from collections.abc import Sequence
 from enum import Enum
+from typing import List
+import numpy as np
 from pydantic import BaseModel, Field
-from rapidfuzz import fuzz
+from rapidfuzz import fuzz, process
+from agents.tools.glossary import load_glossary, normalize_term
+from agents.tools.term_index import union_candidates
 
-# Load term pairs from JSON file
-with open('assets/term_glossary.json', 'r', encoding='utf-8') as f:
-    term_pairs = json.load(f)
+# Memory-map the compiled glossary (shared by all workers via the page cache)
+GLOSSARY = load_glossary()
 
 class Language(str, Enum):
     ENGLISH = "en"
@@ -20,8 +23,25 @@ class TermPair(BaseModel):
     def __str__(self):
         return f"{self.en} -> {self.mr} ({self.transliteration})"
 
-# Convert raw dictionaries to TermPair objects
-TERM_PAIRS = [TermPair(**pair) for pair in term_pairs]
+
+class TermPairs(Sequence):
+    """Read-only sequence of term pairs, materialized only when accessed."""
+
+    def __len__(self) -> int:
+        return GLOSSARY.size
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        return TermPair(**GLOSSARY.row(idx))
+
+
+TERM_PAIRS = TermPairs()
+
+# Normalized columns and a character index per field, used to shortlist
+# candidates before exact scoring
+TERM_COLUMNS = {language: GLOSSARY.normalized[language.value] for language in Language}
+TERM_INDEXES = {language: GLOSSARY.indexes[language.value] for language in Language}
 
 def search_terms(
     text: str, 
@@ -45,34 +65,121 @@ def search_terms(
         raise ValueError("similarity_threshold must be between 0 and 1")
         
     matches = []
-    text = text.lower()
+    text = normalize_term(text)
+    languages = list(Language) if language is None else [Language(language)]
     
-    for term_pair in TERM_PAIRS:
+    # Only entries that can reach the threshold in some field need scoring;
+    # candidates come back in glossary order so ties keep their original order
+    candidates = union_candidates(
+        (TERM_INDEXES[lang] for lang in languages), text, similarity_threshold
+    )
+    
+    for idx in candidates:
         max_score = 0
-        
-        # Check English term if no language specified or language is English
-        if language in [None, Language.ENGLISH]:
-            en_score = fuzz.ratio(text, term_pair.en.lower()) / 100.0
-            max_score = max(max_score, en_score)
-            
-        # Check Marathi term if no language specified or language is Marathi    
-        if language in [None, Language.MARATHI]:
-            mr_score = fuzz.ratio(text, term_pair.mr.lower()) / 100.0
-            max_score = max(max_score, mr_score)
-            
-        # Check transliteration if no language specified or language is transliteration
-        if language in [None, Language.TRANSLITERATION]:
-            tr_score = fuzz.ratio(text, term_pair.transliteration.lower()) / 100.0
-            max_score = max(max_score, tr_score)
+        for lang in languages:
+            score = fuzz.ratio(text, TERM_COLUMNS[lang][idx]) / 100.0
+            max_score = max(max_score, score)
             
         if max_score >= similarity_threshold:
-            matches.append((term_pair, max_score))
+            matches.append((TERM_PAIRS[idx], max_score))
     
     # Sort by score descending
     matches.sort(key=lambda x: x[1], reverse=True)    
     
+    return _format_matches(text, matches, max_results)
+
+
+def _format_matches(text: str, matches: list, max_results: int) -> str:
+    """Format sorted (TermPair, score) matches for the agent."""
     if len(matches) > 0:
         matches = matches[:max_results]
         return f"Matching Terms for `{text}`\n\n" + "\n".join([f"{match[0]} [{match[1]:.0%}]" for match in matches])
     else:
-        return f"No matching terms found for `{text}`"
\ No newline at end of file
+        return f"No matching terms found for `{text}`"
+
+
+def score_terms(
+    texts: List[str],
+    language: Language = None,
+    score_cutoff: float = 0.0,
+) -> np.ndarray:
+    """
+    Score many texts against the whole glossary in one vectorized call.
+    
+    Uses `rapidfuzz.process.cdist` on all CPU cores, so the per-pair loop runs
+    in native code instead of Python. With a positive `score_cutoff`, only the
+    entries the n-gram indexes shortlist for some text are decoded and scored.
+    
+    Args:
+        texts: The texts to score
+        language: Optional language to restrict scoring to (en/mr/transliteration)
+        score_cutoff: Scores (0-1) below this value are reported as 0
+        
+    Returns:
+        Matrix of shape (len(texts), len(TERM_PAIRS)) holding, for every text and
+        term pair, the best `fuzz.ratio` score (0-1) over the selected fields
+    """
+    languages = list(Language) if language is None else [Language(language)]
+    scores = np.zeros((len(texts), len(TERM_PAIRS)), dtype=np.float64)
+    if not texts:
+        return scores
+    
+    queries = [normalize_term(text) for text in texts]
+    for lang in languages:
+        if score_cutoff > 0:
+            # Entries no text can reach the cutoff with score 0 anyway (the
+            # index filter is lossless), so only the shortlist is decoded
+            ids = np.unique(np.concatenate(
+                [TERM_INDEXES[lang].candidates(query, score_cutoff) for query in queries]
+            ))
+            if not len(ids):
+                continue
+            choices = [TERM_COLUMNS[lang][idx] for idx in ids]
+        else:
+            ids, choices = slice(None), TERM_COLUMNS[lang].tolist()
+        field_scores = process.cdist(
+            queries,
+            choices,
+            scorer=fuzz.ratio,
+            score_cutoff=score_cutoff * 100,
+            dtype=np.float64,
+            workers=-1,
+        )
+        scores[:, ids] = np.maximum(scores[:, ids], field_scores)
+    return scores / 100.0
+
+
+def search_terms_batch(
+    texts: List[str],
+    max_results: int = 5,
+    similarity_threshold: float = 0.7,
+    language: Language = None
+) -> str:
+    """
+    Search for several terms at once using fuzzy string matching across all fields.
+    
+    Prefer this over repeated `search_terms` calls when the query contains
+    multiple agricultural terms: all of them are resolved in a single call.
+    
+    Args:
+        texts: The terms to search for
+        max_results: Maximum number of results to return per term
+        similarity_threshold: Minimum similarity score (0-1) to consider a match
+        language: Optional language to restrict search to (en/mr/transliteration)
+        
+    Returns:
+        Formatted string with the matching results and their scores for each term
+    """
+    if not 0 <= similarity_threshold <= 1:
+        raise ValueError("similarity_threshold must be between 0 and 1")
+    
+    scores = score_terms(texts, language=language, score_cutoff=similarity_threshold)
+    
+    results = []
+    for text, row in zip(texts, scores):
+        matched = np.flatnonzero(row >= similarity_threshold)
+        # Stable sort keeps glossary order for equal scores, like search_terms
+        order = matched[np.argsort(-row[matched], kind='stable')]
+        matches = [(TERM_PAIRS[idx], float(row[idx])) for idx in order]
+        results.append(_format_matches(normalize_term(text), matches, max_results))
+    return "\n\n".join(results)
\ No newline at end of file
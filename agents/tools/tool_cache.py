@@ -0,0 +1,152 @@
+"""
+In-process result cache for tools backed by slow upstream APIs.
+
+Entries are fresh for `ttl` seconds, then served stale for up to `stale_ttl`
+more seconds while one background task refreshes them (stale-while-
+revalidate). Concurrent misses for the same key share a single upstream
+call. Values are kept as Python objects (e.g. parsed pydantic responses), so
+hits skip parsing and validation.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+from helpers.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class ToolCache:
+    """Bounded LRU cache with stale-while-revalidate and miss coalescing.
+
+    Args:
+        name: Name used in logs.
+        ttl: Seconds an entry is served without refreshing.
+        stale_ttl: Further seconds an entry is served while being refreshed.
+        max_entries: Evict least recently used entries above this count.
+    """
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float = 0.0, max_entries: int = 10_000):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.refresh_errors = 0
+        # key -> (fetched_at, value)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for `key`, calling `fetch` when needed.
+
+        Exceptions raised by `fetch` on a miss propagate to every caller
+        waiting on it; nothing is cached for them.
+
+        Args:
+            key: Cache key.
+            fetch: Coroutine function producing the value.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.monotonic() - entry[0]
+            if age < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if age < self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                self.stale_hits += 1
+                if key not in self._inflight:
+                    self._start_fetch(key, fetch, background=True)
+                return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = self._start_fetch(key, fetch, background=False)
+        else:
+            self.coalesced += 1
+        # Shield the shared fetch from the cancellation of any one caller
+        return await asyncio.shield(task)
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value fetched elsewhere."""
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _start_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], background: bool) -> asyncio.Task:
+        async def run():
+            try:
+                value = await fetch()
+                self.put(key, value)
+                return value
+            except Exception as e:
+                if background:
+                    self.refresh_errors += 1
+                    logger.warning(f"{self.name} cache refresh failed for {key}: {e}")
+                raise
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.create_task(run())
+        self._inflight[key] = task
+        # Errors reach the callers awaiting the task (if any); mark them retrieved
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return task
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "refresh_errors": self.refresh_errors,
+        }
+
+
+class PeriodicRefresh:
+    """Run a refresh coroutine now and then every `interval` seconds.
+
+    Failures are logged and retried at the next interval.
+
+    Args:
+        name: Name used in logs.
+        refresh: Coroutine function to run.
+        interval: Seconds between runs.
+    """
+
+    def __init__(self, name: str, refresh: Callable[[], Awaitable[Any]], interval: float):
+        self.name = name
+        self.refresh = refresh
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"{self.name} refresh failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Start refreshing in the background (called from the app lifespan)."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,14 +1,29 @@
+import time
 import uuid
 from datetime import datetime, timezone
 from helpers.utils import get_logger
-import requests
+import httpx
+from agents.tools.beckn import BecknStatusError, beckn_search_json
+from agents.tools.singleflight import flight_key
+from agents.tools.spatial import GeoKDTree
+from agents.tools.tool_cache import PeriodicRefresh
 from pydantic import BaseModel, AnyHttpUrl, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from pydantic_ai import ModelRetry, UnexpectedModelBehavior
 import os
 
 logger = get_logger(__name__)
 
+WAREHOUSE_TIMEOUT = httpx.Timeout(15.0, connect=10.0)
+
+# The Beckn search returns the whole warehouse catalog whatever the location,
+# so a local snapshot of it answers location queries without the network
+WAREHOUSE_SNAPSHOT_REFRESH = int(os.getenv("WAREHOUSE_SNAPSHOT_REFRESH", str(6 * 60 * 60)))
+WAREHOUSE_SNAPSHOT_MAX_AGE = int(os.getenv("WAREHOUSE_SNAPSHOT_MAX_AGE", str(24 * 60 * 60)))
+# Location sent with the snapshot search (centre of Maharashtra)
+WAREHOUSE_SNAPSHOT_LATITUDE = float(os.getenv("WAREHOUSE_SNAPSHOT_LATITUDE", "19.75"))
+WAREHOUSE_SNAPSHOT_LONGITUDE = float(os.getenv("WAREHOUSE_SNAPSHOT_LONGITUDE", "75.71"))
+
 # -----------------------
 # Basic Models
 # -----------------------
@@ -227,6 +242,73 @@ class WarehouseResponse(BaseModel):
             lines.append(f"    {rsp_str}")
         return "\n".join(lines)
 
+# -----------------------
+# Snapshot
+# -----------------------
+class WarehouseSnapshot:
+    """All warehouses of a catalog, indexed by location.
+
+    Warehouse coordinates come from the GPS of the provider fulfillment each
+    item refers to; items without a parseable location are left out.
+
+    Args:
+        response: A warehouse catalog response.
+    """
+
+    def __init__(self, response: WarehouseResponse):
+        self.fetched_at = time.monotonic()
+        self.items: List[Item] = []
+        latitudes, longitudes = [], []
+        seen = set()
+        for rsp in response.responses:
+            for provider in rsp.message.catalog.providers:
+                gps = {f.id: f.locations.gps for f in provider.fulfillments}
+                for item in provider.items:
+                    if item.id in seen:
+                        continue
+                    point = next((p for p in map(_parse_gps, (gps.get(i) for i in item.fulfillment_ids)) if p), None)
+                    if point is None:
+                        continue
+                    seen.add(item.id)
+                    self.items.append(item)
+                    latitudes.append(point[0])
+                    longitudes.append(point[1])
+        self.tree = GeoKDTree(latitudes, longitudes)
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.fetched_at
+
+    def query(self, latitude: float, longitude: float, max_results: int = 5, radius_km: Optional[float] = None) -> str:
+        """Render the nearest warehouses (optionally within a radius), nearest first."""
+        if radius_km is not None:
+            matches = self.tree.within(latitude, longitude, radius_km)[:max_results]
+        else:
+            matches = self.tree.nearest(latitude, longitude, max_results)
+
+        lines = ["> Warehouse Data"]
+        if not matches:
+            lines.append("No warehouse data found for the requested location.")
+            return "\n".join(lines)
+        lines.append("Nearest warehouses:")
+        for idx, (distance_km, item_id) in enumerate(matches, start=1):
+            item_str = str(self.items[item_id]).replace("\n", "\n     ")
+            lines.append(f"  {idx}. Distance: {distance_km:.1f} km")
+            lines.append(f"     {item_str}")
+        return "\n".join(lines)
+
+
+def _parse_gps(gps: Optional[str]) -> Optional[Tuple[float, float]]:
+    """Parse a "lat, lon" string."""
+    try:
+        latitude, longitude = (float(v) for v in gps.split(","))
+    except (AttributeError, ValueError):
+        return None
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return None
+    return latitude, longitude
+
+
 # -----------------------
 # Request Model
 # -----------------------
@@ -295,36 +377,56 @@ class WarehouseRequest(BaseModel):
             }
         }
 
-def warehouse_data(latitude: float, longitude: float) -> str:
+_snapshot: Optional[WarehouseSnapshot] = None
+
+async def _fetch_warehouses(latitude: float, longitude: float) -> WarehouseResponse:
+    payload = WarehouseRequest(latitude=latitude, longitude=longitude).get_payload()
+    key = flight_key("warehouse", latitude, longitude)
+    return WarehouseResponse.model_validate(await beckn_search_json(payload, WAREHOUSE_TIMEOUT, key))
+
+def _store_snapshot(response: WarehouseResponse):
+    global _snapshot
+    snapshot = WarehouseSnapshot(response)
+    if snapshot.items:
+        _snapshot = snapshot
+        logger.info(f"Warehouse snapshot refreshed: {len(snapshot.items)} warehouses")
+
+async def refresh_warehouse_snapshot():
+    """Fetch the warehouse catalog and replace the snapshot."""
+    _store_snapshot(await _fetch_warehouses(WAREHOUSE_SNAPSHOT_LATITUDE, WAREHOUSE_SNAPSHOT_LONGITUDE))
+
+warehouse_snapshot_refresh = PeriodicRefresh("Warehouse snapshot", refresh_warehouse_snapshot, WAREHOUSE_SNAPSHOT_REFRESH)
+
+async def warehouse_data(latitude: float, longitude: float, max_results: int = 5, radius_km: Optional[float] = None) -> str:
     """Get Warehouse data for a specific location.
 
     Args:
         latitude (float): Latitude of the location
         longitude (float): Longitude of the location
+        max_results (int): Maximum number of warehouses to return, nearest first. Default is 5.
+        radius_km (Optional[float]): Only return warehouses within this distance in km. Default is no limit.
     
     Returns:
-        str: The warehouse data for the specific location
+        str: The warehouses nearest to the location, with their distance
     """
     try:
-        payload = WarehouseRequest(latitude=latitude, longitude=longitude).get_payload()
-        response = requests.post(
-            os.getenv("BAP_ENDPOINT"),
-            json=payload,
-            timeout=(10, 15)
-        )
-        
-        if response.status_code != 200:
-            logger.error(f"Warehouse API returned status code {response.status_code}")
-            return "Warehouse service unavailable. Retrying"
-            
-        warehouse_response = WarehouseResponse.model_validate(response.json())
-        return str(warehouse_response)
+        if _snapshot is None or _snapshot.age > WAREHOUSE_SNAPSHOT_MAX_AGE:
+            # No usable snapshot: fetch live, and keep the catalog for next time
+            warehouse_response = await _fetch_warehouses(latitude, longitude)
+            _store_snapshot(warehouse_response)
+            if _snapshot is None or _snapshot.age > WAREHOUSE_SNAPSHOT_MAX_AGE:
+                return str(warehouse_response)
+        return _snapshot.query(latitude, longitude, max_results, radius_km)
                 
-    except requests.Timeout as e:
+    except BecknStatusError as e:
+        logger.error(f"Warehouse API returned status code {e.status_code}")
+        return "Warehouse service unavailable. Retrying"
+    
+    except httpx.TimeoutException as e:
         logger.error(f"Warehouse API request timed out: {str(e)}")
         return "Warehouse request timed out. Please try again later."
     
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Warehouse API request failed: {e}")
         return f"Warehouse request failed: {str(e)}"
     
@@ -1,7 +1,11 @@
 import uuid
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from helpers.utils import get_logger
-import requests
+import httpx
+from agents.tools.beckn import BecknStatusError, beckn_search_json
+from agents.tools.singleflight import flight_key
+from agents.tools.geo import geohash_cell
+from agents.tools.tool_cache import ToolCache
 from pydantic import BaseModel, AnyHttpUrl, Field
 from typing import List, Optional, Dict, Any, Tuple
 from dateutil import parser
@@ -11,6 +15,15 @@ import os
 
 logger = get_logger(__name__)
 
+WEATHER_TIMEOUT = httpx.Timeout(15.0, connect=10.0)
+
+# Forecasts are cached per geohash cell (precision 5 is ~4.9 km) and day
+WEATHER_CACHE_TTL = int(os.getenv("WEATHER_CACHE_TTL", str(30 * 60)))
+WEATHER_CACHE_STALE_TTL = int(os.getenv("WEATHER_CACHE_STALE_TTL", str(60 * 60)))
+WEATHER_CACHE_PRECISION = int(os.getenv("WEATHER_CACHE_GEOHASH_PRECISION", "5"))
+
+weather_cache = ToolCache("Weather", WEATHER_CACHE_TTL, WEATHER_CACHE_STALE_TTL)
+
 # -----------------------
 # Images
 # -----------------------
@@ -413,7 +426,12 @@ class WeatherRequest(BaseModel):
             }
         }
     
-def weather_forecast(latitude: float, longitude: float) -> str:
+async def _fetch_weather(latitude: float, longitude: float) -> WeatherResponse:
+    payload = WeatherRequest(latitude=latitude, longitude=longitude).get_payload()
+    key = flight_key("weather", latitude, longitude, date.today().isoformat())
+    return WeatherResponse.model_validate(await beckn_search_json(payload, WEATHER_TIMEOUT, key))
+
+async def weather_forecast(latitude: float, longitude: float) -> str:
     """Get Weather forecast for a specific location.
 
     Args:
@@ -424,23 +442,21 @@ def weather_forecast(latitude: float, longitude: float) -> str:
         str: The weather forecast for the specific location
     """    
     try:        
-        payload  = WeatherRequest(latitude=latitude, longitude=longitude).get_payload()
-        response = requests.post(os.getenv("BAP_ENDPOINT"),
-                                 json=payload,
-                                 timeout=(10,15))
-        
-        if response.status_code != 200:
-            logger.error(f"Weather API returned status code {response.status_code}")
-            return "Weather service unavailable. Retrying"
-            
-        weather_response = WeatherResponse.model_validate(response.json())
-            
+        # All locations in a grid cell share the forecast for the cell centre
+        cell, cell_latitude, cell_longitude = geohash_cell(latitude, longitude, WEATHER_CACHE_PRECISION)
+        weather_response = await weather_cache.get_or_fetch(
+            (cell, date.today().isoformat()),
+            lambda: _fetch_weather(round(cell_latitude, 4), round(cell_longitude, 4)),
+        )
         return str(weather_response)
                 
-    except requests.Timeout:
+    except BecknStatusError as e:
+        logger.error(f"Weather API returned status code {e.status_code}")
+        return "Weather service unavailable. Retrying"
+    except httpx.TimeoutException:
         logger.error("Weather API request timed out")
         return "Weather request timed out."
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Weather API request failed: {e}")
         return f"Weather request failed: {str(e)}"
     except UnexpectedModelBehavior as e:
@@ -33,6 +33,9 @@ class Settings(BaseSettings):
     jwt_public_key_path: str = os.getenv("JWT_PUBLIC_KEY_PATH", "jwt_public_key.pem")
     jwt_private_key_path: Optional[str] = os.getenv("JWT_PRIVATE_KEY_PATH")
 
+    # Bearer token for the internal /metrics route (unset: the route is disabled)
+    metrics_token: Optional[str] = os.getenv("METRICS_TOKEN")
+
     # Worker Settings
     uvicorn_workers: int = os.cpu_count() or 1
 
@@ -46,6 +49,35 @@ class Settings(BaseSettings):
     redis_max_connections: int = 100
     redis_retry_on_timeout: bool = True
 
+    # Cache value codec: "json", "orjson" or "msgpack_zstd" (see app/core/serializers.py)
+    cache_serializer: str = os.getenv("CACHE_SERIALIZER", "json")
+
+    # Per-worker near-cache in front of Redis (see app/core/cache.py)
+    near_cache_enabled: bool = os.getenv("NEAR_CACHE_ENABLED", "true").lower() == "true"
+    near_cache_max_bytes: int = int(os.getenv("NEAR_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+    near_cache_ttl: int = int(os.getenv("NEAR_CACHE_TTL", "60"))
+
+    # Share identical in-flight upstream tool calls across workers via a Redis lock
+    single_flight_distributed: bool = os.getenv("SINGLE_FLIGHT_DISTRIBUTED", "true").lower() == "true"
+
+    # "sequential": moderate first; "speculative": start the main agent (and its tool calls) while the
+    # query is moderated, cutting latency at the cost of a discarded run for every rejected query
+    moderation_mode: str = os.getenv("MODERATION_MODE", "sequential")
+    # Answer obvious queries with the local classifier (agents/moderation_classifier.py) instead of the LLM.
+    # Off until its precision has been measured on logged traffic (scripts/evaluate_moderation_classifier.py)
+    local_moderation_enabled: bool = os.getenv("LOCAL_MODERATION", "false").lower() == "true"
+    # JSON lines log of LLM moderation verdicts, used to retrain the local classifier (unset: no log)
+    moderation_log_path: Optional[str] = os.getenv("MODERATION_LOG_PATH")
+
+    # Reuse answers of similar first-turn queries (see app/core/semantic_cache.py)
+    semantic_cache_enabled: bool = os.getenv("SEMANTIC_CACHE", "false").lower() == "true"
+    semantic_cache_model: str = os.getenv("SEMANTIC_CACHE_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    semantic_cache_threshold: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+    semantic_cache_max_entries: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "5000"))
+    semantic_cache_ttl: int = int(os.getenv("SEMANTIC_CACHE_TTL", str(24 * 3600)))
+    # Answers using weather, mandi or warehouse data: 0 to never reuse them
+    semantic_cache_time_sensitive_ttl: int = int(os.getenv("SEMANTIC_CACHE_TIME_SENSITIVE_TTL", "0"))
+
     # Cache Configuration
     default_cache_ttl: int = 60 * 60 * 24  # 24 hours
     suggestions_cache_ttl: int = 60 * 30    # 30 minutes
@@ -3,11 +3,23 @@ Core cache instance configuration using Redis and aiocache.
 
 This module provides the cache instance that other parts of the application can use.
 Falls back to in-memory cache if Redis is not available (e.g., in cloud deployments).
+
+With Redis, reads are served from a small in-process near-cache first. Every
+write or delete publishes the key on an invalidation channel; each worker
+listens on it and drops its local copy, so workers and pods stay coherent.
+The near-cache is only used while the listener is subscribed.
 """
+import asyncio
 import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Dict, Iterable, List, Optional
+
 from aiocache import Cache
-from aiocache.serializers import JsonSerializer
+from aiocache.base import SENTINEL
 from app.config import settings
+from app.core.serializers import VersionedSerializer
 from helpers.utils import get_logger
 
 logger = get_logger(__name__)
@@ -15,34 +27,361 @@ logger = get_logger(__name__)
 # Check if we should use Redis or fall back to in-memory cache
 USE_REDIS = os.getenv("USE_REDIS", "true").lower() == "true"
 
+INVALIDATION_CHANNEL = f"{settings.redis_key_prefix}near-cache-invalidate"
+
+# Invalidations remembered per key, to reject reads that raced with them
+RECENT_INVALIDATIONS = 4096
+# Published instead of a key when a whole namespace was cleared
+CLEAR_ALL = "*"
+# Backend methods that write without going through an invalidating wrapper
+UNWRAPPED_WRITES = {"raw"}
+
+
+def _raw(value):
+    """Identity loads/dumps: hand serialized payloads through aiocache untouched."""
+    return value
+
+
+class NearCache:
+    """In-process LRU cache bounded by total payload bytes, with a per-entry TTL.
+
+    Args:
+        max_bytes: Evict least recently used entries above this total size.
+        ttl: Upper bound, in seconds, on how long an entry is served locally.
+        max_invalidations: Recent invalidations remembered per key; a read
+            older than all of them is treated as stale.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, max_invalidations: int = RECENT_INVALIDATIONS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_invalidations = max_invalidations
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # Incremented on every invalidation; a reader takes it before going to
+        # the backend and passes it to `set`, which skips the value if that key
+        # was invalidated in between
+        self.generation = 0
+        # key -> generation of its latest invalidation, oldest first
+        self._invalidated: "OrderedDict[str, int]" = OrderedDict()
+        # Reads from before this generation are stale for every key (cleared,
+        # or older than the invalidations still remembered)
+        self._horizon = 0
+        # key -> (expires_at, size, value)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    def get(self, key: str):
+        """Return the local value for `key`, or None (counted as a miss)."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+        if entry is not None:
+            self._drop(key)
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value, size: int, ttl: Optional[float] = None, generation: Optional[int] = None):
+        """Store `value`, accounted as `size` bytes.
+
+        If `generation` is given and `key` was invalidated since it was
+        read, the value is not stored.
+        """
+        if generation is not None and self.changed(key, generation):
+            return
+        self._drop(key)
+        if size > self.max_bytes:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._entries[key] = (time.monotonic() + ttl, size, value)
+        self.size += size
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def changed(self, key: str, generation: int) -> bool:
+        """Whether `key` may have been invalidated since `generation` was read."""
+        return generation < self._horizon or self._invalidated.get(key, -1) >= generation
+
+    def invalidate(self, key: str):
+        """Drop `key` because it changed elsewhere."""
+        self._invalidated[key] = self.generation
+        self._invalidated.move_to_end(key)
+        while len(self._invalidated) > self.max_invalidations:
+            _, forgotten = self._invalidated.popitem(last=False)
+            self._horizon = forgotten + 1
+        self.generation += 1
+        self.invalidations += 1
+        self._drop(key)
+
+    def clear(self):
+        self.generation += 1
+        self._horizon = self.generation
+        self._invalidated.clear()
+        self._entries.clear()
+        self.size = 0
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "entries": len(self._entries),
+            "bytes": self.size,
+        }
+
+
+class TwoTierCache:
+    """Near-cache in front of an aiocache backend.
+
+    Every aiocache method that writes (`set`, `multi_set`, `add`, `delete`,
+    `increment`, `expire`, `clear`) drops the local copies and publishes the
+    changed keys. Read-only attributes (`client`, `serializer`, `build_key`,
+    `exists`, ...) are forwarded to the backend; `raw` is not available,
+    since its writes could not be invalidated.
+
+    Args:
+        backend: The aiocache cache holding the data.
+        near: Near-cache tier, or None to use the backend only.
+    """
+
+    def __init__(self, backend, near: Optional[NearCache] = None):
+        self.backend = backend
+        self.near = near
+        self.backend_name = backend.NAME
+        self.backend_hits = 0
+        self.backend_misses = 0
+        self.instance_id = uuid.uuid4().hex
+        self._listening = False
+        self._listener: Optional[asyncio.Task] = None
+
+    def __getattr__(self, name):
+        if name in UNWRAPPED_WRITES:
+            raise AttributeError(f"{name} would bypass near-cache invalidation; use the backend directly")
+        return getattr(self.backend, name)
+
+    @property
+    def near_enabled(self) -> bool:
+        return self.near is not None and self._listening
+
+    def count_backend_read(self, found: bool):
+        """Record a backend tier hit or miss."""
+        if found:
+            self.backend_hits += 1
+        else:
+            self.backend_misses += 1
+
+    async def get(self, key: str, default=None):
+        if not self.near_enabled:
+            value = await self.backend.get(key)
+            self.count_backend_read(value is not None)
+            return default if value is None else value
+
+        ns_key = self.backend.build_key(key)
+        payload = self.near.get(ns_key)
+        if payload is None:
+            generation = self.near.generation
+            payload = await self.backend.get(key, loads_fn=_raw)
+            self.count_backend_read(payload is not None)
+            if payload is None:
+                return default
+            self.near.set(ns_key, payload, len(payload), generation=generation)
+        return self.serializer.loads(payload)
+
+    async def multi_get(self, keys: List[str]) -> List[Any]:
+        if not self.near_enabled:
+            values = await self.backend.multi_get(keys)
+            for value in values:
+                self.count_backend_read(value is not None)
+            return values
+
+        ns_keys = [self.backend.build_key(key) for key in keys]
+        payloads = [self.near.get(ns_key) for ns_key in ns_keys]
+        missing = [i for i, payload in enumerate(payloads) if payload is None]
+        if missing:
+            generation = self.near.generation
+            fetched = await self.backend.multi_get([keys[i] for i in missing], loads_fn=_raw)
+            for i, payload in zip(missing, fetched):
+                self.count_backend_read(payload is not None)
+                if payload is not None:
+                    self.near.set(ns_keys[i], payload, len(payload), generation=generation)
+                payloads[i] = payload
+        return [None if payload is None else self.serializer.loads(payload) for payload in payloads]
+
+    async def set(self, key: str, value, ttl=SENTINEL):
+        if ttl is SENTINEL:
+            ttl = self.backend.ttl
+        if not self.near_enabled:
+            return await self.backend.set(key, value, ttl=ttl)
+
+        ns_key = self.backend.build_key(key)
+        payload = self.serializer.dumps(value)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(ns_key, payload, px=int(ttl * 1000) if ttl else None)
+            pipe.publish(INVALIDATION_CHANNEL, self.invalidation_message(ns_key))
+            await pipe.execute()
+        self.near.set(ns_key, payload, len(payload), ttl=ttl or None)
+        return True
+
+    async def delete(self, key: str):
+        if not self.near_enabled:
+            return await self.backend.delete(key)
+
+        ns_key = self.backend.build_key(key)
+        self.near.invalidate(ns_key)
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.delete(ns_key)
+            pipe.publish(INVALIDATION_CHANNEL, self.invalidation_message(ns_key))
+            deleted, _ = await pipe.execute()
+        return deleted
+
+    async def _write(self, ns_keys: List[str], write: Awaitable):
+        """Run a backend write of `ns_keys`, dropping and publishing them."""
+        if not self.near_enabled:
+            return await write
+        for ns_key in ns_keys:
+            self.near.invalidate(ns_key)
+        try:
+            return await write
+        finally:
+            async with self.client.pipeline(transaction=False) as pipe:
+                for ns_key in ns_keys:
+                    pipe.publish(INVALIDATION_CHANNEL, self.invalidation_message(ns_key))
+                await pipe.execute()
+
+    async def multi_set(self, pairs, ttl=SENTINEL, namespace=None):
+        ns_keys = [self.backend.build_key(key, namespace) for key, _ in pairs]
+        return await self._write(ns_keys, self.backend.multi_set(pairs, ttl=ttl, namespace=namespace))
+
+    async def add(self, key: str, value, ttl=SENTINEL, namespace=None):
+        ns_key = self.backend.build_key(key, namespace)
+        return await self._write([ns_key], self.backend.add(key, value, ttl=ttl, namespace=namespace))
+
+    async def increment(self, key: str, delta: int = 1, namespace=None):
+        ns_key = self.backend.build_key(key, namespace)
+        return await self._write([ns_key], self.backend.increment(key, delta, namespace=namespace))
+
+    async def expire(self, key: str, ttl, namespace=None):
+        ns_key = self.backend.build_key(key, namespace)
+        return await self._write([ns_key], self.backend.expire(key, ttl, namespace=namespace))
+
+    async def clear(self, namespace=None):
+        if self.near is not None:
+            self.near.clear()
+        return await self._write([CLEAR_ALL], self.backend.clear(namespace=namespace))
+
+    def invalidation_message(self, ns_key: str) -> str:
+        """Payload published on INVALIDATION_CHANNEL when `ns_key` changes."""
+        return f"{self.instance_id} {ns_key}"
+
+    def invalidate_locally(self, keys: Iterable[str]):
+        """Drop backend keys (as built by `build_key`) from the near-cache."""
+        if self.near is not None:
+            for ns_key in keys:
+                self.near.invalidate(ns_key)
+
+    async def start_invalidation_listener(self):
+        """Subscribe to invalidations; until then the near-cache is bypassed."""
+        if self.near is None or self._listener is not None:
+            return
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop_invalidation_listener(self):
+        if self._listener is None:
+            return
+        self._listener.cancel()
+        try:
+            await self._listener
+        except asyncio.CancelledError:
+            pass
+        self._listener = None
+
+    async def _listen(self):
+        retry_delay = 1.0
+        while True:
+            pubsub = self.client.pubsub()
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                self.near.clear()
+                self._listening = True
+                retry_delay = 1.0
+                logger.info("✅ Near-cache invalidation listener subscribed")
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    origin, _, ns_key = message["data"].decode("utf-8").partition(" ")
+                    if origin == self.instance_id:
+                        continue
+                    if ns_key == CLEAR_ALL:
+                        self.near.clear()
+                    else:
+                        self.near.invalidate(ns_key)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Near-cache invalidation listener failed, bypassing near-cache: {str(e)}")
+            finally:
+                # Without the listener local copies could go stale
+                self._listening = False
+                self.near.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 30.0)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss counters per tier."""
+        tiers: Dict[str, Dict[str, Any]] = {}
+        if self.near is not None:
+            tiers["near"] = {"enabled": self.near_enabled, **self.near.stats()}
+        tiers[self.backend_name] = {"hits": self.backend_hits, "misses": self.backend_misses}
+        return tiers
+
+
 if USE_REDIS:
     # Configure Redis cache
-    cache = Cache(
+    backend = Cache(
         Cache.REDIS,
         endpoint=settings.redis_host,
         port=settings.redis_port,
         db=settings.redis_db,
-        serializer=JsonSerializer(),
+        serializer=VersionedSerializer(settings.cache_serializer),
         ttl=settings.default_cache_ttl,
         # Enhanced connection settings
         timeout=settings.redis_socket_timeout,
         pool_max_size=settings.redis_max_connections,
         # Add key prefix support
-        key_builder=lambda key, namespace: f"{settings.redis_key_prefix}{namespace}:{key}" if namespace else f"{settings.redis_key_prefix}{key}",
+        key_builder=lambda key, namespace=None: f"{settings.redis_key_prefix}{namespace}:{key}" if namespace else f"{settings.redis_key_prefix}{key}",
     )
+    near = NearCache(settings.near_cache_max_bytes, settings.near_cache_ttl) if settings.near_cache_enabled else None
+    cache = TwoTierCache(backend, near)
     logger.info(
         f"Cache configured with Redis at {settings.redis_host}:{settings.redis_port} "
         f"(DB: {settings.redis_db}, Prefix: {settings.redis_key_prefix}, "
-        f"Max Connections: {settings.redis_max_connections})"
+        f"Max Connections: {settings.redis_max_connections}, Serializer: {cache.serializer.codec}, "
+        f"Near-cache: {f'{settings.near_cache_max_bytes} bytes' if near else 'disabled'})"
     )
 else:
     # Use in-memory cache as fallback
-    cache = Cache(
+    cache = TwoTierCache(Cache(
         Cache.MEMORY,
-        serializer=JsonSerializer(),
+        serializer=VersionedSerializer(settings.cache_serializer),
         ttl=settings.default_cache_ttl,
-    )
+    ))
     logger.warning(
         "⚠️ Using in-memory cache (Redis disabled). "
         "Cache will not persist across restarts or scale across instances."
-    ) 
\ No newline at end of file
+    )
@@ -0,0 +1,182 @@
+"""
+Append-only session history store.
+
+Every chat turn (the messages added by one agent run) is stored as its own
+entry in a per-session list, next to the token counts of its parts. A turn
+costs one append instead of rewriting the whole conversation, and reads can
+fetch only the turns they need.
+
+Redis layout (keys go through the cache's key builder):
+    <session>_history_turns        list of serialized turn entries
+    <session>_history_turn_tokens  list of per-turn token totals
+
+With Redis, turns a worker has read or written are also kept in the cache's
+near-cache tier. Without Redis, an in-process store with the same interface
+is used.
+"""
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from app.core.cache import INVALIDATION_CHANNEL, USE_REDIS, cache
+from helpers.utils import get_logger
+
+logger = get_logger(__name__)
+
+TURNS_SUFFIX = "_history_turns"
+TURN_TOKENS_SUFFIX = "_history_turn_tokens"
+
+
+class _CachedSession:
+    """Near-cache record of a session: all turn token totals, fetched entries."""
+
+    __slots__ = ("tokens", "entries")
+
+    def __init__(self, tokens: List[int]):
+        self.tokens = tokens
+        self.entries: Dict[int, Union[bytes, str]] = {}
+
+    @property
+    def size(self) -> int:
+        return 8 * len(self.tokens) + sum(len(entry) for entry in self.entries.values())
+
+
+class RedisHistoryStore:
+    """History store backed by two Redis lists per session.
+
+    Reads go through the cache's near-cache tier when it is active: a worker
+    keeps the turns it has read or appended, and other workers' writes reach
+    it through the cache's invalidation channel.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.client = cache.client
+        self.build_key = cache.build_key
+
+    def _keys(self, session_id: str) -> Tuple[str, str]:
+        return (
+            self.build_key(f"{session_id}{TURNS_SUFFIX}"),
+            self.build_key(f"{session_id}{TURN_TOKENS_SUFFIX}"),
+        )
+
+    def _cached(self, turns_key: str) -> Optional[_CachedSession]:
+        if not self.cache.near_enabled:
+            return None
+        return self.cache.near.get(turns_key)
+
+    async def append(self, session_id: str, entry: Union[bytes, str], tokens: int, ttl: int):
+        """Append one turn entry and refresh the session TTL."""
+        turns_key, tokens_key = self._keys(session_id)
+        cached = self._cached(turns_key)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.rpush(turns_key, entry)
+            pipe.rpush(tokens_key, tokens)
+            pipe.expire(turns_key, ttl)
+            pipe.expire(tokens_key, ttl)
+            pipe.publish(INVALIDATION_CHANNEL, self.cache.invalidation_message(turns_key))
+            length, *_ = await pipe.execute()
+        if cached is not None:
+            if length - 1 == len(cached.tokens):
+                cached.tokens.append(tokens)
+                cached.entries[length - 1] = entry
+                self.cache.near.set(turns_key, cached, cached.size, ttl=ttl)
+            else:
+                # Another worker appended in between
+                self.cache.invalidate_locally([turns_key])
+
+    async def replace(self, session_id: str, entries: Sequence[Union[bytes, str]], tokens: Sequence[int], ttl: int):
+        """Atomically replace all turns of a session (used for migration)."""
+        turns_key, tokens_key = self._keys(session_id)
+        self.cache.invalidate_locally([turns_key])
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.delete(turns_key, tokens_key)
+            if entries:
+                pipe.rpush(turns_key, *entries)
+                pipe.rpush(tokens_key, *tokens)
+                pipe.expire(turns_key, ttl)
+                pipe.expire(tokens_key, ttl)
+            pipe.publish(INVALIDATION_CHANNEL, self.cache.invalidation_message(turns_key))
+            await pipe.execute()
+
+    async def turn_tokens(self, session_id: str) -> List[int]:
+        """Token total of every turn, oldest first."""
+        turns_key, tokens_key = self._keys(session_id)
+        cached = self._cached(turns_key)
+        if cached is not None:
+            return list(cached.tokens)
+        generation = self.cache.near.generation if self.cache.near_enabled else None
+        tokens = [int(t) for t in await self.client.lrange(tokens_key, 0, -1)]
+        self.cache.count_backend_read(bool(tokens))
+        if tokens and generation is not None:
+            cached = _CachedSession(tokens)
+            self.cache.near.set(turns_key, cached, cached.size, generation=generation)
+            return list(tokens)
+        return tokens
+
+    async def get_ranges(self, session_id: str, ranges: Sequence[Tuple[int, int]]) -> List[Union[bytes, str]]:
+        """Entries for the given inclusive index ranges, concatenated in order."""
+        turns_key, _ = self._keys(session_id)
+        cached = self._cached(turns_key)
+        if cached is not None:
+            wanted = [i for start, end in ranges for i in range(start, end + 1)]
+            if all(i in cached.entries for i in wanted):
+                return [cached.entries[i] for i in wanted]
+
+        generation = self.cache.near.generation if cached is not None else None
+        async with self.client.pipeline(transaction=False) as pipe:
+            for start, end in ranges:
+                pipe.lrange(turns_key, start, end)
+            results = await pipe.execute()
+        self.cache.count_backend_read(any(results))
+        if cached is not None and not self.cache.near.changed(turns_key, generation):
+            for (start, _), result in zip(ranges, results):
+                cached.entries.update(zip(range(start, start + len(result)), result))
+            self.cache.near.set(turns_key, cached, cached.size, generation=generation)
+        return [entry for result in results for entry in result]
+
+
+class MemoryHistoryStore:
+    """In-process history store used when Redis is disabled."""
+
+    def __init__(self):
+        # session id -> [expires_at, entries, turn token totals]
+        self._sessions: Dict[str, list] = {}
+
+    def _session(self, session_id: str) -> list:
+        session = self._sessions.get(session_id)
+        if session is not None and session[0] < time.monotonic():
+            del self._sessions[session_id]
+            session = None
+        return session or [0.0, [], []]
+
+    async def append(self, session_id: str, entry: Union[bytes, str], tokens: int, ttl: int):
+        session = self._sessions[session_id] = self._session(session_id)
+        session[0] = time.monotonic() + ttl
+        session[1].append(entry)
+        session[2].append(tokens)
+
+    async def replace(self, session_id: str, entries: Sequence[Union[bytes, str]], tokens: Sequence[int], ttl: int):
+        self._sessions[session_id] = [time.monotonic() + ttl, list(entries), list(tokens)]
+
+    async def turn_tokens(self, session_id: str) -> List[int]:
+        return list(self._session(session_id)[2])
+
+    async def get_ranges(self, session_id: str, ranges: Sequence[Tuple[int, int]]) -> List[bytes]:
+        entries = self._session(session_id)[1]
+        return [entry for start, end in ranges for entry in entries[start:end + 1]]
+
+
+def encode_turn(messages_json, token_counts: Dict[str, int]):
+    """Serialize one turn entry with the cache's serializer."""
+    return cache.serializer.dumps({"messages": messages_json, "tokens": token_counts})
+
+
+def decode_turn(entry) -> dict:
+    """Deserialize one turn entry (any format the cache serializer reads)."""
+    return cache.serializer.loads(entry)
+
+
+if USE_REDIS:
+    history_store = RedisHistoryStore(cache)
+else:
+    history_store = MemoryHistoryStore()
@@ -0,0 +1,338 @@
+"""
+Semantic cache of first-turn answers.
+
+Many sessions open with a question that has been answered many times before
+("how to control pink bollworm in cotton"). For queries without
+conversation history, the answer of a previous first-turn query in the same
+language is reused when the two queries are similar enough (cosine
+similarity of their embeddings at least `semantic_cache_threshold`) and name
+the same crops, pests, inputs and places, instead of running the tool-using
+agent again. Embeddings alone rate "pink bollworm in cotton" and "pink
+bollworm in soybean" as near-duplicates, so the key-term check is what
+keeps an answer from carrying over to another crop or district.
+
+* Embeddings come from a local CPU model through `fastembed` (ONNX, no GPU
+  or PyTorch needed) when it is installed, otherwise from hashed character
+  n-grams, which only match near-identical wordings. The Docker image
+  downloads the model at build time and workers load it at startup, so no
+  request waits for it.
+* Nearest neighbours are found with an `hnswlib` index when it is
+  installed, otherwise by brute force with numpy (fine for a few thousand
+  entries).
+* Answers that used time-sensitive tools (weather, mandi prices, warehouse
+  stock) are not cached, or only for `semantic_cache_time_sensitive_ttl`
+  seconds when that is set; other answers expire after `semantic_cache_ttl`.
+
+The cache is off by default (`SEMANTIC_CACHE=true` enables it). It is per
+worker and bounded by `semantic_cache_max_entries` (least recently used
+answers are evicted). Embedding errors are logged and treated
+as misses. Only answers to queries moderated as valid are stored, and
+`stream_chat_messages` still moderates a query before serving a cached
+answer for it.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from agents.moderation_classifier import STRONG_AGRICULTURAL_TERMS, hashed_ngrams, normalize_query
+from agents.tools.gazetteer import normalize_place
+from agents.tools.maps import gazetteer
+from app.config import settings
+from helpers.utils import get_logger
+
+# Optional local embedding model and vector index
+try:
+    from fastembed import TextEmbedding
+    FASTEMBED_AVAILABLE = True
+except ImportError:
+    FASTEMBED_AVAILABLE = False
+    TextEmbedding = None
+
+try:
+    import hnswlib
+    HNSWLIB_AVAILABLE = True
+except ImportError:
+    HNSWLIB_AVAILABLE = False
+    hnswlib = None
+
+logger = get_logger(__name__)
+
+# Tools whose results go stale within hours
+TIME_SENSITIVE_TOOLS = {"weather_forecast", "mandi_prices", "warehouse_data"}
+
+HASHING_DIM = 1024
+# Longest place name (in words) looked for in a query
+MAX_PLACE_WORDS = 3
+_PLACE_NAMES = frozenset(gazetteer.names)
+
+
+def key_terms(query: str) -> FrozenSet[str]:
+    """The crop, pest, input and livestock terms and the gazetteer places a query names."""
+    text = normalize_query(query)
+    terms = set(STRONG_AGRICULTURAL_TERMS.findall(text))
+    words = normalize_place(text).split()
+    for size in range(1, MAX_PLACE_WORDS + 1):
+        for start in range(len(words) - size + 1):
+            name = " ".join(words[start:start + size])
+            if name in _PLACE_NAMES:
+                terms.add(name)
+    return frozenset(terms)
+
+
+class CachedAnswer(NamedTuple):
+    query: str
+    # key_terms(query)
+    terms: FrozenSet[str]
+    answer: str
+    tools: Tuple[str, ...]
+    # System prompt parts of the run that produced the answer, to rebuild its history
+    system_parts: Tuple
+    expires_at: float
+
+
+class HashingEmbedder:
+    """Signed hashed character n-gram vectors (fallback without fastembed)."""
+
+    dim = HASHING_DIM
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            ids, counts = hashed_ngrams(normalize_query(text))
+            signs = np.where((ids // self.dim) & 1, 1.0, -1.0)
+            np.add.at(vectors[row], ids % self.dim, signs * (1 + np.log(counts)))
+        return _normalize(vectors)
+
+
+class FastEmbedEmbedder:
+    """Sentence embeddings from a local ONNX model via fastembed."""
+
+    def __init__(self, model_name: str):
+        self.model = TextEmbedding(model_name=model_name)
+        self.dim = len(next(iter(self.model.embed(["probe"]))))
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        return _normalize(np.array(list(self.model.embed(texts)), dtype=np.float32))
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms > 0, norms, 1)
+
+
+def create_embedder(model_name: Optional[str] = None):
+    """The configured local embedding model, or the hashing fallback."""
+    model_name = model_name or settings.semantic_cache_model
+    if FASTEMBED_AVAILABLE and model_name:
+        try:
+            return FastEmbedEmbedder(model_name)
+        except Exception as e:
+            logger.warning(f"Embedding model {model_name} unavailable ({e}), using hashed n-grams")
+    return HashingEmbedder()
+
+
+class NumpyIndex:
+    """Exact cosine search over normalized vectors."""
+
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.labels: List[int] = []
+
+    def add(self, label: int, vector: np.ndarray):
+        self.vectors = np.vstack([self.vectors, vector[None, :]])
+        self.labels.append(label)
+
+    def remove(self, label: int):
+        row = self.labels.index(label)
+        self.vectors = np.delete(self.vectors, row, axis=0)
+        del self.labels[row]
+
+    def nearest(self, vector: np.ndarray) -> Optional[Tuple[int, float]]:
+        if not self.labels:
+            return None
+        similarities = self.vectors @ vector
+        row = int(np.argmax(similarities))
+        return self.labels[row], float(similarities[row])
+
+
+class HnswIndex:
+    """Approximate cosine search with hnswlib; removed slots are reused."""
+
+    def __init__(self, dim: int, max_elements: int):
+        self.index = hnswlib.Index(space="cosine", dim=dim)
+        self.index.init_index(max_elements=max_elements, allow_replace_deleted=True)
+        self.count = 0
+
+    def add(self, label: int, vector: np.ndarray):
+        self.index.add_items(vector[None, :], [label], replace_deleted=True)
+        self.count += 1
+
+    def remove(self, label: int):
+        self.index.mark_deleted(label)
+        self.count -= 1
+
+    def nearest(self, vector: np.ndarray) -> Optional[Tuple[int, float]]:
+        if not self.count:
+            return None
+        labels, distances = self.index.knn_query(vector[None, :], k=1)
+        return int(labels[0][0]), 1.0 - float(distances[0][0])
+
+
+class SemanticCache:
+    """Per-language nearest-neighbour cache of first-turn answers.
+
+    Args:
+        threshold: Minimum cosine similarity to reuse an answer.
+        max_entries: Maximum cached answers (all languages).
+        ttl: Seconds answers are reused.
+        time_sensitive_ttl: Seconds answers using time-sensitive tools are
+            reused (0 to never cache them).
+        embedder: Embedding model; created on first use if None.
+    """
+
+    def __init__(
+        self,
+        threshold: float,
+        max_entries: int,
+        ttl: int,
+        time_sensitive_ttl: int = 0,
+        embedder=None,
+    ):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.time_sensitive_ttl = time_sensitive_ttl
+        self._embedder = embedder
+        self._embedder_lock = asyncio.Lock()
+        self._indexes: Dict[str, object] = {}
+        self._entries: "OrderedDict[int, Tuple[str, CachedAnswer]]" = OrderedDict()
+        self._next_label = 0
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.skipped_time_sensitive = 0
+        self.term_mismatches = 0
+
+    async def load_embedder(self):
+        """Load the embedding model, if not loaded yet (called at startup)."""
+        if self._embedder is None:
+            async with self._embedder_lock:
+                if self._embedder is None:
+                    # Loading the model reads (and may download) its weights
+                    self._embedder = await asyncio.to_thread(create_embedder)
+                    logger.info(f"Semantic cache embeddings: {type(self._embedder).__name__}")
+
+    async def _embed(self, text: str) -> np.ndarray:
+        await self.load_embedder()
+        return (await asyncio.to_thread(self._embedder.embed, [text]))[0]
+
+    def _index(self, lang_code: str):
+        index = self._indexes.get(lang_code)
+        if index is None:
+            dim = self._embedder.dim
+            index = HnswIndex(dim, self.max_entries) if HNSWLIB_AVAILABLE else NumpyIndex(dim)
+            self._indexes[lang_code] = index
+        return index
+
+    def _remove(self, label: int):
+        lang_code, _ = self._entries.pop(label)
+        self._indexes[lang_code].remove(label)
+
+    def _same_question(self, match: Optional[Tuple[int, float]], terms: FrozenSet[str]) -> bool:
+        """Whether the nearest entry is similar enough and names the same key terms."""
+        if match is None or match[1] < self.threshold:
+            return False
+        _, entry = self._entries[match[0]]
+        if entry.terms != terms:
+            self.term_mismatches += 1
+            return False
+        return True
+
+    async def lookup(self, query: str, lang_code: str) -> Optional[CachedAnswer]:
+        """A cached answer to a similar first-turn query in the same language."""
+        try:
+            vector = await self._embed(query)
+        except Exception as e:
+            logger.warning(f"Semantic cache lookup failed: {e}")
+            self.misses += 1
+            return None
+        match = self._index(lang_code).nearest(vector)
+        if match is not None:
+            label, similarity = match
+            _, entry = self._entries[label]
+            if entry.expires_at <= time.time():
+                self._remove(label)
+            elif self._same_question(match, key_terms(query)):
+                self._entries.move_to_end(label)
+                self.hits += 1
+                logger.info(f"Semantic cache hit ({similarity:.3f}): {query!r} ~ {entry.query!r}")
+                return entry
+        self.misses += 1
+        return None
+
+    async def store(self, query: str, lang_code: str, answer: str, tools: Iterable[str], system_parts: Iterable):
+        """Cache the answer to a first-turn query, unless it is time-sensitive.
+
+        Args:
+            query: The user's query.
+            lang_code: The answer's language.
+            answer: The answer text.
+            tools: Names of the tools called for the answer.
+            system_parts: The run's system prompt parts.
+        """
+        tools = tuple(sorted(set(tools)))
+        ttl = self.ttl
+        if TIME_SENSITIVE_TOOLS.intersection(tools):
+            if not self.time_sensitive_ttl:
+                self.skipped_time_sensitive += 1
+                return
+            ttl = min(ttl, self.time_sensitive_ttl)
+        try:
+            vector = await self._embed(query)
+        except Exception as e:
+            logger.warning(f"Semantic cache store failed: {e}")
+            return
+        terms = key_terms(query)
+        index = self._index(lang_code)
+        match = index.nearest(vector)
+        if self._same_question(match, terms):
+            self._remove(match[0])  # replace the older answer to the same question
+        while len(self._entries) >= self.max_entries:
+            self._remove(next(iter(self._entries)))
+        label = self._next_label
+        self._next_label += 1
+        index.add(label, vector)
+        self._entries[label] = (lang_code, CachedAnswer(query, terms, answer, tools, tuple(system_parts), time.time() + ttl))
+        self.stored += 1
+
+    def stats(self) -> Dict[str, object]:
+        lookups = self.hits + self.misses
+        return {
+            "embedder": type(self._embedder).__name__ if self._embedder is not None else None,
+            "index": "hnswlib" if HNSWLIB_AVAILABLE else "numpy",
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stored": self.stored,
+            "skipped_time_sensitive": self.skipped_time_sensitive,
+            "term_mismatches": self.term_mismatches,
+        }
+
+
+def create_semantic_cache() -> Optional[SemanticCache]:
+    """The cache configured in settings, or None when disabled."""
+    if not settings.semantic_cache_enabled:
+        return None
+    return SemanticCache(
+        threshold=settings.semantic_cache_threshold,
+        max_entries=settings.semantic_cache_max_entries,
+        ttl=settings.semantic_cache_ttl,
+        time_sensitive_ttl=settings.semantic_cache_time_sensitive_ttl,
+    )
+
+
+semantic_cache = create_semantic_cache()
@@ -0,0 +1,116 @@
+"""
+Cache serializers.
+
+Values are written with the codec selected by `settings.cache_serializer`:
+
+* ``json``: plain JSON text, the format `JsonSerializer` wrote
+* ``orjson``: a 0x01 header byte followed by orjson output
+* ``msgpack_zstd``: a 0x02 header byte followed by zstd-compressed msgpack
+
+Reads recognise every format regardless of the configured codec (JSON text
+never starts with a control byte), so existing entries stay readable and the
+setting can be changed without flushing the cache.
+"""
+import json
+from typing import Any, Callable, Dict, Tuple
+
+from aiocache.serializers import BaseSerializer
+from helpers.utils import get_logger
+
+# Optional imports for binary codecs
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+try:
+    import msgpack
+    import zstandard
+    MSGPACK_ZSTD_AVAILABLE = True
+except ImportError:
+    MSGPACK_ZSTD_AVAILABLE = False
+    msgpack = None
+    zstandard = None
+
+logger = get_logger(__name__)
+
+ORJSON_HEADER = b"\x01"
+MSGPACK_ZSTD_HEADER = b"\x02"
+
+ZSTD_LEVEL = 3
+
+
+def _json_dumps(value: Any) -> str:
+    return json.dumps(value)
+
+
+def _orjson_dumps(value: Any) -> bytes:
+    return ORJSON_HEADER + orjson.dumps(value)
+
+
+def _orjson_loads(payload: bytes) -> Any:
+    return orjson.loads(payload)
+
+
+def _msgpack_zstd_dumps(value: Any) -> bytes:
+    packed = msgpack.packb(value, use_bin_type=True)
+    return MSGPACK_ZSTD_HEADER + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(packed)
+
+
+def _msgpack_zstd_loads(payload: bytes) -> Any:
+    packed = zstandard.ZstdDecompressor().decompress(payload)
+    return msgpack.unpackb(packed, raw=False)
+
+
+# codec name -> (dumps, available)
+CODECS: Dict[str, Tuple[Callable[[Any], Any], bool]] = {
+    "json": (_json_dumps, True),
+    "orjson": (_orjson_dumps, ORJSON_AVAILABLE),
+    "msgpack_zstd": (_msgpack_zstd_dumps, MSGPACK_ZSTD_AVAILABLE),
+}
+
+# header byte -> (loads, codec name)
+_DECODERS: Dict[bytes, Tuple[Callable[[bytes], Any], str]] = {
+    ORJSON_HEADER: (_orjson_loads, "orjson"),
+    MSGPACK_ZSTD_HEADER: (_msgpack_zstd_loads, "msgpack_zstd"),
+}
+
+
+class VersionedSerializer(BaseSerializer):
+    """Serializer that tags binary payloads with a codec header byte.
+
+    Args:
+        codec: Codec used for writing: ``json``, ``orjson`` or ``msgpack_zstd``.
+            Falls back to ``json`` if the codec's package is not installed.
+    """
+
+    # Values can be binary, so the backend must hand back raw bytes
+    DEFAULT_ENCODING = None
+
+    def __init__(self, codec: str = "json", *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if codec not in CODECS:
+            raise ValueError(f"Unknown cache serializer '{codec}', expected one of {sorted(CODECS)}")
+        if not CODECS[codec][1]:
+            logger.warning(f"⚠️ Packages for cache serializer '{codec}' are not installed, using 'json'")
+            codec = "json"
+        self.codec = codec
+        self._dumps = CODECS[codec][0]
+
+    def dumps(self, value: Any):
+        return self._dumps(value)
+
+    def loads(self, value):
+        if value is None:
+            return None
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            value = bytes(value)
+            decoder = _DECODERS.get(value[:1])
+            if decoder is not None:
+                loads, name = decoder
+                if not CODECS[name][1]:
+                    raise ImportError(f"Cannot read a '{name}' cache entry: the package is not installed")
+                return loads(value[1:])
+        return json.loads(value)
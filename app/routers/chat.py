@@ -3,9 +3,9 @@ import uuid
 import asyncio
 from fastapi import APIRouter, BackgroundTasks
 from helpers.utils import get_logger
-from app.utils import _get_message_history
+from app.utils import load_message_history
 from app.tasks.suggestions import create_suggestions
-from app.services.chat import stream_chat_messages
+from app.services.chat import stream_chat_messages, HISTORY_MAX_TOKENS
 from app.models.requests import ChatRequest
 from typing import Optional
 
@@ -24,11 +24,13 @@ async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
     )
     
     # Get the message history
-    history = await _get_message_history(session_id)
+    history, turn_count = await load_message_history(session_id, max_tokens=HISTORY_MAX_TOKENS)
     logger.debug(f"Retrieved message history for session {session_id} - length: {len(history)}")
+    # The history is trimmed to a token budget, so count turns in the store
+    turn_number = turn_count + 1
 
     # Create suggestions for the session: 1, 3, 5, 7, ...
-    if (len(history)+1) % 2 == 0:
+    if turn_number % 2 == 1:
         logger.debug(f"Creating suggestions for session {session_id}")
         background_tasks.add_task(create_suggestions, session_id, request.target_lang)
 
@@ -48,7 +50,8 @@ async def chat(request: ChatRequest, background_tasks: BackgroundTasks):
                 source_lang=request.source_lang,
                 target_lang=request.target_lang,
                 user_id=request.user_id,
-                history=history
+                history=history,
+                turn_number=turn_number,
             ):
                 chunks_yielded += 1
                 yield chunk
@@ -0,0 +1,53 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.security.utils import get_authorization_scheme_param
+
+from app.utils import cache
+from app.config import settings
+from helpers.tts_cache import tts_cache
+from agents.moderation_cache import moderation_cache
+from app.core.semantic_cache import semantic_cache
+from agents.prompt_cache import gemini_cache_transport, prompt_cache_metrics
+from app.services.chat import local_moderator, ttft_metrics
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+async def require_metrics_token(authorization: Optional[str] = Header(None)):
+    """Only let through callers presenting METRICS_TOKEN as a bearer token.
+
+    The route does not exist (404) when no token is configured.
+    """
+    if not settings.metrics_token:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    scheme, token = get_authorization_scheme_param(authorization)
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.metrics_token.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get("/", status_code=status.HTTP_200_OK, dependencies=[Depends(require_metrics_token)])
+async def metrics():
+    """
+    Internal cache, moderation and latency metrics of this worker:
+    - Redis / near-cache, TTS cache, moderation and semantic cache statistics
+    - Time to first token of chat responses
+    - Prompt cache token counts and Gemini cached content
+    """
+    return {
+        "cache_stats": cache.stats(),
+        "tts_cache_stats": tts_cache.stats() if tts_cache is not None else None,
+        "chat_ttft": ttft_metrics.stats(),
+        "local_moderation": local_moderator.stats() if local_moderator is not None else None,
+        "moderation_cache_stats": moderation_cache.stats(),
+        "semantic_cache_stats": semantic_cache.stats() if semantic_cache is not None else None,
+        "prompt_cache": {
+            "tokens": prompt_cache_metrics.stats(),
+            "gemini_cached_content": gemini_cache_transport.stats() if gemini_cache_transport is not None else None,
+        },
+    }
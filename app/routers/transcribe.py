@@ -1,5 +1,5 @@
 import uuid
-from helpers.transcription import transcribe_bhashini, detect_audio_language_bhashini
+from helpers.transcription import detect_and_transcribe_bhashini
 from helpers.utils import get_logger
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import JSONResponse
@@ -18,10 +18,8 @@ async def transcribe(request: TranscribeRequest):
         raise HTTPException(status_code=400, detail="audio_content is required")
    
     try:
-        lang_code = detect_audio_language_bhashini(request.audio_content)
+        lang_code, transcription = await detect_and_transcribe_bhashini(request.audio_content)
         logger.info(f"Detected language code: {lang_code}")
-        
-        transcription = transcribe_bhashini(request.audio_content, lang_code)
         logger.info(f"Transcription: {transcription}")
         
         return TranscribeResponse(
@@ -1,8 +1,9 @@
-from helpers.tts import text_to_speech_bhashini
+from helpers.tts import stream_text_to_speech, text_to_speech
 from helpers.utils import get_logger
 import uuid
 import base64
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from app.models.requests import TTSRequest
 from app.models.responses import TTSResponse
 
@@ -18,7 +19,7 @@ async def tts(request: TTSRequest):
         raise HTTPException(status_code=400, detail="text is required")
     
     try:
-        audio_data = text_to_speech_bhashini(request.text, request.lang_code, gender='female', sampling_rate=8000)
+        audio_data = await text_to_speech(request.text, request.lang_code, gender='female', sampling_rate=8000)
         
         # Base64 encode the binary audio data for JSON serialization
         if isinstance(audio_data, bytes):
@@ -32,3 +33,43 @@ async def tts(request: TTSRequest):
     except Exception as e:
         logger.error(f"TTS error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"TTS failed: {str(e)}")
+
+
+@router.post("/stream")
+async def tts_stream(request: TTSRequest):
+    """Streams text to speech as WAV audio, sentence by sentence, using Bhashini service."""
+    
+    if not request.text:
+        raise HTTPException(status_code=400, detail="text is required")
+    
+    stream = stream_text_to_speech(request.text, request.lang_code, gender='female', sampling_rate=8000)
+    # Synthesize the first chunk before responding, so failures still return an error status
+    try:
+        first_chunk = await stream.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=400, detail="text has nothing to speak")
+    except Exception as e:
+        await stream.aclose()
+        logger.error(f"TTS error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"TTS failed: {str(e)}")
+
+    async def audio():
+        try:
+            yield first_chunk
+            async for chunk in stream:
+                yield chunk
+        except Exception as e:
+            logger.error(f"TTS streaming error: {str(e)}")
+            raise
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        audio(),
+        media_type='audio/wav',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            'X-Session-Id': request.session_id or str(uuid.uuid4()),
+        }
+    )
@@ -1,14 +1,23 @@
-
-from typing import AsyncGenerator
+import asyncio
+import time
+from collections import deque
+from dataclasses import replace
+from typing import AsyncGenerator, Dict, List, Optional
 from agents.agrinet import agrinet_agent
-from agents.moderation import moderation_agent
-from helpers.utils import get_logger
+from agents.moderation import moderation_agent, QueryModerationResult
+from agents.moderation_cache import moderation_cache, moderation_cache_key
+from agents.moderation_classifier import VALID_CATEGORY, load_local_moderator, log_verdict
+from agents.prompt_cache import prompt_cache_metrics
+from app.config import settings
+from app.core.semantic_cache import CachedAnswer, semantic_cache
 from app.utils import (
-    update_message_history, 
-    trim_history, 
+    append_message_history,
+    get_turn_count,
+    trim_history,
     format_message_pairs
 )
 from dotenv import load_dotenv
+from pydantic_ai.messages import ModelRequest, ModelResponse, TextPart, ToolCallPart, UserPromptPart
 from agents.deps import FarmerContext
 from helpers.utils import get_logger
 
@@ -16,6 +25,178 @@ load_dotenv()
 
 logger = get_logger(__name__)
 
+# Token budget of the conversation history passed to the main agent
+HISTORY_MAX_TOKENS = 60_000
+
+# Verdict assumed by the speculative run; accepted queries get the same prompt as in sequential mode
+ASSUMED_VERDICT = QueryModerationResult(category="valid_agricultural", action="Proceed with the query")
+
+_END = object()
+
+# First-stage moderation of obvious queries, without an LLM call
+local_moderator = load_local_moderator() if settings.local_moderation_enabled else None
+
+
+class TTFTMetrics:
+    """Time to first token of chat responses, per moderation mode."""
+
+    def __init__(self, window: int = 1000):
+        self.samples: Dict[str, deque] = {}
+        self.window = window
+        self.speculative_rejected = 0
+
+    def record(self, mode: str, seconds: float):
+        self.samples.setdefault(mode, deque(maxlen=self.window)).append(seconds)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {}
+        for mode, samples in self.samples.items():
+            ordered = sorted(samples)
+            stats[mode] = {
+                "count": len(ordered),
+                "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+                "mean_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+            }
+        stats["speculative_rejected"] = self.speculative_rejected
+        return stats
+
+
+ttft_metrics = TTFTMetrics()
+
+
+async def _stream_agent(deps: FarmerContext, history: list, new_messages: List) -> AsyncGenerator[str, None]:
+    """Stream the main agent's answer; its messages are added to `new_messages` once complete."""
+    async with agrinet_agent.run_stream(
+        user_prompt=deps.get_user_message(),
+        message_history=trim_history(
+            history,
+            max_tokens=HISTORY_MAX_TOKENS,
+            include_system_prompts=True,
+            include_tool_calls=True
+        ),
+        deps=deps,
+    ) as response_stream:  # response_stream is a StreamedRunResult
+        async for chunk in response_stream.stream_text(delta=True, debounce_by=0.1):
+            if chunk:  # Ensure non-empty chunks are yielded
+                yield chunk
+        new_messages.extend(response_stream.new_messages())
+        prompt_cache_metrics.record("agrinet", response_stream.usage())
+
+
+async def _moderate(user_message: str, query: str, has_context: bool, cache_key: str) -> QueryModerationResult:
+    """Moderate the query with the LLM, caching the verdict and logging it for retraining the local classifier."""
+    start = time.perf_counter()
+    moderation_run = await moderation_agent.run(user_message)
+    prompt_cache_metrics.record("moderation", moderation_run.usage())
+    verdict = moderation_run.output
+    await moderation_cache.put(cache_key, verdict)
+    if settings.moderation_log_path:
+        latency_ms = (time.perf_counter() - start) * 1000
+        log_verdict(settings.moderation_log_path, query, has_context, verdict.category, latency_ms)
+    return verdict
+
+
+async def _verdict_stream(
+    verdict: QueryModerationResult, deps: FarmerContext, history: list, new_messages: List
+) -> AsyncGenerator[str, None]:
+    """Run the main agent with a verdict that is already known (local or cached)."""
+    deps.update_moderation_str(str(verdict))
+    async for chunk in _stream_agent(deps, history, new_messages):
+        yield chunk
+
+
+async def _cached_answer_stream(
+    answer: CachedAnswer, verdict: QueryModerationResult, deps: FarmerContext, new_messages: List
+) -> AsyncGenerator[str, None]:
+    """Stream a semantic cache answer, recording it as the turn's messages."""
+    deps.update_moderation_str(str(verdict))
+    new_messages.extend([
+        ModelRequest(parts=[*answer.system_parts, UserPromptPart(content=deps.get_user_message())]),
+        ModelResponse(parts=[TextPart(content=answer.answer)]),
+    ])
+    yield answer.answer
+
+
+async def _sequential_stream(
+    user_message: str, cache_key: str, deps: FarmerContext, history: list, new_messages: List, verdicts: List
+) -> AsyncGenerator[str, None]:
+    """Moderate the query, then run the main agent with the verdict."""
+    verdict = await _moderate(user_message, deps.query, bool(history), cache_key)
+    verdicts.append(verdict)
+    deps.update_moderation_str(str(verdict))
+    async for chunk in _stream_agent(deps, history, new_messages):
+        yield chunk
+
+
+def _with_user_message(messages: List, assumed: str, actual: str) -> List:
+    """`messages` with the user prompt `assumed` replaced by `actual`."""
+    if assumed == actual:
+        return messages
+    rebuilt = []
+    for message in messages:
+        if isinstance(message, ModelRequest) and any(
+            isinstance(part, UserPromptPart) and part.content == assumed for part in message.parts
+        ):
+            message = replace(message, parts=[
+                replace(part, content=actual) if isinstance(part, UserPromptPart) and part.content == assumed else part
+                for part in message.parts
+            ])
+        rebuilt.append(message)
+    return rebuilt
+
+
+async def _speculative_stream(
+    user_message: str, cache_key: str, deps: FarmerContext, history: list, new_messages: List, verdicts: List
+) -> AsyncGenerator[str, None]:
+    """Run moderation and the main agent concurrently.
+
+    The main agent starts at once, assuming the query is valid; its chunks
+    are buffered until the verdict arrives. If the query is accepted the
+    buffer is flushed and streaming continues. Otherwise the speculative run
+    is cancelled and the main agent runs again with the actual verdict, as
+    in sequential mode.
+    """
+    moderation_task = asyncio.create_task(_moderate(user_message, deps.query, bool(history), cache_key))
+    speculative_deps = deps.model_copy()
+    speculative_deps.update_moderation_str(str(ASSUMED_VERDICT))
+    speculative_messages: List = []
+    buffer: asyncio.Queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for chunk in _stream_agent(speculative_deps, history, speculative_messages):
+                await buffer.put(chunk)
+        finally:
+            buffer.put_nowait(_END)
+
+    pump_task = asyncio.create_task(pump())
+    try:
+        verdict = await moderation_task
+        verdicts.append(verdict)
+        if verdict.category != ASSUMED_VERDICT.category:
+            ttft_metrics.speculative_rejected += 1
+            logger.info(f"Moderation rejected the query ({verdict.category}), cancelling the speculative answer")
+            pump_task.cancel()
+            deps.update_moderation_str(str(verdict))
+            async for chunk in _stream_agent(deps, history, new_messages):
+                yield chunk
+            return
+
+        deps.update_moderation_str(str(verdict))
+        while (chunk := await buffer.get()) is not _END:
+            yield chunk
+        await pump_task  # re-raise errors of the speculative run
+        # Store the turn with the actual verdict (its action may be worded
+        # differently from the assumed one), as sequential mode would
+        new_messages.extend(_with_user_message(
+            speculative_messages, speculative_deps.get_user_message(), deps.get_user_message()
+        ))
+    finally:
+        moderation_task.cancel()
+        pump_task.cancel()
+
+
 async def stream_chat_messages(
     query: str,
     session_id: str,
@@ -23,11 +204,18 @@ async def stream_chat_messages(
     target_lang: str,
     user_id: str,
     history: list,
+    turn_number: Optional[int] = None,
 ) -> AsyncGenerator[str, None]:
-    """Async generator for streaming chat messages."""
+    """Async generator for streaming chat messages.
+
+    `turn_number` is the 1-based number of this turn in the session; `history`
+    may be trimmed, so it defaults to the number of turns in the store plus one.
+    """
+    if turn_number is None:
+        turn_number = await get_turn_count(session_id) + 1
     # Generate a unique content ID for this query
-    content_id = f"query_{session_id}_{len(history)//2 + 1}"
-       
+    content_id = f"query_{session_id}_{turn_number}"
+
     deps = FarmerContext(
         query=query,
         lang_code=target_lang,
@@ -38,32 +226,52 @@ async def stream_chat_messages(
         last_response = f"**Conversation**\n\n{message_pairs}\n\n---\n\n"
     else:
         last_response = ""
-    
+
     user_message = f"{last_response}{deps.get_user_message()}"
-    moderation_run = await moderation_agent.run(user_message)
-    moderation_data = moderation_run.output
-    
-    deps.update_moderation_str(str(moderation_data))
 
-    # Run the main agent
-    async with agrinet_agent.run_stream(
-        user_prompt=deps.get_user_message(),
-        message_history=trim_history(
-            history,
-            max_tokens=60_000,
-            include_system_prompts=True,
-            include_tool_calls=True
-        ),
-        deps=deps,
-    ) as response_stream:  # response_stream is a StreamedRunResult
-        async for chunk in response_stream.stream_text(delta=True, debounce_by=0.1):
-            if chunk:  # Ensure non-empty chunks are yielded
-                yield chunk
-        
-        # After streaming is complete, get the run result for history
-        new_messages = response_stream.new_messages()
-        messages = [
-            *history,
-            *new_messages
-        ]
-        await update_message_history(session_id, messages)
\ No newline at end of file
+    new_messages: List = []
+    start = time.perf_counter()
+    first_turn = not history
+    cached_answer = None
+    if semantic_cache is not None and first_turn:
+        cached_answer = await semantic_cache.lookup(query, target_lang)
+    # Verdicts depend on the query, the language and the conversation shown to the moderation agent
+    cache_key = moderation_cache_key(query, target_lang, last_response)
+    verdict = await moderation_cache.get(cache_key)
+    mode = "cached"
+    if verdict is None and local_moderator is not None:
+        verdict = local_moderator.classify(query, has_context=bool(history))
+        mode = "local"
+    if cached_answer is not None and verdict is None:
+        # Never serve a cached answer to a query that has not been moderated
+        verdict = await _moderate(user_message, query, False, cache_key)
+        mode = "sequential"
+    verdicts: List = [verdict] if verdict is not None else []
+    if cached_answer is not None and verdict.category == VALID_CATEGORY:
+        mode = "semantic"
+        stream = _cached_answer_stream(cached_answer, verdict, deps, new_messages)
+    elif verdict is not None:
+        stream = _verdict_stream(verdict, deps, history, new_messages)
+    else:
+        mode = settings.moderation_mode
+        stream_fn = _speculative_stream if mode == "speculative" else _sequential_stream
+        stream = stream_fn(user_message, cache_key, deps, history, new_messages, verdicts)
+    first_chunk = True
+    chunks: List[str] = []
+    async for chunk in stream:
+        if first_chunk:
+            first_chunk = False
+            ttft = time.perf_counter() - start
+            ttft_metrics.record(mode, ttft)
+            logger.info(f"Time to first token ({mode} moderation): {ttft * 1000:.0f} ms")
+        chunks.append(chunk)
+        yield chunk
+
+    if semantic_cache is not None and first_turn and mode != "semantic" and chunks \
+            and verdicts and verdicts[-1].category == VALID_CATEGORY:
+        tools = [part.tool_name for message in new_messages for part in message.parts if isinstance(part, ToolCallPart)]
+        system_parts = [part for part in new_messages[0].parts if part.part_kind == "system-prompt"] if new_messages else []
+        await semantic_cache.store(query, target_lang, "".join(chunks), tools, system_parts)
+
+    # After streaming is complete, append this turn to the history
+    await append_message_history(session_id, new_messages)
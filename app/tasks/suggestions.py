@@ -2,12 +2,14 @@ from app.core.cache import cache
 from helpers.utils import get_logger
 from app.utils import _get_message_history, trim_history, format_message_pairs
 from agents.suggestions import suggestions_agent
+from agents.prompt_cache import prompt_cache_metrics
 from langcodes import Language
 
 logger = get_logger(__name__)
 
 
 SUGGESTIONS_CACHE_TTL = 60*30 # 30 minutes
+SUGGESTIONS_HISTORY_TURNS = 5 # Recent turns used to build suggestions
 
 async def create_suggestions(session_id: str, target_lang: str = 'mr'):
     """
@@ -17,7 +19,7 @@ async def create_suggestions(session_id: str, target_lang: str = 'mr'):
 
     target_lang_name = Language.get(target_lang).display_name(target_lang)
 
-    history   = trim_history(await _get_message_history(session_id),
+    history   = trim_history(await _get_message_history(session_id, max_turns=SUGGESTIONS_HISTORY_TURNS),
                              30_000,
                              include_tool_calls=False,
                              include_system_prompts=False
@@ -26,6 +28,7 @@ async def create_suggestions(session_id: str, target_lang: str = 'mr'):
 
     message       = f"**Conversation**\n\n{message_pairs}\n\n**Based on the conversation, suggest 3-5 questions the farmer can ask in {target_lang_name}.**"
     agent_run    = await suggestions_agent.run(message)
+    prompt_cache_metrics.record("suggestions", agent_run.usage())
     suggestions = [x for x in agent_run.output]
     logger.info(f"Suggestions: {suggestions}")
     # Store suggestions in cache
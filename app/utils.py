@@ -1,7 +1,13 @@
-from typing import List
+from dataclasses import replace
+from typing import List, Optional, Set, Tuple
 from app.core.cache import cache
-from helpers.utils import get_logger, count_tokens_for_part
-from copy import deepcopy
+from app.core.history import history_store, encode_turn, decode_turn
+from helpers.utils import (
+    get_logger,
+    count_tokens_for_part,
+    seed_token_counts,
+    token_counts_for_parts,
+)
 from pydantic_ai.messages import (
     ModelMessagesTypeAdapter,
     ModelMessage,
@@ -10,6 +16,7 @@ from pydantic_ai.messages import (
 from pydantic_core import to_jsonable_python
 
 HISTORY_SUFFIX = "_oan"
+TOKEN_COUNTS_SUFFIX = "_TOKENS"
 
 DEFAULT_CACHE_TTL = 60*60*24 # 24 hours
 
@@ -45,12 +52,104 @@ async def set_cache(key: str, value, ttl: int = DEFAULT_CACHE_TTL):
     await cache.set(key, value, ttl=ttl)
     return True
 
-async def _get_message_history(session_id: str) -> List[ModelMessage]:
-    """Get or initialize message history."""
-    message_history = await cache.get(f"{session_id}_{HISTORY_SUFFIX}")
-    if message_history:
-        return ModelMessagesTypeAdapter.validate_python(message_history)
-    return []
+async def get_turn_count(session_id: str) -> int:
+    """Number of turns stored for a session (the loaded history may be trimmed)."""
+    return len(await history_store.turn_tokens(session_id))
+
+async def _get_message_history(
+    session_id: str,
+    max_turns: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+) -> List[ModelMessage]:
+    """Get or initialize message history (see `load_message_history`)."""
+    messages, _ = await load_message_history(session_id, max_turns, max_tokens)
+    return messages
+
+async def load_message_history(
+    session_id: str,
+    max_turns: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+) -> Tuple[List[ModelMessage], int]:
+    """Get or initialize message history, with the number of stored turns.
+    
+    Only the first turn (which carries the system prompt) and the most recent
+    turns within `max_turns` / `max_tokens` are fetched and validated. Token
+    counts stored with each turn are loaded into the token-count memo, so
+    trimming the history only has to encode the new turn.
+    
+    Args:
+        session_id: Session to load
+        max_turns: Maximum number of recent turns to fetch (None = all)
+        max_tokens: Token budget for the fetched turns, as counted when they
+            were stored (None = no limit)
+        
+    Returns:
+        List of messages, oldest first, and the number of turns stored for
+        the session (the messages may cover fewer)
+    """
+    turn_tokens = await history_store.turn_tokens(session_id)
+    if not turn_tokens:
+        turn_tokens = await _migrate_message_history(session_id)
+        if not turn_tokens:
+            return [], 0
+    
+    # Always keep the first turn, then walk back from the newest one
+    budget = None if max_tokens is None else max_tokens - turn_tokens[0]
+    start = len(turn_tokens)
+    while start > 1:
+        if max_turns is not None and len(turn_tokens) - start >= max_turns:
+            break
+        if budget is not None:
+            if turn_tokens[start - 1] > budget:
+                break
+            budget -= turn_tokens[start - 1]
+        start -= 1
+    
+    ranges = [(0, len(turn_tokens) - 1)] if start <= 1 else [(0, 0), (start, len(turn_tokens) - 1)]
+    messages = []
+    for entry in await history_store.get_ranges(session_id, ranges):
+        turn = decode_turn(entry)
+        seed_token_counts(turn["tokens"])
+        messages.extend(turn["messages"])
+    return ModelMessagesTypeAdapter.validate_python(messages), len(turn_tokens)
+
+
+async def _migrate_message_history(session_id: str) -> List[int]:
+    """Move a history stored as a single blob into per-turn entries.
+    
+    Returns:
+        Token total of every migrated turn (empty if there was nothing to migrate)
+    """
+    legacy_keys = [
+        f"{session_id}_{HISTORY_SUFFIX}",
+        f"{session_id}_{HISTORY_SUFFIX}{TOKEN_COUNTS_SUFFIX}",
+    ]
+    message_history, token_counts = await cache.multi_get(legacy_keys)
+    if not message_history:
+        return []
+    if token_counts:
+        seed_token_counts(token_counts)
+    
+    # Split at each user message, the same way trim_history does
+    turns: List[List[ModelMessage]] = []
+    for msg in ModelMessagesTypeAdapter.validate_python(message_history):
+        if not turns or any(getattr(p, "part_kind", "") == "user-prompt" for p in msg.parts):
+            turns.append([])
+        turns[-1].append(msg)
+    
+    entries, turn_tokens = zip(*(_encode_turn(turn) for turn in turns))
+    await history_store.replace(session_id, entries, turn_tokens, ttl=DEFAULT_CACHE_TTL)
+    for key in legacy_keys:
+        await cache.delete(key)
+    logger.info(f"Migrated {len(turns)} turns of session {session_id} to the turn store")
+    return list(turn_tokens)
+
+
+def _encode_turn(messages: List[ModelMessage]) -> Tuple[bytes, int]:
+    """Serialize a turn with its token counts; also return its token total."""
+    parts = [p for m in messages for p in m.parts]
+    total_tokens = sum(count_tokens_for_part(p) for p in parts)
+    return encode_turn(to_jsonable_python(messages), token_counts_for_parts(parts)), total_tokens
 
 def _get_moderation_history(session_id: str) -> List[ModelMessage]:
     """Get or initialize moderation history."""
@@ -59,9 +158,12 @@ def _get_moderation_history(session_id: str) -> List[ModelMessage]:
         return ModelMessagesTypeAdapter.validate_python(moderation_history)
     return []
 
-async def update_message_history(session_id: str, all_messages: List[ModelMessage]):
-    """Update message history."""
-    await cache.set(f"{session_id}_{HISTORY_SUFFIX}", to_jsonable_python(all_messages), ttl=DEFAULT_CACHE_TTL)
+async def append_message_history(session_id: str, new_messages: List[ModelMessage]):
+    """Append the messages of one turn to the session history."""
+    if not new_messages:
+        return
+    entry, total_tokens = _encode_turn(new_messages)
+    await history_store.append(session_id, entry, total_tokens, ttl=DEFAULT_CACHE_TTL)
 
 def update_moderation_history(session_id: str, moderation_messages: List[ModelMessage]):
     """Update moderation history."""
@@ -81,22 +183,30 @@ def filter_out_tool_calls(messages: List[ModelMessage]) -> List[ModelMessage]:
     
     filtered_messages = []
     for message in messages:
-        # Create a deep copy to avoid modifying the original
-        msg_copy = deepcopy(message)
         filtered_parts = []
         
-        for part in msg_copy.parts:
+        for part in message.parts:
             # Only keep non-tool parts
             if not hasattr(part, 'part_kind') or part.part_kind not in ['tool-call', 'tool-return']:
                 filtered_parts.append(part)
         
         # Only add messages that have non-tool parts
         if filtered_parts:
-            msg_copy.parts = filtered_parts
-            filtered_messages.append(msg_copy)            
+            filtered_messages.append(_with_parts(message, filtered_parts))
     return filtered_messages
 
 
+def _with_parts(message: ModelMessage, parts: list) -> ModelMessage:
+    """Return the message restricted to `parts` (a subset of its parts, in order).
+    
+    The original is returned when nothing was removed; otherwise a shallow copy
+    that shares the part objects, so the cached history is never mutated.
+    """
+    if len(parts) == len(message.parts):
+        return message
+    return replace(message, parts=parts)
+
+
 
 def get_message_pairs(history: List[ModelMessage], limit: int = None) -> List[List]:
     """Extract user/assistant message part pairs from history, starting with the most recent.
@@ -149,7 +259,7 @@ def get_message_pairs(history: List[ModelMessage], limit: int = None) -> List[Li
             break  # No more user messages
             
         # Add the pair and continue searching from before this pair
-        pairs.append([deepcopy(user_part), deepcopy(text_part)])
+        pairs.append([user_part, text_part])
         i = user_idx - 1
         
     return pairs
@@ -181,45 +291,57 @@ def trim_history(
     include_system_prompts: bool = True,
     include_tool_calls: bool = True,
 ) -> List[ModelMessage]:
-    # 1. Pre-process system parts: strip them or keep whole messages
-    prepped: List[ModelMessage] = []
+    """Trim history to the most recent turns that fit in `max_tokens`.
+    
+    The turn holding the system prompt is always kept (when included). Messages
+    are never deep-copied: messages whose parts are filtered become shallow
+    copies sharing the original part objects.
+    
+    Args:
+        history: List of messages (ModelMessage objects)
+        max_tokens: Token budget for the returned history
+        include_system_prompts: Keep system prompt parts
+        include_tool_calls: Keep tool calls and returns that are paired within a turn
+        
+    Returns:
+        Trimmed list of messages
+    """
+    # 1. Split into "turns" at each user message, collecting the tool call and
+    #    return ids of each turn in the same pass
+    turns: List[Tuple[List[Tuple[ModelMessage, list]], Set[str], Set[str]]] = []
     for msg in history:
-        if include_system_prompts:
-            prepped.append(msg)
-        else:
+        parts = msg.parts
+        if not include_system_prompts:
             # remove only the system parts, keep any other parts (like user-prompt)
-            new_parts = [p for p in msg.parts if not isinstance(p, SystemPromptPart)]
-            if new_parts:
-                m2 = deepcopy(msg)
-                m2.parts = new_parts
-                prepped.append(m2)
+            parts = [p for p in parts if not isinstance(p, SystemPromptPart)]
+            if not parts:
+                continue
 
-    # 2. Split into "turns" at each user message
-    turns: List[List[ModelMessage]] = []
-    current: List[ModelMessage] = []
-    for msg in prepped:
-        is_user = any(getattr(p, "part_kind", "") == "user-prompt" for p in msg.parts)
-        if is_user and current:
-            turns.append(current)
-            current = [msg]
-        else:
-            current.append(msg)
-    if current:
-        turns.append(current)
+        is_user = any(getattr(p, "part_kind", "") == "user-prompt" for p in parts)
+        if is_user or not turns:
+            turns.append(([], set(), set()))
+        turn_messages, calls, returns = turns[-1]
+        turn_messages.append((msg, parts))
+        for p in parts:
+            kind = getattr(p, "part_kind", "")
+            if kind == "tool-call":
+                calls.add(p.tool_call_id)
+            elif kind == "tool-return":
+                returns.add(p.tool_call_id)
 
-    # 3. Within each turn, optionally strip unpaired tool calls/returns and drop empty parts
+    # 2. Within each turn, optionally strip unpaired tool calls/returns and drop
+    #    empty parts, counting tokens and spotting the system turn as we go
     clean_turns: List[List[ModelMessage]] = []
-    for turn in turns:
-        calls = {p.tool_call_id for m in turn for p in m.parts
-                 if getattr(p, "part_kind", "") == "tool-call"}
-        returns = {p.tool_call_id for m in turn for p in m.parts
-                   if getattr(p, "part_kind", "") == "tool-return"}
+    turn_tokens: List[int] = []
+    system_turn_idx = None
+    for turn_messages, calls, returns in turns:
         good_ids = calls & returns
-
         filtered: List[ModelMessage] = []
-        for m in turn:
+        tokens = 0
+        has_system_part = False
+        for m, parts in turn_messages:
             kept = []
-            for p in m.parts:
+            for p in parts:
                 # drop any part with an empty 'content' attribute
                 if hasattr(p, "content") and not getattr(p, "content"):
                     continue
@@ -228,66 +350,34 @@ def trim_history(
                     if not include_tool_calls or p.tool_call_id not in good_ids:
                         continue
                 kept.append(p)
+                tokens += count_tokens_for_part(p)
+                has_system_part = has_system_part or isinstance(p, SystemPromptPart)
             if kept:
-                m2 = deepcopy(m)
-                m2.parts = kept
-                filtered.append(m2)
+                filtered.append(_with_parts(m, kept))
         if filtered:
+            if include_system_prompts and has_system_part and system_turn_idx is None:
+                system_turn_idx = len(clean_turns)
             clean_turns.append(filtered)
+            turn_tokens.append(tokens)
 
-    # 4. Compute token-count per turn
-    turn_tokens = [
-        sum(count_tokens_for_part(p) for m in t for p in m.parts)
-        for t in clean_turns
-    ]
-
-    # 5. Identify system turn and calculate its token usage
+    # 3. Set aside the first turn with system prompt parts and its token usage
     system_turn = None
-    system_turn_tokens = 0
-    
-    if include_system_prompts:
-        # Find the first turn with system prompt parts
-        for i, turn in enumerate(clean_turns):
-            # First, check if this turn actually has system prompt parts
-            has_system_part = any(
-                isinstance(p, SystemPromptPart) 
-                for m in turn 
-                for p in m.parts
-            )
-            if has_system_part:
-                system_turn = turn
-                system_turn_tokens = turn_tokens[i]
-                # Remove this turn from clean_turns and turn_tokens
-                clean_turns = clean_turns[:i] + clean_turns[i+1:]
-                turn_tokens = turn_tokens[:i] + turn_tokens[i+1:]
-                break
-    
-    # 6. Greedily pick most-recent turns until we hit max_tokens
     remaining_tokens = max_tokens
-    
-    # Reduce remaining tokens if we have a system turn to include
-    if system_turn is not None:
-        remaining_tokens -= system_turn_tokens
-        # Make sure we don't go negative
-        remaining_tokens = max(0, remaining_tokens)
-    
-    # Select recent turns that fit in remaining token budget
+    if system_turn_idx is not None:
+        system_turn = clean_turns.pop(system_turn_idx)
+        remaining_tokens = max(0, remaining_tokens - turn_tokens.pop(system_turn_idx))
+
+    # 4. Greedily pick most-recent turns until we hit max_tokens
     selected_turns = []
     total_tokens = 0
-    
     for turn, tk in zip(reversed(clean_turns), reversed(turn_tokens)):
-        if total_tokens + tk <= remaining_tokens:
-            selected_turns.insert(0, turn)
-            total_tokens += tk
-        else:
+        if total_tokens + tk > remaining_tokens:
             break
-    
-    # 7. Combine system turn (if any) with selected recent turns
-    final_turns = []
-    if system_turn is not None:
-        final_turns.append(system_turn)
+        selected_turns.append(turn)
+        total_tokens += tk
+    selected_turns.reverse()
+
+    # 5. Combine system turn (if any) with selected recent turns and flatten
+    final_turns = [system_turn] if system_turn is not None else []
     final_turns.extend(selected_turns)
-    
-    # 8. Flatten into a single list
-    trimmed = [msg for turn in final_turns for msg in turn if msg.parts]
-    return trimmed
\ No newline at end of file
+    return [msg for turn in final_turns for msg in turn]
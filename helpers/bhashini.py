@@ -0,0 +1,122 @@
+"""
+Shared async client for the Bhashini (Dhruva) inference pipeline.
+
+ASR, audio language detection and TTS all post `pipelineTasks` requests to
+the same endpoint. They share one pooled `httpx.AsyncClient`, so calls no
+longer block the event loop and connections (and their TLS sessions) are
+reused across requests.
+
+Transient failures (timeouts, connection errors, 429 and 5xx responses)
+are retried up to `BHASHINI_MAX_RETRIES` times with exponential backoff and
+jitter. Other errors are raised immediately.
+
+The client is created in the FastAPI lifespan (`start_client`) and closed on
+shutdown (`close_client`); outside the app it is created lazily.
+"""
+import asyncio
+import os
+import random
+from typing import Any, Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from helpers.utils import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+BHASHINI_PIPELINE_URL = os.getenv(
+    "BHASHINI_PIPELINE_URL", "https://dhruva-api.bhashini.gov.in/services/inference/pipeline"
+)
+BHASHINI_TIMEOUT = float(os.getenv("BHASHINI_TIMEOUT", "30"))
+BHASHINI_CONNECT_TIMEOUT = float(os.getenv("BHASHINI_CONNECT_TIMEOUT", "5"))
+BHASHINI_MAX_RETRIES = int(os.getenv("BHASHINI_MAX_RETRIES", "2"))
+BHASHINI_RETRY_BACKOFF = float(os.getenv("BHASHINI_RETRY_BACKOFF", "0.5"))
+BHASHINI_MAX_CONNECTIONS = int(os.getenv("BHASHINI_MAX_CONNECTIONS", "50"))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=BHASHINI_MAX_CONNECTIONS,
+            max_keepalive_connections=BHASHINI_MAX_CONNECTIONS,
+            keepalive_expiry=30.0,
+        ),
+        timeout=httpx.Timeout(BHASHINI_TIMEOUT, connect=BHASHINI_CONNECT_TIMEOUT),
+    )
+
+
+async def start_client() -> httpx.AsyncClient:
+    """Create the shared client (called from the app lifespan)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+        logger.info(f"Bhashini HTTP client started (max connections: {BHASHINI_MAX_CONNECTIONS})")
+    return _client
+
+
+async def close_client():
+    """Close the shared client and its connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it if the lifespan did not."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _create_client()
+    return _client
+
+
+def _backoff(attempt: int) -> float:
+    return BHASHINI_RETRY_BACKOFF * (2 ** attempt) * random.uniform(0.5, 1.5)
+
+
+async def run_pipeline(
+    pipeline_tasks: List[Dict[str, Any]],
+    input_data: Dict[str, Any],
+    timeout: Optional[httpx.Timeout] = None,
+) -> Dict[str, Any]:
+    """Run a Bhashini inference pipeline.
+
+    Args:
+        pipeline_tasks: The `pipelineTasks` of the request.
+        input_data: The `inputData` of the request.
+        timeout: Overrides the client's timeout for this request.
+
+    Returns:
+        Dict[str, Any]: The response JSON.
+
+    Raises:
+        httpx.HTTPStatusError: If Bhashini answered with an error status.
+        httpx.HTTPError: If the request failed after all retries.
+    """
+    headers = {
+        "Accept": "*/*",
+        "Authorization": os.getenv("MEITY_API_KEY_VALUE") or "",
+    }
+    payload = {"pipelineTasks": pipeline_tasks, "inputData": input_data}
+    kwargs = {"timeout": timeout} if timeout is not None else {}
+    task_types = ",".join(task["taskType"] for task in pipeline_tasks)
+
+    for attempt in range(BHASHINI_MAX_RETRIES + 1):
+        try:
+            response = await get_client().post(BHASHINI_PIPELINE_URL, headers=headers, json=payload, **kwargs)
+            if response.status_code not in RETRY_STATUS_CODES or attempt == BHASHINI_MAX_RETRIES:
+                response.raise_for_status()
+                return response.json()
+            logger.warning(f"Bhashini {task_types} returned {response.status_code}, retrying")
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            if attempt == BHASHINI_MAX_RETRIES:
+                raise
+            logger.warning(f"Bhashini {task_types} request failed ({e!r}), retrying")
+        await asyncio.sleep(_backoff(attempt))
@@ -1,9 +1,9 @@
+import asyncio
 import os
 import base64
-import requests
-import json
 from dotenv import load_dotenv
 from io import BytesIO
+from helpers.bhashini import run_pipeline
 
 load_dotenv()
 
@@ -33,7 +33,7 @@ def convert_audio_to_base64(filepath: str) -> str:
     
 
 
-def transcribe_bhashini(audio_base64: str, source_lang='mr'):
+async def transcribe_bhashini(audio_base64: str, source_lang='mr'):
     """
     Transcribes an audio file using the Bhashini service.
 
@@ -42,17 +42,12 @@ def transcribe_bhashini(audio_base64: str, source_lang='mr'):
 
     Returns:
     str: The transcribed text if the request is successful.
-    None: If the request fails, it returns None and prints an error message.
+
+    Raises:
+    httpx.HTTPError: If the request fails.
     """   
-    url = 'https://dhruva-api.bhashini.gov.in/services/inference/pipeline'
-    headers = {
-        'Accept': '*/*',
-        'User-Agent': 'Thunder Client (https://www.thunderclient.com)',
-        'Authorization': os.getenv('MEITY_API_KEY_VALUE'),
-        'Content-Type': 'application/json'
-    }
-    data = {
-        "pipelineTasks": [
+    response_json = await run_pipeline(
+        [
             {
                 "taskType": "asr",
                 "config": {
@@ -66,34 +61,28 @@ def transcribe_bhashini(audio_base64: str, source_lang='mr'):
                 }
             }
         ],
-        "inputData": {
+        {
             "audio": [
                 {
                     "audioContent": audio_base64
                 }
             ]
-        }
-    }    
-    response = requests.post(url, headers=headers, data=json.dumps(data))
-    response.raise_for_status()
-    response_json = response.json()
+        },
+    )
     return response_json['pipelineResponse'][0]['output'][0]['source']
 
-def detect_audio_language_bhashini(audio_base64: str):
+async def detect_audio_language_bhashini(audio_base64: str):
     """
     Detects the language of an audio file using the Bhashini API.
     
     Returns:
     str: The detected language code if the request is successful.
-    str: An error message if the request fails.
+
+    Raises:
+    httpx.HTTPError: If the request fails.
     """
-    url = 'https://dhruva-api.bhashini.gov.in/services/inference/pipeline'
-    headers = {
-        'Accept': '*/*',
-        'Authorization': os.getenv('MEITY_API_KEY_VALUE'),
-    }
-    data = {
-        "pipelineTasks": [
+    response_json = await run_pipeline(
+        [
             {
                 "taskType": "audio-lang-detection",
                 "config": {
@@ -105,15 +94,63 @@ def detect_audio_language_bhashini(audio_base64: str):
                 }
             }
         ],
-        "inputData": {
+        {
             "audio": [{"audioContent": audio_base64}]
-        }
-    }
-
-    response = requests.post(url, headers=headers, json=data)
-    response.raise_for_status()
-    response_json = response.json()
+        },
+    )
     detected_language_code = response_json['pipelineResponse'][0]['output'][0]['langPrediction'][0]['langCode']
 
     # NOTE: Keeping only English and Marathi for now
-    return 'en' if detected_language_code == 'en' else 'mr'
\ No newline at end of file
+    return 'en' if detected_language_code == 'en' else 'mr'
+
+# Languages transcribed speculatively while the audio language is detected.
+# Each one is an extra Bhashini ASR call per request (billed even when it is
+# discarded), so speculation is off unless configured: "mr" saves a
+# round-trip for Marathi audio at one extra call for English audio, "mr,en"
+# saves it always at one extra call for every request.
+SPECULATIVE_LANGUAGES = [
+    lang.strip() for lang in os.getenv("TRANSCRIBE_SPECULATIVE_LANGUAGES", "").split(",") if lang.strip()
+]
+
+async def detect_and_transcribe_bhashini(audio_base64: str, speculative_languages=None):
+    """
+    Detects the language of an audio file and transcribes it.
+
+    By default the language is detected first and then transcribed (two
+    Bhashini calls, two round-trips). ASR for each of the speculative
+    languages instead runs in parallel with language detection; the
+    transcription in the detected language is kept and the others are
+    cancelled, so the result takes one round-trip instead of two, at the
+    cost of one more ASR call per speculative language that was not spoken.
+    If the detected language was not among them, it is transcribed afterwards.
+
+    Parameters:
+    speculative_languages (list): Languages to transcribe speculatively.
+        Defaults to TRANSCRIBE_SPECULATIVE_LANGUAGES (none).
+
+    Returns:
+    tuple: (language code, transcribed text).
+
+    Raises:
+    httpx.HTTPError: If a request fails.
+    """
+    if speculative_languages is None:
+        speculative_languages = SPECULATIVE_LANGUAGES
+    asr_tasks = {
+        lang: asyncio.create_task(transcribe_bhashini(audio_base64, lang))
+        for lang in speculative_languages
+    }
+    for task in asr_tasks.values():
+        # Discarded speculative results may be errors; mark them retrieved
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    try:
+        lang_code = await detect_audio_language_bhashini(audio_base64)
+        for lang, task in asr_tasks.items():
+            if lang != lang_code:
+                task.cancel()
+        if lang_code in asr_tasks:
+            return lang_code, await asr_tasks[lang_code]
+        return lang_code, await transcribe_bhashini(audio_base64, lang_code)
+    finally:
+        for task in asr_tasks.values():
+            task.cancel()
@@ -1,19 +1,27 @@
-import os
+import asyncio
 import base64
-import requests
-from dotenv import load_dotenv
-
-load_dotenv()
-
-def text_to_speech_bhashini(text, source_lang='mr', gender='female', sampling_rate=8000):
-    url = 'https://dhruva-api.bhashini.gov.in/services/inference/pipeline'
-    headers = {
-        'Accept': '*/*',
-        'Authorization': os.getenv('MEITY_API_KEY_VALUE'),
-        'Content-Type': 'application/json',
-    }
-    data = {
-        "pipelineTasks": [
+import io
+import os
+import re
+import struct
+import wave
+from typing import AsyncIterator, List
+from helpers.bhashini import run_pipeline
+from helpers.tts_cache import tts_cache, tts_cache_key
+from helpers.utils import get_logger, is_sentence_complete, split_text
+
+logger = get_logger(__name__)
+
+# Longest text synthesized in one streaming chunk (characters)
+TTS_STREAM_MAX_CHARS = int(os.getenv("TTS_STREAM_MAX_CHARS", "250"))
+# Chunks synthesized concurrently per streaming request
+TTS_STREAM_CONCURRENCY = int(os.getenv("TTS_STREAM_CONCURRENCY", "4"))
+
+_WORD = re.compile(r'\S+\s*')
+
+async def text_to_speech_bhashini(text, source_lang='mr', gender='female', sampling_rate=8000):
+    response_json = await run_pipeline(
+        [
             {
                 "taskType": "tts",
                 "config": {
@@ -26,18 +34,142 @@ def text_to_speech_bhashini(text, source_lang='mr', gender='female', sampling_ra
                 }
             }
         ],
-        "inputData": {
+        {
             "input": [
                 {
                     "source": text
                 }
             ]
-        }
-    }
-    response = requests.post(url, headers=headers, json=data)
-    assert response.status_code == 200, f"Error: {response.status_code} {response.text}"
-    response_json = response.json()
+        },
+    )
 
     audio_content = response_json['pipelineResponse'][0]['audio'][0]['audioContent']
     audio_data = base64.b64decode(audio_content)
-    return audio_data
\ No newline at end of file
+    return audio_data
+
+
+async def text_to_speech(text, source_lang='mr', gender='female', sampling_rate=8000):
+    """Synthesize speech, serving repeated text from the TTS cache."""
+    if tts_cache is None:
+        return await text_to_speech_bhashini(text, source_lang, gender=gender, sampling_rate=sampling_rate)
+    key = tts_cache_key(text, source_lang, gender, sampling_rate)
+    audio_data = await tts_cache.get(key)
+    if audio_data is None:
+        audio_data = await text_to_speech_bhashini(text, source_lang, gender=gender, sampling_rate=sampling_rate)
+        await tts_cache.put(key, audio_data)
+    return audio_data
+
+
+def _sentences(line: str) -> List[str]:
+    """Split a line into sentences, word by word, with `is_sentence_complete`."""
+    sentences, sentence = [], ""
+    for word in _WORD.findall(line):
+        sentence += word
+        if is_sentence_complete(sentence):
+            sentences.append(sentence.strip())
+            sentence = ""
+    if sentence.strip():
+        sentences.append(sentence.strip())
+    return sentences
+
+
+def split_tts_text(text: str, max_chars: int = TTS_STREAM_MAX_CHARS) -> List[str]:
+    """Split text into chunks for streaming synthesis.
+
+    Lines (see `split_text`) are kept whole when short enough; longer lines
+    are split where `helpers.utils.is_sentence_complete` sees a sentence
+    end into chunks of at most `max_chars` characters where possible.
+    Blank lines are dropped.
+
+    Args:
+        text (str): Text to split.
+        max_chars (int): Preferred maximum chunk length.
+
+    Returns:
+        list: Non-empty chunks, in order.
+    """
+    chunks = []
+    for line in split_text(text):
+        line = line.strip()
+        if not line:
+            continue
+        if len(line) <= max_chars:
+            chunks.append(line)
+            continue
+        current = ""
+        for sentence in _sentences(line):
+            if current and len(current) + 1 + len(sentence) > max_chars:
+                chunks.append(current)
+                current = sentence
+            else:
+                current = f"{current} {sentence}".strip()
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+def wav_frames(data: bytes):
+    """Return the (params, PCM frames) of a WAV file.
+
+    Raises:
+        wave.Error: If the data is not a PCM WAV file.
+    """
+    with wave.open(io.BytesIO(data)) as wav:
+        return wav.getparams(), wav.readframes(wav.getnframes())
+
+
+def wav_stream_header(params) -> bytes:
+    """PCM WAV header with unknown (maximum) lengths, for streamed audio."""
+    block_align = params.nchannels * params.sampwidth
+    return (
+        b"RIFF" + struct.pack("<I", 0xFFFFFFFF) + b"WAVE"
+        + b"fmt " + struct.pack(
+            "<IHHIIHH", 16, 1, params.nchannels, params.framerate,
+            params.framerate * block_align, block_align, params.sampwidth * 8,
+        )
+        + b"data" + struct.pack("<I", 0xFFFFFFFF)
+    )
+
+
+async def stream_text_to_speech(
+    text: str,
+    source_lang: str = 'mr',
+    gender: str = 'female',
+    sampling_rate: int = 8000,
+    concurrency: int = TTS_STREAM_CONCURRENCY,
+) -> AsyncIterator[bytes]:
+    """Synthesize text chunk by chunk and yield one WAV stream.
+
+    Chunks (see `split_tts_text`) are synthesized concurrently, at most
+    `concurrency` at a time, and their audio is yielded in text order as
+    soon as each is ready: a streaming WAV header with the first chunk, then
+    raw PCM frames. Pending syntheses are cancelled if the consumer stops.
+
+    Raises:
+        httpx.HTTPError: If a chunk cannot be synthesized.
+        wave.Error: If Bhashini did not return PCM WAV audio.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def synthesize(chunk: str) -> bytes:
+        async with semaphore:
+            return await text_to_speech(chunk, source_lang, gender=gender, sampling_rate=sampling_rate)
+
+    tasks = [asyncio.create_task(synthesize(chunk)) for chunk in split_tts_text(text)]
+    for task in tasks:
+        # Results of cancelled or abandoned chunks may be errors; mark them retrieved
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+    try:
+        stream_params = None
+        for task in tasks:
+            params, frames = wav_frames(await task)
+            if stream_params is None:
+                stream_params = params
+                yield wav_stream_header(params) + frames
+            elif params[:3] != stream_params[:3]:
+                logger.error(f"Skipping TTS chunk with audio format {params[:3]}, expected {stream_params[:3]}")
+            else:
+                yield frames
+    finally:
+        for task in tasks:
+            task.cancel()
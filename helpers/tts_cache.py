@@ -0,0 +1,308 @@
+"""
+Content-addressed cache of synthesized speech.
+
+Audio is stored under a hash of (text, language, gender, sampling rate), so
+greetings, refusals and repeated answers (or repeated sentences of streamed
+answers) are served without a Bhashini round-trip. Two tiers:
+
+* a small in-process LRU of recently used audio (`TTS_CACHE_MEMORY_BYTES`)
+* a shared store, on local disk (`TTS_CACHE_DIR`) or in S3
+  (`TTS_CACHE_S3_BUCKET`, via `get_s3_client`), kept under
+  `TTS_CACHE_MAX_BYTES` by evicting the least recently used (disk) or
+  oldest (S3) audio
+
+`TTS_CACHE_BACKEND` selects "disk" (default), "s3" or "none". Store errors
+are logged and treated as misses, so TTS keeps working without the cache.
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from helpers.utils import get_logger, get_s3_client
+
+logger = get_logger(__name__)
+
+TTS_CACHE_BACKEND = os.getenv("TTS_CACHE_BACKEND", "disk").lower()
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "/tmp/tts-cache")
+TTS_CACHE_S3_BUCKET = os.getenv("TTS_CACHE_S3_BUCKET")
+TTS_CACHE_S3_PREFIX = os.getenv("TTS_CACHE_S3_PREFIX", "tts-cache/")
+TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+TTS_CACHE_MEMORY_BYTES = int(os.getenv("TTS_CACHE_MEMORY_BYTES", str(16 * 1024 * 1024)))
+# Bump to invalidate all cached audio (e.g. when the TTS voices change)
+TTS_CACHE_VERSION = "1"
+
+# Evict down to this fraction of the limit, so eviction runs infrequently
+EVICT_TO_FRACTION = 0.9
+# Every worker of a host writes to the same directory: each one re-reads its
+# total size at least this often (seconds / own writes), so writes of the
+# other workers count towards TTS_CACHE_MAX_BYTES too
+DISK_RESCAN_INTERVAL = 60
+DISK_RESCAN_WRITES = 100
+
+
+def tts_cache_key(text: str, lang_code: str, gender: str, sampling_rate: int) -> str:
+    """Content hash identifying the audio for a TTS request."""
+    text = unicodedata.normalize("NFC", text).strip()
+    material = "\x00".join([TTS_CACHE_VERSION, lang_code, gender, str(sampling_rate), text])
+    return hashlib.blake2b(material.encode("utf-8", "surrogatepass"), digest_size=20).hexdigest()
+
+
+class DiskAudioStore:
+    """Audio files in a directory shared by the workers of a host.
+
+    Recency is tracked with file modification times, which are refreshed on
+    every hit; the least recently used files are deleted when the directory
+    grows over `max_bytes`. Each worker keeps an estimate of the directory
+    size, updated on its own writes and re-read from the directory every
+    `DISK_RESCAN_INTERVAL` seconds or `DISK_RESCAN_WRITES` writes.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        # Writes run in threads (asyncio.to_thread)
+        self._lock = threading.Lock()
+        self._total_bytes = self._scan_total()
+        self._scanned_at = time.monotonic()
+        self._writes_since_scan = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.wav")
+
+    def _scan(self):
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue  # being written by another worker
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue  # evicted by another worker
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_total(self) -> int:
+        return sum(size for _, size, _ in self._scan())
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a uniquely named file (threads and workers may store the same
+        # audio at once), then rename, so readers never see a partial file
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), suffix=".tmp", delete=False) as f:
+            f.write(data)
+        try:
+            replaced = os.stat(path).st_size
+        except FileNotFoundError:
+            replaced = 0
+        try:
+            os.replace(f.name, path)
+        except OSError:
+            os.remove(f.name)
+            raise
+        with self._lock:
+            self._total_bytes += len(data) - replaced
+            self._writes_since_scan += 1
+            rescan = (
+                self._writes_since_scan >= DISK_RESCAN_WRITES
+                or time.monotonic() - self._scanned_at >= DISK_RESCAN_INTERVAL
+            )
+        if rescan:
+            total = self._scan_total()
+            with self._lock:
+                self._total_bytes = total
+                self._scanned_at = time.monotonic()
+                self._writes_since_scan = 0
+        if self._total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> int:
+        """Delete least recently used files until under the limit. Returns files deleted."""
+        entries = sorted(self._scan())
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * EVICT_TO_FRACTION
+        deleted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                deleted += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        with self._lock:
+            self._total_bytes = total
+            self._scanned_at = time.monotonic()
+            self._writes_since_scan = 0
+        return deleted
+
+
+class S3AudioStore:
+    """Audio objects under a prefix of an S3 bucket, shared by all pods.
+
+    S3 does not track reads, so eviction deletes the oldest objects once the
+    prefix grows over `max_bytes`. Listing the prefix is slow, so eviction
+    only runs after roughly 10% of `max_bytes` has been written by this
+    worker.
+    """
+
+    def __init__(self, bucket: str, prefix: str, max_bytes: int):
+        self.bucket = bucket
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.client = get_s3_client()
+        self._written_since_evict = 0
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}.wav"
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(key))
+        except self.client.exceptions.NoSuchKey:
+            return None
+        return response["Body"].read()
+
+    def put(self, key: str, data: bytes):
+        self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data, ContentType="audio/wav")
+        self._written_since_evict += len(data)
+        if self._written_since_evict > self.max_bytes * (1 - EVICT_TO_FRACTION):
+            self._written_since_evict = 0
+            self.evict()
+
+    def evict(self) -> int:
+        """Delete the oldest objects until under the limit. Returns objects deleted."""
+        objects = []
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=self.prefix):
+            objects.extend(page.get("Contents", []))
+        objects.sort(key=lambda obj: obj["LastModified"])
+        total = sum(obj["Size"] for obj in objects)
+        target = self.max_bytes * EVICT_TO_FRACTION
+        doomed = []
+        for obj in objects:
+            if total <= target:
+                break
+            doomed.append({"Key": obj["Key"]})
+            total -= obj["Size"]
+        # delete_objects takes at most 1000 keys per call
+        for start in range(0, len(doomed), 1000):
+            self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": doomed[start:start + 1000]})
+        return len(doomed)
+
+
+class TTSCache:
+    """In-process LRU in front of an optional shared audio store.
+
+    Args:
+        store: A `DiskAudioStore`, `S3AudioStore` or None (memory only).
+        memory_bytes: Size of the in-process LRU.
+    """
+
+    def __init__(self, store=None, memory_bytes: int = TTS_CACHE_MEMORY_BYTES):
+        self.store = store
+        self.memory_bytes = memory_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        self.memory_hits = 0
+        self.store_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.bytes_served = 0
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old)
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            self.bytes_served += len(data)
+            return data
+        if self.store is not None:
+            try:
+                data = await asyncio.to_thread(self.store.get, key)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"TTS cache read failed for {key}: {e}")
+            if data is not None:
+                self._remember(key, data)
+                self.store_hits += 1
+                self.bytes_served += len(data)
+                return data
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, data: bytes):
+        self._remember(key, data)
+        if self.store is not None:
+            try:
+                await asyncio.to_thread(self.store.put, key, data)
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"TTS cache write failed for {key}: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.store_hits + self.misses
+        return {
+            "backend": type(self.store).__name__ if self.store is not None else "memory",
+            "memory_hits": self.memory_hits,
+            "store_hits": self.store_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.store_hits) / lookups, 4) if lookups else 0.0,
+            "errors": self.errors,
+            "bytes_served": self.bytes_served,
+            "memory_bytes": self._memory_size,
+        }
+
+
+def create_tts_cache() -> Optional[TTSCache]:
+    """Build the cache configured by the TTS_CACHE_* environment variables."""
+    if TTS_CACHE_BACKEND == "none":
+        return None
+    store = None
+    try:
+        if TTS_CACHE_BACKEND == "s3":
+            if not TTS_CACHE_S3_BUCKET:
+                raise ValueError("TTS_CACHE_S3_BUCKET is not set")
+            store = S3AudioStore(TTS_CACHE_S3_BUCKET, TTS_CACHE_S3_PREFIX, TTS_CACHE_MAX_BYTES)
+        else:
+            store = DiskAudioStore(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES)
+    except Exception as e:
+        logger.warning(f"TTS cache store unavailable ({e}), caching audio in memory only")
+    return TTSCache(store)
+
+
+tts_cache = create_tts_cache()
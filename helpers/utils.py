@@ -2,7 +2,11 @@
 
 import os
 import re
-from typing import List, Dict
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Iterable, List, Dict, Optional
 import logging
 from dotenv import load_dotenv
 import base64
@@ -54,17 +58,78 @@ def get_logger(name):
     logger.addHandler(ch)
     return logger
 
+# Upper bound on the number of memoized token counts kept per process
+TOKEN_COUNT_CACHE_SIZE = 20_000
+
+_token_counts: "OrderedDict[str, int]" = OrderedDict()
+_token_counts_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_encoder(encoding_name: str = 'cl100k_base') -> tiktoken.Encoding:
+    """Get the tiktoken encoder, loaded once per process."""
+    return tiktoken.get_encoding(encoding_name)
+
+
+def token_cache_key(doc: str) -> str:
+    """Content hash used to memoize the token count of a string."""
+    return hashlib.blake2b(doc.encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+
+
+def _remember_token_count(key: str, count: int) -> None:
+    with _token_counts_lock:
+        _token_counts[key] = count
+        _token_counts.move_to_end(key)
+        while len(_token_counts) > TOKEN_COUNT_CACHE_SIZE:
+            _token_counts.popitem(last=False)
+
+
+def seed_token_counts(counts: Dict[str, int]) -> None:
+    """Add known token counts (e.g. persisted with a conversation) to the memo.
+
+    Args:
+        counts (dict): Mapping of `token_cache_key` to token count.
+    """
+    for key, count in counts.items():
+        _remember_token_count(key, count)
+
+
 def count_tokens_str(doc: str) -> int:
     """Count tokens in a string.
 
+    Counts are memoized by content hash in a bounded LRU, so repeated
+    content (e.g. conversation history on every turn) is only encoded once.
+
     Args:
         doc (str): String to count tokens for.
     Returns:
         int: number of tokens in the string
 
     """
-    encoder = tiktoken.get_encoding('cl100k_base')
-    return len(encoder.encode(doc, disallowed_special=()))
+    return _count_tokens(token_cache_key(doc), doc)
+
+
+def _count_tokens(key: str, doc: str) -> int:
+    with _token_counts_lock:
+        count = _token_counts.get(key)
+        if count is not None:
+            _token_counts.move_to_end(key)
+            return count
+    count = len(get_encoder().encode(doc, disallowed_special=()))
+    _remember_token_count(key, count)
+    return count
+
+
+def _token_text_for_part(part) -> Optional[str]:
+    """Get the text whose tokens represent a message part, if any."""
+    if hasattr(part, 'content'):
+        return str(part.content)
+    elif hasattr(part, 'part_kind') and part.part_kind == 'tool-call':
+        # For tool calls, create a string representation of the tool name and args
+        return f"tool: {part.tool_name}, args: {json.dumps(part.args)}"
+    else:
+        # Unknown part types do not count towards the token budget
+        return None
 
 
 def count_tokens_for_part(part) -> int:
@@ -75,20 +140,29 @@ def count_tokens_for_part(part) -> int:
     Returns:
         int: number of tokens in the part
     """
-    if hasattr(part, 'content'):
-        return count_tokens_str(str(part.content))
-    elif hasattr(part, 'part_kind') and part.part_kind == 'tool-call':
-        # For tool calls, create a string representation of the tool name and args
-        tool_str = f"tool: {part.tool_name}, args: {json.dumps(part.args)}"
-        return count_tokens_str(tool_str)
-    elif hasattr(part, 'part_kind') and part.part_kind == 'tool-return':
-        # For tool returns, use the result content
-        return count_tokens_str(str(part.content))
-    else:
-        # For unknown part types, return 0 tokens
-        return 0
+    text = _token_text_for_part(part)
+    return count_tokens_str(text) if text is not None else 0
+
+
+def token_counts_for_parts(parts: Iterable) -> Dict[str, int]:
+    """Token counts of message parts keyed by `token_cache_key`, for persisting.
+
+    Args:
+        parts: Message parts (TextPart, ToolCallPart, etc.)
+    Returns:
+        dict: Mapping of content hash to token count
+    """
+    counts = {}
+    for part in parts:
+        text = _token_text_for_part(part)
+        if text is not None:
+            key = token_cache_key(text)
+            counts[key] = _count_tokens(key, text)
+    return counts
 
 
+# Sentence terminators, including the Devanagari danda
+SENTENCE_TERMINATORS = ('.', '!', '?', '।')
 
 def is_sentence_complete(text: str) -> bool:
     """Check if the text is a complete sentence.
@@ -97,10 +171,10 @@ def is_sentence_complete(text: str) -> bool:
         text (str): Text to check.
 
     Returns:
-        bool: True if the text is a complete sentence, False otherwise.
+        bool: True if the text ends a line, or ends with a sentence
+            terminator (., !, ?, ।) possibly followed by whitespace.
     """
-    # Check if text ends with a sentence terminator (., !, ?) possibly followed by whitespace or newlines
-    return text.endswith('\n')
+    return text.endswith('\n') or text.rstrip().endswith(SENTENCE_TERMINATORS)
 
 def split_text(text: str) -> List[str]:
     """Split text into chunks based on newlines.
@@ -12,7 +12,18 @@ from fastapi.responses import JSONResponse
 from app.config import settings
 from app.routers import chat_router, suggestions_router, transcribe_router, tts_router
 from app.routers.health import router as health_router
-from app.core.cache import cache
+from app.routers.metrics import router as metrics_router
+from app.core.cache import USE_REDIS, cache
+from app.core.semantic_cache import semantic_cache
+from agents.tools.beckn import close_client, start_client
+from agents.tools.geocode_cache import geocode_cache
+from agents.moderation_cache import moderation_cache
+from agents.tools.mandi import mandi_today_refresh
+from agents.tools.nominatim import nominatim
+from agents.tools.scheme import scheme_catalog_refresh
+from agents.tools.singleflight import flights
+from agents.tools.warehouse import warehouse_snapshot_refresh
+from helpers import bhashini
 from helpers.utils import get_logger
 
 logger = get_logger(__name__)
@@ -36,6 +47,20 @@ async def lifespan(app: FastAPI):
 
     import asyncio
     asyncio.create_task(check_cache())
+    await cache.start_invalidation_listener()
+    await start_client()
+    await bhashini.start_client()
+    if USE_REDIS and settings.single_flight_distributed:
+        flights.use_redis(cache.client, prefix=settings.redis_key_prefix)
+    if USE_REDIS:
+        geocode_cache.use_redis(cache.client, prefix=settings.redis_key_prefix)
+        moderation_cache.use_redis(cache.client, prefix=settings.redis_key_prefix)
+    warehouse_snapshot_refresh.start()
+    scheme_catalog_refresh.start()
+    mandi_today_refresh.start()
+    if semantic_cache is not None:
+        # Load the embedding model now rather than on the first chat request
+        await semantic_cache.load_embedder()
     
     logger.info("✅ Application startup complete")
     
@@ -43,6 +68,13 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down MahaVistaar AI API...")
+    await cache.stop_invalidation_listener()
+    await warehouse_snapshot_refresh.stop()
+    await scheme_catalog_refresh.stop()
+    await mandi_today_refresh.stop()
+    await close_client()
+    await nominatim.aclose()
+    await bhashini.close_client()
     logger.info("✅ Application shutdown complete")
 
 def create_app() -> FastAPI:
@@ -73,6 +105,7 @@ def create_app() -> FastAPI:
     app.include_router(transcribe_router, prefix=settings.api_prefix)
     app.include_router(tts_router, prefix=settings.api_prefix)
     app.include_router(health_router, prefix=settings.api_prefix)
+    app.include_router(metrics_router, prefix=settings.api_prefix)
     
     @app.get("/")
     async def root():
@@ -0,0 +1,125 @@
+"""
+Throughput benchmark of the Bhashini helpers against a local stub server.
+
+Runs concurrent /transcribe-style (language detection + ASR) and /tts-style
+calls on one event loop, the way concurrent requests to one worker do, and
+compares:
+
+* blocking: a fresh `requests.post` per pipeline call inside the event loop
+  (previous behaviour), which serializes every call
+* async-serial: the async helpers, detecting the language before ASR
+* async: the helpers sharing one pooled `httpx.AsyncClient` and running
+  ASR for mr and en speculatively alongside language detection
+  (TRANSCRIBE_SPECULATIVE_LANGUAGES=mr,en, three Bhashini calls per request)
+
+With --failure-rate > 0 the stub answers some requests with 503 and the
+async helpers retry them.
+
+Usage (from the repository root):
+    python scripts/benchmark_bhashini.py [--requests 200] [--concurrency 50] [--latency-ms 300]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from helpers import bhashini
+from helpers.transcription import detect_and_transcribe_bhashini, detect_audio_language_bhashini, transcribe_bhashini
+from helpers.tts import text_to_speech_bhashini
+from stub_bhashini import SILENCE, StubServer
+
+TEXT = "कांद्याचे आजचे बाजारभाव नाशिक बाजार समितीत स्थिर आहेत."
+
+
+async def serial_transcribe(audio: str):
+    lang_code = await detect_audio_language_bhashini(audio)
+    return await transcribe_bhashini(audio, lang_code)
+
+
+async def async_serial_call(i: int):
+    if i % 2:
+        await text_to_speech_bhashini(TEXT)
+    else:
+        await serial_transcribe(SILENCE)
+
+
+async def async_call(i: int):
+    if i % 2:
+        await text_to_speech_bhashini(TEXT)
+    else:
+        await detect_and_transcribe_bhashini(SILENCE, speculative_languages=["mr", "en"])
+
+
+async def blocking_call(i: int):
+    tasks = [[{"taskType": "tts"}]] if i % 2 else [[{"taskType": "audio-lang-detection"}], [{"taskType": "asr"}]]
+    for pipeline_tasks in tasks:
+        input_data = {"input": [{"source": TEXT}]} if i % 2 else {"audio": [{"audioContent": SILENCE}]}
+        response = requests.post(
+            bhashini.BHASHINI_PIPELINE_URL,
+            json={"pipelineTasks": pipeline_tasks, "inputData": input_data},
+            timeout=(5, 30),
+        )
+        response.raise_for_status()
+
+
+async def run(call, n_requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await call(i)
+            except Exception:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95) - 1], errors
+
+
+async def main_async(args):
+    await bhashini.start_client()
+    try:
+        print(f"{'mode':<13} {'requests':>9} {'wall s':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        modes = [
+            ("blocking", blocking_call, args.blocking_requests),
+            ("async-serial", async_serial_call, args.requests),
+            ("async", async_call, args.requests),
+        ]
+        for name, call, n_requests in modes:
+            elapsed, p50, p95, errors = await run(call, n_requests, args.concurrency)
+            print(f"{name:<13} {n_requests:>9} {elapsed:>8.2f} {n_requests / elapsed:>8.1f} {p50:>8.1f} {p95:>8.1f} {errors:>7}")
+    finally:
+        await bhashini.close_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--blocking-requests", type=int, default=20, help="the blocking mode is slow, keep this small")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    with StubServer(args.port, args.latency_ms, args.failure_rate) as stub:
+        bhashini.BHASHINI_PIPELINE_URL = stub.url
+        asyncio.run(main_async(args))
+        print(f"stub served {stub.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
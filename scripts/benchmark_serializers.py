@@ -0,0 +1,81 @@
+"""
+Micro-benchmark of the cache serializers.
+
+Compares aiocache's JsonSerializer with the `json`, `orjson` and
+`msgpack_zstd` codecs of VersionedSerializer on realistic payloads: message
+histories (as stored per turn and as a whole session) and tool outputs.
+
+Usage (from the repository root):
+    python scripts/benchmark_serializers.py [--repeat 200]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("USE_REDIS", "false")
+
+from aiocache.serializers import JsonSerializer
+from pydantic_core import to_jsonable_python
+
+from app.core.serializers import CODECS, VersionedSerializer
+from benchmark_trim_history import build_history
+
+
+def tool_output(rows: int) -> str:
+    """A mandi/warehouse style text block, like the tools return."""
+    lines = ["> Mandi Prices", "Responses:"]
+    for i in range(rows):
+        lines.append(f"  Market: APMC Market {i}, Nashik | Commodity: Onion | Variety: Red")
+        lines.append(f"    Min: {1800 + i} INR/quintal, Max: {2400 + i} INR/quintal, Modal: {2100 + i} INR/quintal")
+    return "\n".join(lines)
+
+
+def payloads():
+    return {
+        "turn (4 msgs)": to_jsonable_python(build_history(4)),
+        "history 50 msgs": to_jsonable_python(build_history(50)),
+        "history 1000 msgs": to_jsonable_python(build_history(1000)),
+        "tool output 200 rows": tool_output(200),
+        "suggestions": ["What is the price of onion today?", "कांद्याचा भाव काय आहे?", "Will it rain tomorrow?"],
+    }
+
+
+def measure(serializer, value, repeat):
+    encoded = serializer.dumps(value)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        serializer.dumps(value)
+    encode_us = (time.perf_counter() - start) / repeat * 1e6
+    start = time.perf_counter()
+    for _ in range(repeat):
+        decoded = serializer.loads(encoded)
+    decode_us = (time.perf_counter() - start) / repeat * 1e6
+    assert decoded == value
+    size = len(encoded.encode("utf-8") if isinstance(encoded, str) else encoded)
+    return encode_us, decode_us, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    serializers = {"JsonSerializer": JsonSerializer()}
+    for codec, (_, available) in CODECS.items():
+        if available:
+            serializers[codec] = VersionedSerializer(codec)
+        else:
+            print(f"skipping {codec}: package not installed")
+
+    print(f"{'payload':<22} {'serializer':<15} {'encode us':>10} {'decode us':>10} {'bytes':>10}")
+    for name, value in payloads().items():
+        repeat = max(1, args.repeat // 20) if "1000" in name else args.repeat
+        for serializer_name, serializer in serializers.items():
+            encode_us, decode_us, size = measure(serializer, value, repeat)
+            print(f"{name:<22} {serializer_name:<15} {encode_us:>10.1f} {decode_us:>10.1f} {size:>10}")
+
+
+if __name__ == "__main__":
+    main()
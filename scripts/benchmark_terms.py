@@ -0,0 +1,121 @@
+"""
+Benchmark glossary lookup: linear scan vs. n-gram shortlist index.
+
+Grows the glossary synthetically (1x, 10x, 100x) by mutating existing
+entries, checks that the indexed search returns exactly the same matches as
+a full scan, and reports per-query latency for both.
+
+Usage (from the repository root):
+    python scripts/benchmark_terms.py [--scales 1 10 100] [--queries 50]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rapidfuzz import fuzz
+
+from agents.tools.term_index import NGramIndex, union_candidates
+from agents.tools.terms import TERM_PAIRS, Language
+
+FIELDS = [language.value for language in Language]
+
+
+def mutate(text: str, rng: random.Random) -> str:
+    """Apply a couple of random character edits to text."""
+    chars = list(text)
+    for _ in range(rng.randint(1, 3)):
+        op = rng.random()
+        pos = rng.randrange(len(chars) + 1)
+        if op < 0.4 and chars:
+            chars[min(pos, len(chars) - 1)] = rng.choice(text)
+        elif op < 0.7 and len(chars) > 2:
+            del chars[min(pos, len(chars) - 1)]
+        else:
+            chars.insert(pos, rng.choice(text))
+    return "".join(chars)
+
+
+def build_columns(scale: int, rng: random.Random):
+    """Return lowercased columns with `scale` times the real glossary size."""
+    rows = [[getattr(pair, field).lower() for field in FIELDS] for pair in TERM_PAIRS]
+    grown = list(rows)
+    for _ in range(scale - 1):
+        grown.extend([mutate(value, rng) for value in row] for row in rows)
+    return {field: [row[i] for row in grown] for i, field in enumerate(FIELDS)}
+
+
+def linear_search(columns, text, threshold):
+    matches = []
+    for idx in range(len(columns[FIELDS[0]])):
+        score = max(fuzz.ratio(text, columns[field][idx]) / 100.0 for field in FIELDS)
+        if score >= threshold:
+            matches.append((idx, score))
+    matches.sort(key=lambda x: x[1], reverse=True)
+    return matches
+
+
+def indexed_search(columns, indexes, text, threshold):
+    matches = []
+    for idx in union_candidates(indexes, text, threshold):
+        score = max(fuzz.ratio(text, columns[field][idx]) / 100.0 for field in FIELDS)
+        if score >= threshold:
+            matches.append((int(idx), score))
+    matches.sort(key=lambda x: x[1], reverse=True)
+    return matches
+
+
+def time_queries(fn, queries):
+    timings = []
+    results = []
+    for query in queries:
+        start = time.perf_counter()
+        results.append(fn(query))
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--n", type=int, default=1, help="Character n-gram size of the index")
+    parser.add_argument("--skip-linear-above", type=int, default=10,
+                        help="Only time the linear scan on a query subset above this scale")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    query_rows = rng.sample(TERM_PAIRS, args.queries)
+    queries = [mutate(getattr(pair, rng.choice(FIELDS)).lower(), rng) for pair in query_rows]
+
+    print(f"{'scale':>6} {'entries':>9} {'build s':>8} {'linear ms':>10} {'index ms':>9} {'p95 ms':>7} {'scored %':>9}")
+    for scale in args.scales:
+        columns = build_columns(scale, rng)
+        size = len(columns[FIELDS[0]])
+
+        start = time.perf_counter()
+        indexes = [NGramIndex(columns[field], n=args.n) for field in FIELDS]
+        build_time = time.perf_counter() - start
+
+        linear_queries = queries if scale <= args.skip_linear_above else queries[:5]
+        linear_ms, expected = time_queries(lambda q: linear_search(columns, q, args.threshold), linear_queries)
+        index_ms, actual = time_queries(lambda q: indexed_search(columns, indexes, q, args.threshold), queries)
+
+        for query, want, got in zip(linear_queries, expected, actual):
+            assert want == got, f"Mismatch for {query!r} at scale {scale}"
+
+        scored = statistics.mean(len(union_candidates(indexes, q, args.threshold)) for q in queries) / size
+        print(
+            f"{scale:>5}x {size:>9} {build_time:>8.2f} {statistics.mean(linear_ms):>10.2f} "
+            f"{statistics.mean(index_ms):>9.2f} {sorted(index_ms)[int(len(index_ms) * 0.95) - 1]:>7.2f} "
+            f"{scored:>8.1%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
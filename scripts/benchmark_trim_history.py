@@ -0,0 +1,98 @@
+"""
+Benchmark trim_history on long conversations.
+
+Builds synthetic histories (system prompt, user prompt, tool call, tool
+return and answer per turn) and times `trim_history` as it runs on every chat
+turn:
+
+* cold: no token counts known, every part is encoded (previous behaviour)
+* warm: counts of earlier turns were persisted with the history and seeded,
+  so only the newest turn is encoded
+
+Usage (from the repository root):
+    python scripts/benchmark_trim_history.py [--sizes 50 200 1000] [--repeat 5]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("USE_REDIS", "false")
+
+from pydantic_ai.messages import (
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+
+import helpers.utils as helper_utils
+from app.utils import trim_history
+from helpers.utils import seed_token_counts, token_counts_for_parts
+
+SYSTEM_PROMPT = open("assets/prompts/agrinet_system.md", encoding="utf-8").read()
+
+
+def build_history(n_messages: int):
+    """Build a history of roughly n_messages messages."""
+    history = []
+    turn = 0
+    while len(history) < n_messages:
+        parts = [UserPromptPart(content=f"**User:** \"What is the price of cotton in mandi {turn}?\"")]
+        if turn == 0:
+            parts.insert(0, SystemPromptPart(content=SYSTEM_PROMPT))
+        call_id = f"call_{turn}"
+        history.extend([
+            ModelRequest(parts=parts),
+            ModelResponse(parts=[ToolCallPart(tool_name="mandi_prices", args={"latitude": 19.99, "longitude": 73.78, "days_back": turn % 3}, tool_call_id=call_id)]),
+            ModelRequest(parts=[ToolReturnPart(tool_name="mandi_prices", content=f"> Mandi Prices\nCotton: {6000 + turn} INR/quintal\n" * 20, tool_call_id=call_id)]),
+            ModelResponse(parts=[TextPart(content=f"Cotton is trading at {6000 + turn} INR per quintal in nearby mandis. " * 8)]),
+        ])
+        turn += 1
+    return history[:n_messages]
+
+
+def time_trim(history, repeat, prepare):
+    timings = []
+    for _ in range(repeat):
+        prepare()
+        start = time.perf_counter()
+        trim_history(history, max_tokens=60_000, include_system_prompts=True, include_tool_calls=True)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Load the encoder outside the timed region
+    helper_utils.get_encoder()
+
+    print(f"{'messages':>9} {'cold ms':>9} {'warm ms':>9} {'speedup':>8}")
+    for size in args.sizes:
+        history = build_history(size)
+        # Counts persisted for everything except the newest turn (last 4 messages)
+        persisted = token_counts_for_parts(p for m in history[:-4] for p in m.parts)
+
+        def cold():
+            helper_utils._token_counts.clear()
+
+        def warm():
+            helper_utils._token_counts.clear()
+            seed_token_counts(persisted)
+
+        cold_ms = time_trim(history, args.repeat, cold)
+        warm_ms = time_trim(history, args.repeat, warm)
+        print(f"{size:>9} {cold_ms:>9.2f} {warm_ms:>9.2f} {cold_ms / warm_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
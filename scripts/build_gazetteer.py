@@ -0,0 +1,169 @@
+"""
+Build assets/gazetteer_mh.csv from the India Post pincode directory.
+
+Download the "All India Pincode Directory" CSV (with latitude/longitude)
+from https://data.gov.in (Government Open Data License - India), then run
+from the repository root:
+    python scripts/build_gazetteer.py pincode_directory.csv
+
+The district rows already in the gazetteer are kept (they carry the current
+official names, Marathi names and common aliases). Each taluka listed in
+scripts/talukas_mh.csv is placed at its headquarters' post office; talukas
+named after their district are covered by the district row. Other head and
+sub post offices are added as towns, and branch post offices as villages.
+
+Post office coordinates are approximate, and many offices carry a
+placeholder shared with other offices. Offices without coordinates, with
+shared coordinates, outside Maharashtra or more than MAX_DISTRICT_KM from
+their district headquarters are skipped; those places are left to Nominatim.
+"""
+import argparse
+import csv
+import math
+import os
+import re
+import sys
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.tools.gazetteer import GAZETTEER_PATH, Gazetteer, Place, normalize_place
+
+TALUKAS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "talukas_mh.csv")
+FIELDS = ["name", "name_mr", "aliases", "type", "district", "latitude", "longitude"]
+STATE = "MAHARASHTRA"
+# (min_lat, max_lat, min_lon, max_lon)
+STATE_BOUNDS = (15.6, 22.1, 72.6, 80.9)
+MAX_DISTRICT_KM = 150
+# Head offices first, so a town's own post office wins over a same-named branch
+OFFICE_RANK = {"HO": 0, "PO": 1, "BO": 2}
+OFFICE_SUFFIX = re.compile(r"\s+(?:G\.?P\.?O|[HSB]\.?\s?O)\b.*$", re.IGNORECASE)
+QUALIFIER = re.compile(r"\s*\([^)]*\)")
+# Numbered offices of one town ("Ulhasnagar 5")
+OFFICE_NUMBER = re.compile(r"\s+\d+$")
+# Budruk / Khurd ("upper" / "lower") halves of a village
+VILLAGE_HALVES = {"bk": "Budruk", "kh": "Khurd"}
+
+
+def office_place_name(office_name: str) -> str:
+    """'Gadhinglaj S.O' -> 'Gadhinglaj', 'Rajura (M) S.O' -> 'Rajura', 'Ulhasnagar 5' -> 'Ulhasnagar'."""
+    name = QUALIFIER.sub("", OFFICE_SUFFIX.sub("", office_name))
+    return OFFICE_NUMBER.sub("", name).strip(" .")
+
+
+def half_alias(name: str) -> str:
+    """'Warud Bk' -> 'Warud Budruk' (empty if the name has no Bk/Kh suffix)."""
+    words = name.split()
+    full = VILLAGE_HALVES.get(words[-1].lower().rstrip(".")) if len(words) > 1 else None
+    return " ".join(words[:-1] + [full]) if full else ""
+
+
+def distance_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    dlat, dlon = math.radians(lat2 - lat1), math.radians(lon2 - lon1)
+    a = math.sin(dlat / 2) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(a))
+
+
+def read_offices(path: str, seed):
+    """Maharashtra post offices with usable coordinates, head offices first."""
+    min_lat, max_lat, min_lon, max_lon = STATE_BOUNDS
+    offices = []
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            if row["statename"].upper() != STATE:
+                continue
+            try:
+                lat, lon = float(row["latitude"]), float(row["longitude"])
+            except ValueError:
+                continue
+            if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+                continue
+            # Use the seed's (current) district name where the directory has an old one
+            district_place = seed.lookup(row["district"].title())
+            if district_place is None or district_place.type != "district":
+                continue
+            if distance_km(lat, lon, district_place.latitude, district_place.longitude) > MAX_DISTRICT_KM:
+                continue
+            name = office_place_name(row["officename"])
+            if not name or any(ch.isdigit() for ch in name):
+                continue
+            offices.append((OFFICE_RANK.get(row["officetype"], len(OFFICE_RANK)), name, district_place.district, lat, lon))
+
+    # Coordinates shared by differently named offices are a placeholder (often
+    # the division office's), not where either office is
+    names_at = defaultdict(set)
+    for _, name, _, lat, lon in offices:
+        names_at[(round(lat, 4), round(lon, 4))].add(normalize_place(name))
+    offices = [office for office in offices if len(names_at[(round(office[3], 4), round(office[4], 4))]) == 1]
+    offices.sort(key=lambda office: office[0])
+    return offices
+
+
+def place_row(name: str, aliases, place_type: str, district: str, lat: float, lon: float):
+    return {
+        "name": name,
+        "name_mr": "",
+        "aliases": "|".join(alias for alias in aliases if alias and alias != name),
+        "type": place_type,
+        "district": district,
+        "latitude": f"{lat:.4f}",
+        "longitude": f"{lon:.4f}",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("offices", help="India Post pincode directory CSV")
+    parser.add_argument("--talukas", default=TALUKAS_PATH, help="district,taluka,headquarters CSV")
+    parser.add_argument("--output", default=GAZETTEER_PATH)
+    args = parser.parse_args()
+
+    rows = []
+    seen = set()
+    with open(args.output, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            if row["type"] == "district":
+                rows.append(row)
+                seen.add((normalize_place(row["name"]), row["district"]))
+    seed = Gazetteer(
+        [Place(row["name"], row["name_mr"], row["type"], row["district"], float(row["latitude"]), float(row["longitude"]))
+         for row in rows],
+        [row["aliases"].split("|") for row in rows],
+    )
+
+    offices = read_offices(args.offices, seed)
+    # (normalized name, district) -> coordinates of the best-ranked office
+    office_coords = {}
+    for _, name, district, lat, lon in offices:
+        office_coords.setdefault((normalize_place(name), district), (lat, lon))
+
+    with open(args.talukas, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            district = row["district"]
+            headquarters = [hq for hq in row["headquarters"].split("|") if hq] + [row["taluka"]]
+            coords = next((office_coords[key] for key in ((normalize_place(hq), district) for hq in headquarters)
+                           if key in office_coords), None)
+            if coords is None:
+                print(f"No post office for the headquarters of {row['taluka']} ({district})", file=sys.stderr)
+                continue
+            seen.add((normalize_place(row["taluka"]), district))
+            seen.update((normalize_place(hq), district) for hq in headquarters)
+            rows.append(place_row(row["taluka"], headquarters, "taluka", district, *coords))
+
+    for rank, name, district, lat, lon in offices:
+        key = (normalize_place(name), district)
+        if not key[0] or key in seen:
+            continue
+        seen.add(key)
+        place_type = "village" if rank == OFFICE_RANK["BO"] else "city"
+        rows.append(place_row(name, [half_alias(name)], place_type, district, lat, lon))
+
+    with open(args.output, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"{args.output}: {len(rows)} places")
+
+
+if __name__ == "__main__":
+    main()
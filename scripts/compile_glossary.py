@@ -0,0 +1,29 @@
+"""
+Compile assets/term_glossary.json into the memory-mapped binary glossary.
+
+Run from the repository root after changing the JSON glossary (the Docker
+image runs it at build time):
+    python scripts/compile_glossary.py [--force]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.tools.glossary import GLOSSARY_BIN_PATH, compile_glossary, load_glossary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--force", action="store_true", help="Rebuild even if the binary is up to date")
+    args = parser.parse_args()
+
+    if args.force:
+        compile_glossary()
+    glossary = load_glossary()
+    print(f"{GLOSSARY_BIN_PATH}: {glossary.size} terms, {os.path.getsize(GLOSSARY_BIN_PATH)} bytes")
+
+
+if __name__ == "__main__":
+    main()
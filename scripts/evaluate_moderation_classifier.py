@@ -0,0 +1,103 @@
+"""
+Offline evaluation of the local moderation stage against LLM verdicts.
+
+Replays logged queries (JSON lines with "query", "category" and optionally
+"has_context" and "latency_ms", as written to MODERATION_LOG_PATH) through
+the local moderator and reports:
+
+* coverage: share of queries answered locally instead of escalated
+* agreement with the LLM verdict on those queries, overall and per category
+* false accepts (local valid, LLM reject) and false rejects (the reverse)
+* local classification latency, and the LLM latency saved, using the
+  logged LLM latencies (or --llm-latency-ms when the log has none)
+
+Usage (from the repository root):
+    python scripts/evaluate_moderation_classifier.py moderation_log.jsonl [--model assets/moderation_classifier.npz]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.moderation_classifier import (
+    MODERATION_MODEL_PATH,
+    VALID_CATEGORY,
+    LocalModerator,
+    ModerationModel,
+)
+
+
+def evaluate(model, records, llm_latency_ms: float = 1500.0):
+    """Compare the local moderator's decisions with the logged verdicts."""
+    moderator = LocalModerator(model)
+    report = {
+        "total": 0, "covered": 0, "agreed": 0, "false_accepts": 0, "false_rejects": 0,
+        "by_stage": {}, "per_category": {}, "local_ms": [], "saved_ms": 0.0, "llm_ms": [],
+    }
+    for record in records:
+        expected = record["category"]
+        start = time.perf_counter()
+        predicted, stage = moderator.predict(record["query"], record.get("has_context", False))
+        report["local_ms"].append((time.perf_counter() - start) * 1000)
+        llm_ms = record.get("latency_ms")
+        if llm_ms is not None:
+            report["llm_ms"].append(llm_ms)
+        report["total"] += 1
+        report["by_stage"][stage] = report["by_stage"].get(stage, 0) + 1
+        category = report["per_category"].setdefault(expected, {"total": 0, "covered": 0, "agreed": 0})
+        category["total"] += 1
+        if predicted is None:
+            continue
+        report["covered"] += 1
+        category["covered"] += 1
+        report["saved_ms"] += llm_ms if llm_ms is not None else llm_latency_ms
+        if predicted == expected:
+            report["agreed"] += 1
+            category["agreed"] += 1
+        elif predicted == VALID_CATEGORY:
+            report["false_accepts"] += 1
+        elif expected == VALID_CATEGORY:
+            report["false_rejects"] += 1
+    return report
+
+
+def print_report(report):
+    total, covered = report["total"], report["covered"]
+    print(f"queries: {total}")
+    print(f"coverage: {covered}/{total} ({covered / max(total, 1):.1%}) answered locally, by stage {report['by_stage']}")
+    print(f"agreement on covered: {report['agreed']}/{covered} ({report['agreed'] / max(covered, 1):.1%})")
+    print(f"false accepts (local valid, LLM reject): {report['false_accepts']}")
+    print(f"false rejects (local reject, LLM valid): {report['false_rejects']}")
+    print(f"{'category':<28} {'total':>6} {'covered':>8} {'agreed':>7}")
+    for name, counts in sorted(report["per_category"].items()):
+        print(f"{name:<28} {counts['total']:>6} {counts['covered']:>8} {counts['agreed']:>7}")
+    local = sorted(report["local_ms"])
+    print(f"local latency: p50 {local[len(local) // 2]:.3f} ms, max {local[-1]:.3f} ms")
+    if report["llm_ms"]:
+        print(f"logged LLM moderation latency: median {statistics.median(report['llm_ms']):.0f} ms")
+    print(f"LLM latency saved: {report['saved_ms'] / 1000:.1f} s total, {report['saved_ms'] / max(total, 1):.0f} ms per query")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("logs", nargs="+", help="Moderation logs (JSON lines)")
+    parser.add_argument("--model", default=MODERATION_MODEL_PATH)
+    parser.add_argument("--llm-latency-ms", type=float, default=1500.0, help="Assumed LLM latency if not logged")
+    args = parser.parse_args()
+
+    records = []
+    for path in args.logs:
+        with open(path, encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    # Only the LLM's verdicts are ground truth
+    records = [r for r in records if r.get("source") != "local"]
+    model = ModerationModel.load(args.model) if os.path.exists(args.model) else None
+    print_report(evaluate(model, records, args.llm_latency_ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Load test of the Beckn tools against a local stub server.
+
+Fires concurrent weather/mandi/warehouse/scheme tool calls on one event loop,
+the way concurrent chats do, and compares:
+
+* blocking: a fresh `requests.post` per call inside the event loop (previous
+  behaviour), which serializes every call
+* async: the tools as shipped, sharing one pooled `httpx.AsyncClient`
+
+Usage (from the repository root):
+    python scripts/load_test_beckn.py [--requests 200] [--concurrency 50] [--latency-ms 200]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from agents.tools import beckn
+from agents.tools.mandi import MandiRequest, mandi_prices
+from agents.tools.scheme import SchemeRequest, get_scheme_info
+from agents.tools.warehouse import WarehouseRequest, warehouse_data
+from agents.tools.weather import WeatherRequest, weather_forecast
+from stub_beckn import StubServer
+
+LATITUDE, LONGITUDE = 19.99, 73.78
+
+ASYNC_CALLS = [
+    lambda: weather_forecast(LATITUDE, LONGITUDE),
+    lambda: mandi_prices(LATITUDE, LONGITUDE),
+    lambda: warehouse_data(LATITUDE, LONGITUDE),
+    lambda: get_scheme_info("kcc"),
+]
+
+PAYLOADS = [
+    lambda: WeatherRequest(latitude=LATITUDE, longitude=LONGITUDE).get_payload(),
+    lambda: MandiRequest(latitude=LATITUDE, longitude=LONGITUDE).get_payload(),
+    lambda: WarehouseRequest(latitude=LATITUDE, longitude=LONGITUDE).get_payload(),
+    lambda: SchemeRequest(scheme_name="kcc").get_payload(),
+]
+
+
+async def blocking_call(i: int):
+    requests.post(os.environ["BAP_ENDPOINT"], json=PAYLOADS[i % len(PAYLOADS)](), timeout=(10, 15))
+
+
+async def async_call(i: int):
+    await ASYNC_CALLS[i % len(ASYNC_CALLS)]()
+
+
+async def run(call, n_requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await call(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(n_requests)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95) - 1]
+
+
+async def main_async(args):
+    await beckn.start_client()
+    try:
+        print(f"{'mode':<10} {'requests':>9} {'wall s':>8} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8}")
+        modes = [("blocking", blocking_call, args.blocking_requests), ("async", async_call, args.requests)]
+        for name, call, n_requests in modes:
+            elapsed, p50, p95 = await run(call, n_requests, args.concurrency)
+            print(f"{name:<10} {n_requests:>9} {elapsed:>8.2f} {n_requests / elapsed:>8.1f} {p50:>8.1f} {p95:>8.1f}")
+    finally:
+        await beckn.close_client()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--blocking-requests", type=int, default=20, help="the blocking mode is slow, keep this small")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with StubServer(args.port, args.latency_ms) as stub:
+        os.environ["BAP_ENDPOINT"] = stub.url
+        asyncio.run(main_async(args))
+        print(f"stub served {stub.requests} requests")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Local stub of the Beckn BAP endpoint, for load tests and benchmarks.
+
+Answers every search with a valid empty catalog for the request's domain,
+after a configurable delay that stands in for upstream latency. Warehouse
+searches return a synthetic catalog of warehouses spread over Maharashtra.
+
+Usage (from the repository root):
+    python scripts/stub_beckn.py [--port 8765] [--latency-ms 200]
+
+Then point the tools at it with BAP_ENDPOINT=http://127.0.0.1:8765/search.
+"""
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+
+
+def warehouse_providers(n_warehouses: int, seed: int = 0):
+    """A provider with n warehouses at random locations in Maharashtra."""
+    rng = random.Random(seed)
+    fulfillments, items = [], []
+    for i in range(n_warehouses):
+        gps = f"{rng.uniform(15.6, 22.1):.6f}, {rng.uniform(72.6, 80.9):.6f}"
+        fulfillments.append({
+            "id": f"f{i}", "type": "storage", "status": [{"id": "1", "code": "active"}],
+            "locations": {"id": f"l{i}", "gps": gps},
+            "categories": [{"id": "c1", "name": "warehouse", "descriptor": {"name": "Warehouse"}}],
+        })
+        items.append({
+            "id": f"w{i}",
+            "descriptor": {"name": f"Warehouse {i}", "short_desc": "Registered warehouse"},
+            "address": {"address": f"Plot {i}", "district": "Nashik", "region": "Nashik", "taluka": "Niphad", "vilage": f"Village {i}", "pinCode": "422303"},
+            "contact": {"person": "Manager", "email": "manager@example.com", "phone": "0000000000", "webUrl": "http://example.com"},
+            "price": {"currency": "INR", "value": "10", "unit": "per quintal per month"},
+            "rating": "4",
+            "creator": {"name": "MSWC"},
+            "fulfillment_ids": [f"f{i}"],
+            "status": ["active"],
+            "category_ids": ["c1"],
+            "tags": [{"list": [{"descriptor": {"code": "capacity"}, "value": f"{1000 + i} MT"}]}],
+        })
+    return [{"id": "p1", "descriptor": {"name": "MSWC"}, "fulfillments": fulfillments, "items": items}]
+
+
+def create_stub_app(latency_ms: float = 200.0, n_warehouses: int = 500) -> FastAPI:
+    app = FastAPI()
+    app.state.requests = 0
+    warehouses = warehouse_providers(n_warehouses)
+
+    @app.post("/search")
+    async def search(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        await asyncio.sleep(latency_ms / 1000)
+        context = {**body["context"], "action": "on_search", "bap_uri": None}
+        category = body["message"]["intent"]["category"]["descriptor"].get("code")
+        providers = warehouses if category == "warehouse" else []
+        return {
+            "context": context,
+            "responses": [{
+                "context": context,
+                "message": {"catalog": {"descriptor": {"name": "stub"}, "providers": providers}},
+            }],
+        }
+
+    return app
+
+
+class StubServer:
+    """Run the stub app in a background thread.
+
+    Args:
+        port: Port to listen on (127.0.0.1).
+        latency_ms: Delay added to every response.
+        n_warehouses: Size of the warehouse catalog.
+    """
+
+    def __init__(self, port: int = 8765, latency_ms: float = 200.0, n_warehouses: int = 500):
+        self.app = create_stub_app(latency_ms, n_warehouses)
+        self.url = f"http://127.0.0.1:{port}/search"
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def requests(self) -> int:
+        return self.app.state.requests
+
+    def __enter__(self):
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--warehouses", type=int, default=500)
+    args = parser.parse_args()
+    uvicorn.run(create_stub_app(args.latency_ms, args.warehouses), host="127.0.0.1", port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Local stub of the Bhashini inference pipeline, for load tests and benchmarks.
+
+Answers `asr`, `audio-lang-detection` and `tts` pipeline tasks with canned
+outputs after a configurable delay that stands in for inference latency.
+A fraction of requests can fail with 503 to exercise retries, and TTS can
+take longer for longer input (--tts-ms-per-char).
+
+Usage (from the repository root):
+    python scripts/stub_bhashini.py [--port 8766] [--latency-ms 300] [--failure-rate 0] [--tts-ms-per-char 0]
+
+Then point the helpers at it with
+BHASHINI_PIPELINE_URL=http://127.0.0.1:8766/services/inference/pipeline.
+"""
+import argparse
+import asyncio
+import base64
+import io
+import random
+import threading
+import time
+import wave
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def silence_wav(seconds: float, sampling_rate: int = 8000) -> bytes:
+    """A 16-bit mono WAV file of silence."""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sampling_rate)
+        wav.writeframes(b"\x00\x00" * int(seconds * sampling_rate))
+    return buffer.getvalue()
+
+
+# Half a second of silence, base64 encoded as in ASR requests
+SILENCE = base64.b64encode(silence_wav(0.5)).decode()
+
+
+def task_output(task: dict, input_data: dict) -> dict:
+    task_type = task["taskType"]
+    if task_type == "asr":
+        return {"taskType": task_type, "output": [{"source": "कांद्याचा भाव काय आहे"}]}
+    if task_type == "audio-lang-detection":
+        return {"taskType": task_type, "output": [{"langPrediction": [{"langCode": "mr", "langScore": 0.9}]}]}
+    if task_type == "tts":
+        # About 60 ms of audio per character, like real speech
+        sampling_rate = task.get("config", {}).get("samplingRate", 8000)
+        audio = [
+            {"audioContent": base64.b64encode(silence_wav(0.06 * len(item["source"]), sampling_rate)).decode()}
+            for item in input_data.get("input", [])
+        ]
+        return {"taskType": task_type, "audio": audio}
+    return {"taskType": task_type, "output": []}
+
+
+def create_stub_app(
+    latency_ms: float = 300.0, failure_rate: float = 0.0, tts_ms_per_char: float = 0.0, seed: int = 0
+) -> FastAPI:
+    app = FastAPI()
+    app.state.requests = 0
+    rng = random.Random(seed)
+
+    @app.post("/services/inference/pipeline")
+    async def pipeline(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        tts_chars = sum(len(item.get("source", "")) for item in body["inputData"].get("input", []))
+        await asyncio.sleep((latency_ms + tts_ms_per_char * tts_chars) / 1000)
+        if rng.random() < failure_rate:
+            return JSONResponse({"detail": "stub overloaded"}, status_code=503)
+        tasks = body["pipelineTasks"]
+        return {"pipelineResponse": [task_output(task, body["inputData"]) for task in tasks]}
+
+    return app
+
+
+class StubServer:
+    """Run the stub app in a background thread.
+
+    Args:
+        port: Port to listen on (127.0.0.1).
+        latency_ms: Delay added to every response.
+        failure_rate: Fraction of requests answered with 503.
+        tts_ms_per_char: Extra delay per character of TTS input.
+    """
+
+    def __init__(
+        self, port: int = 8766, latency_ms: float = 300.0, failure_rate: float = 0.0, tts_ms_per_char: float = 0.0
+    ):
+        self.app = create_stub_app(latency_ms, failure_rate, tts_ms_per_char)
+        self.url = f"http://127.0.0.1:{port}/services/inference/pipeline"
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def requests(self) -> int:
+        return self.app.state.requests
+
+    def __enter__(self):
+        self._thread.start()
+        while not self._server.started:
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self._server.should_exit = True
+        self._thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--tts-ms-per-char", type=float, default=0.0)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_stub_app(args.latency_ms, args.failure_rate, args.tts_ms_per_char), host="127.0.0.1", port=args.port
+    )
+
+
+if __name__ == "__main__":
+    main()
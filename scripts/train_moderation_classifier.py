@@ -0,0 +1,74 @@
+"""
+Train the local moderation model from logged LLM moderation verdicts.
+
+Each input file is JSON lines with at least "query" and "category" (the
+format written to MODERATION_LOG_PATH). Verdicts made by the local
+moderator itself ("source": "local") are skipped, so the model only learns
+from the LLM; the bundled seed examples are always included. When a query
+appears more than once, its latest verdict wins.
+
+Usage (from the repository root):
+    python scripts/train_moderation_classifier.py [moderation_log.jsonl ...] [--holdout 0.2]
+
+With --holdout, a random fraction of the examples is kept out of training
+and the model is evaluated on it (see scripts/evaluate_moderation_classifier.py).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.moderation_classifier import (
+    CATEGORIES,
+    MODERATION_MODEL_PATH,
+    MODERATION_SEED_PATH,
+    ModerationModel,
+    normalize_query,
+)
+
+
+def read_examples(paths):
+    """Latest LLM (or seed) verdict per normalized query."""
+    examples = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get("source") == "local" or record.get("category") not in CATEGORIES:
+                    continue
+                examples[normalize_query(record["query"])] = record["category"]
+    return list(examples.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("logs", nargs="*", help="Moderation logs (JSON lines)")
+    parser.add_argument("--holdout", type=float, default=0.0, help="Fraction of examples to evaluate on")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=MODERATION_MODEL_PATH)
+    args = parser.parse_args()
+
+    examples = read_examples([MODERATION_SEED_PATH, *args.logs])
+    random.Random(args.seed).shuffle(examples)
+    n_holdout = int(len(examples) * args.holdout)
+    holdout, train = examples[:n_holdout], examples[n_holdout:]
+
+    counts = {category: sum(1 for _, label in train if label == category) for category in CATEGORIES}
+    print(f"training on {len(train)} examples: {counts}")
+    model = ModerationModel.train([text for text, _ in train], [label for _, label in train], epochs=args.epochs)
+    model.save(args.output)
+    print(f"saved {args.output} ({os.path.getsize(args.output)} bytes)")
+
+    if holdout:
+        from evaluate_moderation_classifier import evaluate, print_report
+        print_report(evaluate(model, [{"query": q, "category": c} for q, c in holdout]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""Randomized equivalence of the history helpers with their deepcopy-based originals.
+
+The `_baseline_*` functions are the implementations `app/utils.py` had
+before trimming and pairing stopped deep-copying messages. Every helper must
+return equal messages for any history, and never mutate its input.
+"""
+import asyncio
+import random
+from copy import deepcopy
+from typing import List
+
+import pytest
+import tiktoken
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+
+import helpers.utils
+from app import utils
+from app.core.history import MemoryHistoryStore
+from helpers.utils import count_tokens_for_part
+
+TRIALS = 500
+BUDGETS = (0, 5, 50, 200, 100_000)
+
+
+@pytest.fixture(autouse=True)
+def byte_encoder(monkeypatch):
+    """Count UTF-8 bytes instead of cl100k tokens (no download needed)."""
+    encoding = tiktoken.Encoding(
+        "bytes",
+        pat_str=r"\S+|\s+",
+        mergeable_ranks={bytes([i]): i for i in range(256)},
+        special_tokens={},
+    )
+    monkeypatch.setattr(helpers.utils, "get_encoder", lambda *args, **kwargs: encoding)
+
+
+# -----------------------
+# Baseline implementations
+# -----------------------
+def _baseline_filter_out_tool_calls(messages: List[ModelMessage]) -> List[ModelMessage]:
+    if not messages:
+        return []
+    filtered_messages = []
+    for message in messages:
+        msg_copy = deepcopy(message)
+        filtered_parts = []
+        for part in msg_copy.parts:
+            if not hasattr(part, 'part_kind') or part.part_kind not in ['tool-call', 'tool-return']:
+                filtered_parts.append(part)
+        if filtered_parts:
+            msg_copy.parts = filtered_parts
+            filtered_messages.append(msg_copy)
+    return filtered_messages
+
+
+def _baseline_get_message_pairs(history: List[ModelMessage], limit: int = None) -> List[List]:
+    if not history:
+        return []
+    pairs = []
+    i = len(history) - 1
+    while i > 0 and (limit is None or len(pairs) < limit):
+        assistant_idx = None
+        text_part = None
+        for j in range(i, -1, -1):
+            for part in history[j].parts:
+                if getattr(part, "part_kind", "") == "text":
+                    assistant_idx = j
+                    text_part = part
+                    break
+            if assistant_idx is not None:
+                break
+        if assistant_idx is None or text_part is None:
+            break
+        user_idx = None
+        user_part = None
+        for j in range(assistant_idx - 1, -1, -1):
+            for part in history[j].parts:
+                if getattr(part, "part_kind", "") == "user-prompt":
+                    user_idx = j
+                    user_part = part
+                    break
+            if user_idx is not None:
+                break
+        if user_idx is None or user_part is None:
+            break
+        pairs.append([deepcopy(user_part), deepcopy(text_part)])
+        i = user_idx - 1
+    return pairs
+
+
+def _baseline_format_message_pairs(history: List[ModelMessage], limit: int = None) -> List[str]:
+    return [
+        f"""**User Message**:\n{user_part.content}\n\n**Assistant Message**:\n{assistant_part.content}"""
+        for user_part, assistant_part in _baseline_get_message_pairs(history, limit)
+    ]
+
+
+def _baseline_trim_history(
+    history: List[ModelMessage],
+    max_tokens: int = 28_000,
+    *,
+    include_system_prompts: bool = True,
+    include_tool_calls: bool = True,
+) -> List[ModelMessage]:
+    prepped: List[ModelMessage] = []
+    for msg in history:
+        if include_system_prompts:
+            prepped.append(msg)
+        else:
+            new_parts = [p for p in msg.parts if not isinstance(p, SystemPromptPart)]
+            if new_parts:
+                m2 = deepcopy(msg)
+                m2.parts = new_parts
+                prepped.append(m2)
+
+    turns: List[List[ModelMessage]] = []
+    current: List[ModelMessage] = []
+    for msg in prepped:
+        is_user = any(getattr(p, "part_kind", "") == "user-prompt" for p in msg.parts)
+        if is_user and current:
+            turns.append(current)
+            current = [msg]
+        else:
+            current.append(msg)
+    if current:
+        turns.append(current)
+
+    clean_turns: List[List[ModelMessage]] = []
+    for turn in turns:
+        calls = {p.tool_call_id for m in turn for p in m.parts if getattr(p, "part_kind", "") == "tool-call"}
+        returns = {p.tool_call_id for m in turn for p in m.parts if getattr(p, "part_kind", "") == "tool-return"}
+        good_ids = calls & returns
+        filtered: List[ModelMessage] = []
+        for m in turn:
+            kept = []
+            for p in m.parts:
+                if hasattr(p, "content") and not getattr(p, "content"):
+                    continue
+                kind = getattr(p, "part_kind", "")
+                if kind in ("tool-call", "tool-return"):
+                    if not include_tool_calls or p.tool_call_id not in good_ids:
+                        continue
+                kept.append(p)
+            if kept:
+                m2 = deepcopy(m)
+                m2.parts = kept
+                filtered.append(m2)
+        if filtered:
+            clean_turns.append(filtered)
+
+    turn_tokens = [sum(count_tokens_for_part(p) for m in t for p in m.parts) for t in clean_turns]
+
+    system_turn = None
+    system_turn_tokens = 0
+    if include_system_prompts:
+        for i, turn in enumerate(clean_turns):
+            if any(isinstance(p, SystemPromptPart) for m in turn for p in m.parts):
+                system_turn = turn
+                system_turn_tokens = turn_tokens[i]
+                clean_turns = clean_turns[:i] + clean_turns[i + 1:]
+                turn_tokens = turn_tokens[:i] + turn_tokens[i + 1:]
+                break
+
+    remaining_tokens = max_tokens
+    if system_turn is not None:
+        remaining_tokens = max(0, remaining_tokens - system_turn_tokens)
+
+    selected_turns = []
+    total_tokens = 0
+    for turn, tk in zip(reversed(clean_turns), reversed(turn_tokens)):
+        if total_tokens + tk <= remaining_tokens:
+            selected_turns.insert(0, turn)
+            total_tokens += tk
+        else:
+            break
+
+    final_turns = []
+    if system_turn is not None:
+        final_turns.append(system_turn)
+    final_turns.extend(selected_turns)
+    return [msg for turn in final_turns for msg in turn if msg.parts]
+
+
+# -----------------------
+# Random histories
+# -----------------------
+TOOL_CALL_IDS = [f"call_{i}" for i in range(8)]
+
+
+def _text(rng: random.Random) -> str:
+    return rng.choice(["", "hi", "cotton price " * rng.randint(1, 30), "कापूस भाव"])
+
+
+def random_history(rng: random.Random, length: int) -> List[ModelMessage]:
+    """Arbitrary messages: empty parts, stray system parts, unpaired tool calls/returns."""
+    history = []
+    for _ in range(length):
+        parts = []
+        if rng.random() < 0.5:
+            for _ in range(rng.randint(1, 3)):
+                kind = rng.random()
+                if kind < 0.15:
+                    parts.append(SystemPromptPart(content=_text(rng)))
+                elif kind < 0.6:
+                    parts.append(UserPromptPart(content=_text(rng)))
+                else:
+                    parts.append(ToolReturnPart(tool_name="t", content=_text(rng), tool_call_id=rng.choice(TOOL_CALL_IDS)))
+            history.append(ModelRequest(parts=parts))
+        else:
+            for _ in range(rng.randint(1, 3)):
+                if rng.random() < 0.5:
+                    parts.append(TextPart(content=_text(rng)))
+                else:
+                    parts.append(ToolCallPart(tool_name="t", args={"a": _text(rng)}, tool_call_id=rng.choice(TOOL_CALL_IDS)))
+            history.append(ModelResponse(parts=parts))
+    return history
+
+
+def random_turns(rng: random.Random, count: int) -> List[List[ModelMessage]]:
+    """Turns as the chat service stores them: system prompt first, tool calls answered."""
+    turns = []
+    for index in range(count):
+        request = [UserPromptPart(content=_text(rng) or "hi")]
+        if index == 0:
+            request.insert(0, SystemPromptPart(content="You are a farming assistant. " * rng.randint(1, 5)))
+        turn = [ModelRequest(parts=request)]
+        for call in range(rng.randint(0, 2)):
+            call_id = f"call_{index}_{call}"
+            turn.append(ModelResponse(parts=[ToolCallPart(tool_name="t", args={"a": _text(rng)}, tool_call_id=call_id)]))
+            turn.append(ModelRequest(parts=[ToolReturnPart(tool_name="t", content=_text(rng) or "ok", tool_call_id=call_id)]))
+        turn.append(ModelResponse(parts=[TextPart(content=_text(rng) or "ok")]))
+        turns.append(turn)
+    return turns
+
+
+def messy_turns(rng: random.Random, count: int) -> List[List[ModelMessage]]:
+    """Stored turns with unpaired tool calls, orphan tool returns and empty parts.
+
+    `trim_history` drops those parts, so a turn's stored token count (taken
+    over all its parts) can exceed what it costs once trimmed.
+    """
+    turns = []
+    for index in range(count):
+        request = [UserPromptPart(content=_text(rng))]
+        if index == 0:
+            request.insert(0, SystemPromptPart(content="You are a farming assistant. " * rng.randint(1, 5)))
+        turn = [ModelRequest(parts=request)]
+        for call in range(rng.randint(0, 3)):
+            call_id = f"call_{index}_{call}"
+            kind = rng.random()
+            if kind < 0.4:
+                turn.append(ModelResponse(parts=[ToolCallPart(tool_name="t", args={"a": _text(rng)}, tool_call_id=call_id)]))
+                turn.append(ModelRequest(parts=[ToolReturnPart(tool_name="t", content=_text(rng), tool_call_id=call_id)]))
+            elif kind < 0.7:
+                # Unpaired call: the run ended before the tool answered
+                turn.append(ModelResponse(parts=[ToolCallPart(tool_name="t", args={"a": _text(rng)}, tool_call_id=call_id)]))
+            else:
+                # Orphan return: its call is not in this turn
+                turn.append(ModelRequest(parts=[ToolReturnPart(tool_name="t", content=_text(rng), tool_call_id=f"{call_id}_lost")]))
+        turn.append(ModelResponse(parts=[TextPart(content=_text(rng)) for _ in range(rng.randint(1, 2))]))
+        turns.append(turn)
+    return turns
+
+
+def _snapshot(history: List[ModelMessage]):
+    return [(type(message), list(message.parts)) for message in history]
+
+
+# -----------------------
+# Tests
+# -----------------------
+def test_trim_history_matches_baseline():
+    rng = random.Random(7)
+    for _ in range(TRIALS):
+        history = random_history(rng, rng.randint(0, 40))
+        before = _snapshot(history)
+        for max_tokens in BUDGETS:
+            for include_system_prompts in (True, False):
+                for include_tool_calls in (True, False):
+                    flags = dict(include_system_prompts=include_system_prompts, include_tool_calls=include_tool_calls)
+                    assert utils.trim_history(history, max_tokens, **flags) == \
+                        _baseline_trim_history(history, max_tokens, **flags)
+        assert _snapshot(history) == before
+
+
+def test_filter_and_pairs_match_baseline():
+    rng = random.Random(11)
+    for _ in range(TRIALS):
+        history = random_history(rng, rng.randint(0, 40))
+        before = _snapshot(history)
+        assert utils.filter_out_tool_calls(history) == _baseline_filter_out_tool_calls(history)
+        for limit in (None, 1, 3):
+            assert utils.get_message_pairs(history, limit) == _baseline_get_message_pairs(history, limit)
+            assert utils.format_message_pairs(history, limit) == _baseline_format_message_pairs(history, limit)
+        assert _snapshot(history) == before
+
+
+def test_budgeted_load_matches_trimming_the_full_history(monkeypatch):
+    """Loading with `max_tokens` then trimming equals trimming the whole stored history."""
+    monkeypatch.setattr(utils, "history_store", MemoryHistoryStore())
+    rng = random.Random(13)
+
+    async def check(session_id: str):
+        turns = random_turns(rng, rng.randint(1, 12))
+        for turn in turns:
+            await utils.append_message_history(session_id, turn)
+        full_history = [message for turn in turns for message in turn]
+        assert await utils.get_turn_count(session_id) == len(turns)
+        for max_tokens in BUDGETS:
+            loaded, turn_count = await utils.load_message_history(session_id, max_tokens=max_tokens)
+            assert turn_count == len(turns)
+            assert utils.trim_history(loaded, max_tokens) == _baseline_trim_history(full_history, max_tokens)
+
+    for trial in range(TRIALS // 5):
+        asyncio.run(check(f"session-{trial}"))
+
+
+def test_budgeted_load_of_messy_turns_keeps_a_suffix_of_the_trimmed_history(monkeypatch):
+    """Stored counts include parts trimming drops, so the load may keep fewer turns, never others."""
+    monkeypatch.setattr(utils, "history_store", MemoryHistoryStore())
+    rng = random.Random(17)
+
+    async def check(session_id: str):
+        turns = messy_turns(rng, rng.randint(1, 12))
+        for turn in turns:
+            await utils.append_message_history(session_id, turn)
+        full_history = [message for turn in turns for message in turn]
+
+        stored_tokens = await utils.history_store.turn_tokens(session_id)
+        assert len(stored_tokens) == len(turns)
+        for turn, stored in zip(turns, stored_tokens):
+            trimmed = utils.trim_history(turn, 10**9)
+            assert stored >= sum(count_tokens_for_part(p) for m in trimmed for p in m.parts)
+
+        for max_tokens in BUDGETS:
+            loaded, turn_count = await utils.load_message_history(session_id, max_tokens=max_tokens)
+            assert turn_count == len(turns)
+            trimmed = utils.trim_history(loaded, max_tokens)
+            expected = _baseline_trim_history(full_history, max_tokens)
+            if max_tokens >= sum(stored_tokens):
+                assert trimmed == expected
+            # The system turn, then the newest turns of the full trim
+            assert any(
+                trimmed == expected[:kept] + expected[len(expected) - len(trimmed) + kept:]
+                for kept in range(len(trimmed) + 1)
+            )
+
+    for trial in range(TRIALS // 5):
+        asyncio.run(check(f"session-{trial}"))
@@ -0,0 +1,40 @@
+"""Regression tests for the local moderation first stage."""
+import pytest
+
+from agents.moderation_classifier import VALID_CATEGORY, LocalModerator, load_local_moderator
+
+# Non-agricultural queries that share a substring or a loose word with farming terms
+ESCALATED = [
+    "प्रसिद्ध गायक कोण आहे",
+    "स्वभाव कसा सुधारावा",
+    "how do I get my kid to sleep",
+    "what is the market price of petrol",
+    "which seeds should I smuggle across the border",
+    "rain dance lyrics",
+    "write a letter to my boss about leave for harvest",
+]
+
+ACCEPTED = [
+    "kapus bhav",
+    "कापसाचा भाव काय आहे",
+    "कांद्याचे दर",
+    "how to control pink bollworm in cotton",
+    "सोयाबीन पेरणी कधी करावी",
+    "गायीला चारा कोणता द्यावा",
+]
+
+
+@pytest.fixture(params=["rules", "model"])
+def moderator(request):
+    return LocalModerator(None) if request.param == "rules" else load_local_moderator()
+
+
+@pytest.mark.parametrize("query", ESCALATED)
+def test_ambiguous_queries_are_not_accepted(moderator, query):
+    category, _ = moderator.predict(query)
+    assert category != VALID_CATEGORY
+
+
+@pytest.mark.parametrize("query", ACCEPTED)
+def test_obvious_farming_queries_are_accepted(query):
+    assert LocalModerator(None).predict(query) == (VALID_CATEGORY, "rule")
@@ -0,0 +1,70 @@
+"""Near-miss queries must not reuse each other's semantic cache answers."""
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.core.semantic_cache import HashingEmbedder, SemanticCache, key_terms
+
+# Same question about a different crop, pest, input or place
+NEAR_MISSES = [
+    ("how to control pink bollworm in cotton", "how to control pink bollworm in soybean"),
+    ("fertilizer dose for wheat", "fertilizer dose for maize"),
+    ("onion price in Nashik", "onion price in Pune"),
+    ("kapus bhav Akola", "kapus bhav Amravati"),
+    ("कापूस भाव", "सोयाबीन भाव"),
+]
+SAME_QUESTION = ("How to control pink bollworm in cotton?", "how to control  pink bollworm in cotton")
+
+
+class ConstantEmbedder:
+    """Rates every pair of queries as identical (similarity 1.0)."""
+
+    dim = 4
+
+    def embed(self, texts):
+        return np.ones((len(texts), self.dim), dtype=np.float32) / 2
+
+
+def _cache(embedder) -> SemanticCache:
+    return SemanticCache(threshold=settings.semantic_cache_threshold, max_entries=100, ttl=3600, embedder=embedder)
+
+
+def _similarity(first: str, second: str) -> float:
+    vectors = HashingEmbedder().embed([first, second])
+    return float(vectors[0] @ vectors[1])
+
+
+@pytest.mark.parametrize("cached, query", NEAR_MISSES)
+def test_near_misses_fall_below_the_threshold(cached, query):
+    assert _similarity(cached, query) < settings.semantic_cache_threshold
+    assert key_terms(cached) != key_terms(query)
+
+
+@pytest.mark.parametrize("cached, query", NEAR_MISSES)
+def test_near_misses_are_not_served_even_at_full_similarity(cached, query):
+    cache = _cache(ConstantEmbedder())
+
+    async def check():
+        await cache.store(cached, "en", "answer", [], [])
+        assert await cache.lookup(query, "en") is None
+        # Storing the near miss must not replace the cached answer either
+        await cache.store(query, "en", "other answer", [], [])
+        assert len(cache._entries) == 2
+
+    asyncio.run(check())
+    assert cache.term_mismatches == 2
+
+
+def test_same_question_is_served():
+    cached, query = SAME_QUESTION
+    assert _similarity(cached, query) >= settings.semantic_cache_threshold
+    cache = _cache(HashingEmbedder())
+
+    async def check():
+        await cache.store(cached, "en", "answer", [], [])
+        entry = await cache.lookup(query, "en")
+        assert entry is not None and entry.answer == "answer"
+
+    asyncio.run(check())